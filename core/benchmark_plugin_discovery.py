@@ -0,0 +1,106 @@
+"""Startup benchmark of plugin discovery.
+
+Creates a folder of synthetic plugins and measures, each time in a fresh process,
+how long the MadHatter takes to discover and activate all of them:
+a cold start (no plugin index) and then warm starts (plugin index already on disk).
+
+Run from the `core` folder:
+    python benchmark_plugin_discovery.py --plugins 60 --runs 3
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+PLUGIN_MODULE = '''
+from cat.mad_hatter.decorators import hook, tool
+
+
+@hook
+def before_cat_reads_message(user_message_json, cat):
+    return user_message_json
+
+
+@tool
+def tool_{plugin}_{module}(tool_input, cat):
+    """Synthetic tool {module} of plugin {plugin}."""
+    return tool_input
+'''
+
+STARTUP = """
+import sys, time, json
+import cat.utils as utils
+utils.get_plugins_path = lambda: sys.argv[1]
+
+from cat.db import crud
+from cat.db.models import Setting
+crud.upsert_setting_by_name(Setting(name="active_plugins", value=json.loads(sys.argv[2])))
+
+from cat.mad_hatter.mad_hatter import MadHatter
+start = time.perf_counter()
+mad_hatter = MadHatter()
+print(json.dumps({"seconds": time.perf_counter() - start, "tools": len(mad_hatter.tools)}))
+"""
+
+
+def create_plugins(folder, n_plugins, n_modules):
+    plugin_ids = []
+    for p in range(n_plugins):
+        plugin_id = f"bench_plugin_{p}"
+        plugin_path = os.path.join(folder, plugin_id)
+        os.makedirs(plugin_path)
+        for m in range(n_modules):
+            with open(os.path.join(plugin_path, f"module_{m}.py"), "w") as f:
+                f.write(PLUGIN_MODULE.format(plugin=p, module=m))
+        with open(os.path.join(plugin_path, "plugin.json"), "w") as f:
+            json.dump({"name": f"Bench plugin {p}", "version": "0.0.1"}, f)
+        # already installed, so only the requirements check is measured
+        with open(os.path.join(plugin_path, "requirements.txt"), "w") as f:
+            f.write("pydantic\n")
+        plugin_ids.append(plugin_id)
+    return plugin_ids
+
+
+def startup(plugins_folder, plugin_ids, env):
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP, plugins_folder, json.dumps(plugin_ids)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plugins", type=int, default=60, help="number of synthetic plugins")
+    parser.add_argument("--modules", type=int, default=5, help="python modules per plugin")
+    parser.add_argument("--runs", type=int, default=3, help="warm startups to measure")
+    args = parser.parse_args()
+
+    # plugin modules are imported by their dotted path, so plugins live under the current folder
+    with tempfile.TemporaryDirectory(dir=".", prefix="benchmark_") as tmp:
+        tmp = os.path.relpath(tmp)
+        plugins_folder = os.path.join(tmp, "plugins") + "/"
+        plugin_ids = create_plugins(plugins_folder, args.plugins, args.modules)
+
+        env = {
+            **os.environ,
+            "CCAT_METADATA_FILE": os.path.join(tmp, "metadata.json"),
+            "CCAT_PLUGIN_INDEX_FILE": os.path.join(tmp, "plugin_index.json"),
+            "CCAT_LOG_LEVEL": "ERROR",
+        }
+
+        cold = startup(plugins_folder, plugin_ids, env)
+        print(f"cold start: {cold['seconds']:.3f}s ({args.plugins} plugins, {cold['tools']} tools)")
+
+        warm = [startup(plugins_folder, plugin_ids, env)["seconds"] for _ in range(args.runs)]
+        print(f"warm start: {min(warm):.3f}s best, {sum(warm) / len(warm):.3f}s mean over {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,9 @@ from langchain.docstore.document import Document
 from cat.mad_hatter.mad_hatter import MadHatter
 from cat.looking_glass import prompts
 from cat.utils import verbal_timedelta, BaseModelDict
-from cat.env import get_env
+from cat.env import get_config
+from cat import metrics
+from cat.tracing import Tracer
 from cat.agents import BaseAgent, AgentOutput
 from cat.agents.memory_agent import MemoryAgent
 from cat.agents.procedures_agent import ProceduresAgent
@@ -21,7 +23,7 @@ class MainAgent(BaseAgent):
     def __init__(self):
         self.mad_hatter = MadHatter()
 
-        if get_env("CCAT_LOG_LEVEL") in ["DEBUG", "INFO"]:
+        if get_config().log_level in ["DEBUG", "INFO"]:
             self.verbose = True
         else:
             self.verbose = False
@@ -65,19 +67,24 @@ class MainAgent(BaseAgent):
         )
 
         # run tools and forms
-        procedures_agent = ProceduresAgent()
-        procedures_agent_out : AgentOutput = await procedures_agent.execute(stray)
+        #   (sub agents are options, built once for the plugins registry of this turn)
+        procedures_agent: ProceduresAgent = self.mad_hatter.get_option_instance("procedures_agent")
+        with Tracer().span("agent", agent="procedures"), \
+                metrics.STAGE_DURATION.time(stage="procedures_agent"):
+            procedures_agent_out : AgentOutput = await procedures_agent.execute(stray)
         if procedures_agent_out.return_direct:
             return procedures_agent_out
 
         # we run memory agent if:
         # - no procedures were recalled or selected or
         # - procedures have all return_direct=False
-        memory_agent = MemoryAgent()
-        memory_agent_out : AgentOutput = await memory_agent.execute(
-            # TODO: should all agents only receive stray?
-            stray, prompt_prefix, prompt_suffix
-        )
+        memory_agent: MemoryAgent = self.mad_hatter.get_option_instance("memory_agent")
+        with Tracer().span("agent", agent="memory"), \
+                metrics.STAGE_DURATION.time(stage="memory_agent"):
+            memory_agent_out : AgentOutput = await memory_agent.execute(
+                # TODO: should all agents only receive stray?
+                stray, prompt_prefix, prompt_suffix
+            )
 
         memory_agent_out.intermediate_steps += procedures_agent_out.intermediate_steps
 
@@ -1,6 +1,7 @@
 import traceback
 import random
-from typing import Dict
+import threading
+from typing import Dict, Tuple
 
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.prompts.chat import SystemMessagePromptTemplate
@@ -13,6 +14,7 @@ from cat.looking_glass.output_parser import ChooseProcedureOutputParser, LLMActi
 from cat.experimental.form import CatForm
 from cat.mad_hatter.decorators.tool import CatTool
 from cat.mad_hatter.mad_hatter import MadHatter
+from cat.mad_hatter.circuit_breaker import TIMEOUT_ERRORS
 from cat.mad_hatter.plugin import Plugin
 from cat.log import log
 from cat.looking_glass.callbacks import ModelInteractionHandler
@@ -24,6 +26,13 @@ class ProceduresAgent(BaseAgent):
     form_agent = FormAgent()
     allowed_procedures: Dict[str, CatTool | CatForm] = {}
 
+    # tools list, tool names and examples of the prompt, by allowed procedures names,
+    #   valid for the plugins registry they were computed with
+    prompt_parts_cache_size = 256
+    _prompt_parts_cache: Dict[Tuple[str, ...], Dict[str, str]] = {}
+    _prompt_parts_registry = None
+    _prompt_parts_lock = threading.Lock()
+
     async def execute(self, stray) -> AgentOutput:
         
         # Run active form if present
@@ -97,13 +106,8 @@ class ProceduresAgent(BaseAgent):
         
         # Prepare info to fill up the prompt
         prompt_variables = {
-            "tools": "\n".join(
-                f'- "{tool.name}": {tool.description}'
-                for tool in allowed_procedures.values()
-            ),
-            "tool_names": '"' + '", "'.join(allowed_procedures.keys()) + '"',
+            **self.get_prompt_parts(allowed_procedures),
             #"chat_history": stray.stringify_chat_history(),
-            "examples": self.generate_examples(allowed_procedures),
         }
 
         # Ensure prompt inputs and prompt placeholders map
@@ -120,17 +124,20 @@ class ProceduresAgent(BaseAgent):
             ]
         )
 
+        # procedures selection uses the router LLM
+        llm = stray.get_llm("router")
+
         chain = (
             prompt
             | RunnableLambda(lambda x: utils.langchain_log_prompt(x, "TOOL PROMPT"))
-            | stray._llm
+            | llm
             | RunnableLambda(lambda x: utils.langchain_log_output(x, "TOOL PROMPT OUTPUT"))
             | ChooseProcedureOutputParser() # ensures output is a LLMAction
         )
 
         llm_action: LLMAction = chain.invoke(
             prompt_variables,
-            config=RunnableConfig(callbacks=[ModelInteractionHandler(stray, self.__class__.__name__)])
+            config=RunnableConfig(callbacks=[ModelInteractionHandler(stray, self.__class__.__name__, llm=llm)])
         )
 
         return llm_action
@@ -144,7 +151,15 @@ class ProceduresAgent(BaseAgent):
             try:
                 if Plugin._is_cat_tool(chosen_procedure):
                     # execute tool
-                    tool_output = await chosen_procedure._arun(llm_action.action_input, stray=stray)
+                    breaker = MadHatter().circuit_breakers.get(
+                        "tool", chosen_procedure.plugin_id, chosen_procedure.name
+                    )
+                    try:
+                        tool_output = await chosen_procedure._arun(llm_action.action_input, stray=stray)
+                    except Exception as e:
+                        breaker.record_failure(e, timeout=isinstance(e, TIMEOUT_ERRORS))
+                        raise
+                    breaker.record_success()
                     return AgentOutput(
                         output=tool_output,
                         return_direct=chosen_procedure.return_direct,
@@ -171,12 +186,10 @@ class ProceduresAgent(BaseAgent):
     def get_recalled_procedures_names(self, stray) -> set:
         recalled_procedures_names = set()
         for p in stray.working_memory.procedural_memories:
-            p_type = p[0].metadata["type"]
-            p_trigger_type = p[0].metadata["trigger_type"]
-            p_source = p[0].metadata["source"]
-            if p_type in ["tool", "form"] \
-                and p_trigger_type in ["description", "start_example"]:
-                recalled_procedures_names.add(p_source)
+            metadata = p[0].metadata
+            if metadata["type"] in ("tool", "form") \
+                and metadata["trigger_type"] in ("description", "start_example"):
+                recalled_procedures_names.add(metadata["source"])
         return recalled_procedures_names
     
     def prepare_allowed_procedures(
@@ -185,14 +198,55 @@ class ProceduresAgent(BaseAgent):
             recalled_procedures_names
         ) -> Dict[str, CatTool | CatForm]:
         
-        allowed_procedures: Dict[str, CatTool | CatForm] = {}
-
+        # look up only the recalled names in the procedures index,
+        #   sorted so the same recalled procedures always give the same prompt
         mad_hatter = MadHatter()
-        for p in mad_hatter.procedures:
-            if p.name in recalled_procedures_names:
-                allowed_procedures[p.name] = p
+        procedures_by_name = mad_hatter.procedures_by_name
+        allowed_procedures: Dict[str, CatTool | CatForm] = {}
+        for name in sorted(recalled_procedures_names):
+            if name in procedures_by_name:
+                procedure = procedures_by_name[name]
+                # tools failing repeatedly are not offered until their cooldown is over
+                if Plugin._is_cat_tool(procedure) and mad_hatter.circuit_breakers.get(
+                    "tool", procedure.plugin_id, name
+                ).is_open():
+                    continue
+                allowed_procedures[name] = procedure
 
         return allowed_procedures
+
+    def get_prompt_parts(self, allowed_procedures) -> Dict[str, str]:
+        """Tools list, tool names and examples of the procedures prompt,
+        computed once per set of allowed procedures and plugins registry."""
+
+        registry = MadHatter().registry
+        key = tuple(allowed_procedures.keys())
+
+        with self._prompt_parts_lock:
+            if ProceduresAgent._prompt_parts_registry is not registry:
+                # plugins changed, procedures with the same names may be different
+                ProceduresAgent._prompt_parts_registry = registry
+                self._prompt_parts_cache.clear()
+            prompt_parts = self._prompt_parts_cache.get(key)
+        if prompt_parts is not None:
+            return prompt_parts
+
+        prompt_parts = {
+            "tools": "\n".join(
+                f'- "{tool.name}": {tool.description}'
+                for tool in allowed_procedures.values()
+            ),
+            "tool_names": '"' + '", "'.join(allowed_procedures.keys()) + '"',
+            "examples": self.generate_examples(allowed_procedures),
+        }
+
+        with self._prompt_parts_lock:
+            if ProceduresAgent._prompt_parts_registry is registry:
+                if len(self._prompt_parts_cache) >= self.prompt_parts_cache_size:
+                    # drop the oldest entry
+                    self._prompt_parts_cache.pop(next(iter(self._prompt_parts_cache)))
+                self._prompt_parts_cache[key] = prompt_parts
+        return prompt_parts
     
     def generate_examples(self, allowed_procedures):
         list_examples = ""
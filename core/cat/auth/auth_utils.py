@@ -1,18 +1,17 @@
 
+import re
 import bcrypt
-import jwt
-from jwt.exceptions import InvalidTokenError
+
+# header.payload.signature, each part base64url encoded (header and payload are JSON objects)
+JWT_SHAPE = re.compile(r"^eyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*$")
+
 
 def is_jwt(token: str) -> bool:
     """
-    Returns whether a given string is a JWT.
+    Returns whether a given string has the shape of a JWT.
+    Only the shape is checked, the token is decoded and verified by the auth handler.
     """
-    try:
-        # Decode the JWT without verification to check its structure
-        jwt.decode(token, options={"verify_signature": False})
-        return True
-    except InvalidTokenError:
-        return False
+    return isinstance(token, str) and JWT_SHAPE.match(token) is not None
 
     
 def hash_password(password: str) -> str:
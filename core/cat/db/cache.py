@@ -0,0 +1,60 @@
+import threading
+from copy import deepcopy
+from typing import Any, Callable, Dict, Hashable
+
+from cat import metrics
+
+
+class SettingsCache:
+    """Read-through cache of settings queries.
+
+    Every write through `cat.db.crud` clears the cache and bumps `version`,
+    writes from other processes (or other connections) are detected through the
+    backend `changed_elsewhere` signal, checked at each read.
+    Values are copied in and out, so callers can modify what they get.
+
+    Parameters
+    ----------
+    backend : MetadataBackend
+        Store the cached values come from.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.version = 0
+        self._entries: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Get a cached value, loading it with `load` if missing.
+
+        Parameters
+        ----------
+        key : Hashable
+            Cache key (e.g. `("name", "llm_selected")`).
+        load : Callable
+            Function reading the value from the backend.
+        """
+        if self.backend.changed_elsewhere():
+            self.invalidate()
+
+        with self._lock:
+            if key in self._entries:
+                metrics.CACHE_REQUESTS.inc(cache="settings", result="hit")
+                return deepcopy(self._entries[key])
+            version = self.version
+
+        metrics.CACHE_REQUESTS.inc(cache="settings", result="miss")
+
+        value = load()
+
+        with self._lock:
+            # do not store values read before a concurrent write
+            if version == self.version:
+                self._entries[key] = deepcopy(value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = {}
+            self.version += 1
@@ -1,30 +1,29 @@
 from typing import Dict, List
 from uuid import uuid4
 
-from tinydb import Query
-
 from cat.auth.permissions import get_full_permissions, get_base_permissions
 from cat.auth.auth_utils import hash_password
 from cat.db import models
-from cat.db.database import get_db
+from cat.db.database import get_db, get_cache
+
+
+# reads go through the settings cache, each write must invalidate it
+def _search(field: str, value) -> List[Dict]:
+    return get_cache().get((field, value), lambda: get_db().search(field, value))
 
 
 def get_settings(search: str = "") -> List[Dict]:
-    query = Query()
-    settings = get_db().search(query.name.matches(search))
-    # Workaround: do not expose users in the settings list
-    settings = [s for s in settings if s["name"] != "users"]
-    return settings
+    return get_cache().get(("search", search), lambda: get_db().search_name(search))
 
 
 def get_settings_by_category(category: str) -> List[Dict]:
-    query = Query()
-    return get_db().search(query.category == category)
+    return _search("category", category)
 
 
 def create_setting(payload: models.Setting) -> Dict:
     # Missing fields (setting_id, updated_at) are filled automatically by pydantic
     get_db().insert(payload.model_dump())
+    get_cache().invalidate()
 
     # retrieve the record we just created
     new_record = get_setting_by_id(payload.setting_id)
@@ -33,8 +32,7 @@ def create_setting(payload: models.Setting) -> Dict:
 
 
 def get_setting_by_name(name: str) -> Dict:
-    query = Query()
-    result = get_db().search(query.name == name)
+    result = _search("name", name)
     if len(result) > 0:
         return result[0]
     else:
@@ -42,8 +40,7 @@ def get_setting_by_name(name: str) -> Dict:
 
 
 def get_setting_by_id(setting_id: str) -> Dict:
-    query = Query()
-    result = get_db().search(query.setting_id == setting_id)
+    result = _search("setting_id", setting_id)
     if len(result) > 0:
         return result[0]
     else:
@@ -51,64 +48,118 @@ def get_setting_by_id(setting_id: str) -> Dict:
 
 
 def delete_setting_by_id(setting_id: str) -> None:
-    query = Query()
-    get_db().remove(query.setting_id == setting_id)
+    get_db().remove("setting_id", setting_id)
+    get_cache().invalidate()
 
 
 def delete_settings_by_category(category: str) -> None:
-    query = Query()
-    get_db().remove(query.category == category)
+    get_db().remove("category", category)
+    get_cache().invalidate()
 
 
 def update_setting_by_id(payload: models.Setting) -> Dict:
-    query = Query()
-    get_db().update(payload, query.setting_id == payload.setting_id)
+    get_db().update("setting_id", payload.setting_id, payload.model_dump())
+    get_cache().invalidate()
 
     return get_setting_by_id(payload.setting_id)
 
 
 def upsert_setting_by_name(payload: models.Setting) -> models.Setting:
-    old_setting = get_setting_by_name(payload.name)
-
-    if not old_setting:
-        create_setting(payload)
-    else:
-        query = Query()
-        get_db().update(payload, query.name == payload.name)
+    get_db().upsert(payload.model_dump())
+    get_cache().invalidate()
 
     return get_setting_by_name(payload.name)
 
 
-# We store users in a setting and when there will be a graph db in the cat, we will store them there.
-# P.S.: I'm not proud of this.
-def get_users() -> Dict[str, Dict]:
-    users = get_setting_by_name("users")
-    if not users:
-        # create admin user and an ordinary user
-        admin_id = str(uuid4())
-        user_id = str(uuid4())
-
-        update_users({
-            admin_id: {
-                "id": admin_id,
-                "username": "admin",
-                "password": hash_password("admin"),
-                # admin has all permissions
-                "permissions": get_full_permissions()
-            },
-            user_id: {
-                "id": user_id,
-                "username": "user",
-                "password": hash_password("user"),
-                # user has minor permissions
-                "permissions": get_base_permissions()
-            }
-        })
-    return get_setting_by_name("users")["value"]
+def _users_exist() -> bool:
+    return get_cache().get(("users_exist",), lambda: get_db().count_users() > 0)
+
+
+def _create_default_users():
+    # create admin user and an ordinary user
+    default_users = [
+        {
+            "id": str(uuid4()),
+            "username": "admin",
+            "password": hash_password("admin"),
+            # admin has all permissions
+            "permissions": get_full_permissions()
+        },
+        {
+            "id": str(uuid4()),
+            "username": "user",
+            "password": hash_password("user"),
+            # user has minor permissions
+            "permissions": get_base_permissions()
+        },
+    ]
+    for user in default_users:
+        try:
+            get_db().insert_user(user)
+        except ValueError:
+            # created at the same time by another worker
+            pass
+    get_cache().invalidate()
+
+
+# Users are stored one record per user, indexed by id and username.
+# Default users are created the first time users are read.
+def _get_db_with_users():
+    if not _users_exist():
+        _create_default_users()
+    return get_db()
+
+
+def get_users(skip: int = 0, limit: int | None = None) -> Dict[str, Dict]:
+    users = get_cache().get(
+        ("users", skip, limit), lambda: _get_db_with_users().get_users(skip, limit)
+    )
+    return {u["id"]: u for u in users}
 
-def update_users(users: Dict[str, Dict]) -> Dict[str, Dict]:
-    updated_users = models.Setting(
-        name="users",
-        value=users
+
+def count_users() -> int:
+    return get_cache().get(("users_count",), lambda: _get_db_with_users().count_users())
+
+
+def get_user(user_id: str) -> Dict | None:
+    return get_cache().get(("user", user_id), lambda: _get_db_with_users().get_user(user_id))
+
+
+def get_user_by_username(username: str) -> Dict | None:
+    return get_cache().get(
+        ("username", username), lambda: _get_db_with_users().get_user_by_username(username)
     )
-    return upsert_setting_by_name(updated_users)
\ No newline at end of file
+
+
+def create_user(user: Dict) -> Dict:
+    """Create a user, raises ValueError if id or username are already taken."""
+    get_db().insert_user(user)
+    get_cache().invalidate()
+    return get_user(user["id"])
+
+
+def update_user(user: Dict) -> Dict:
+    """Replace a user record, raises ValueError if the new username is already taken."""
+    get_db().update_user(user)
+    get_cache().invalidate()
+    return get_user(user["id"])
+
+
+def delete_user(user_id: str) -> None:
+    get_db().remove_user(user_id)
+    get_cache().invalidate()
+
+
+def update_users(users: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Replace all users with the given ones."""
+    db = get_db()
+    for old_user in db.get_users():
+        if old_user["id"] not in users:
+            db.remove_user(old_user["id"])
+    for user in users.values():
+        if db.get_user(user["id"]):
+            db.update_user(user)
+        else:
+            db.insert_user(user)
+    get_cache().invalidate()
+    return get_users()
@@ -1,18 +1,501 @@
-from tinydb import TinyDB
+import os
+import re
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+from tinydb import TinyDB, Query
 
 from cat.utils import singleton
 from cat.env import get_env
+from cat.log import log
+from cat.db.cache import SettingsCache
+
+
+# fields settings can be searched by, each one is indexed
+INDEXED_FIELDS = ["name", "category", "setting_id"]
+
+
+class MetadataBackend(ABC):
+    """Storage of settings records (dicts with setting_id, name, category, value and updated_at).
+
+    Records are returned in insertion order.
+    """
+
+    @abstractmethod
+    def all(self) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    def search(self, field: str, value) -> List[Dict]:
+        """Records with `field` equal to `value`."""
+        pass
+
+    @abstractmethod
+    def search_name(self, pattern: str) -> List[Dict]:
+        """Records with name matching the regex `pattern` (from the beginning of the name)."""
+        pass
+
+    @abstractmethod
+    def insert(self, record: Dict) -> None:
+        """Insert a record, raises ValueError if a setting with the same name exists."""
+        pass
+
+    @abstractmethod
+    def upsert(self, record: Dict) -> None:
+        """Insert a record, or replace the fields of the setting with the same name."""
+        pass
+
+    @abstractmethod
+    def update(self, field: str, value, fields: Dict) -> None:
+        """Update `fields` of the records with `field` equal to `value`,
+        raises ValueError if the new name is taken by another setting."""
+        pass
+
+    @abstractmethod
+    def remove(self, field: str, value) -> None:
+        """Remove records with `field` equal to `value`."""
+        pass
+
+    # users are stored one record per user, indexed by id and username
+
+    @abstractmethod
+    def get_user(self, user_id: str) -> Dict | None:
+        pass
+
+    @abstractmethod
+    def get_user_by_username(self, username: str) -> Dict | None:
+        pass
+
+    @abstractmethod
+    def get_users(self, skip: int = 0, limit: int | None = None) -> List[Dict]:
+        """Users in creation order."""
+        pass
+
+    @abstractmethod
+    def count_users(self) -> int:
+        pass
+
+    @abstractmethod
+    def insert_user(self, user: Dict) -> None:
+        """Insert a user, raises ValueError if id or username are already taken."""
+        pass
+
+    @abstractmethod
+    def update_user(self, user: Dict) -> None:
+        """Replace the record of user `user["id"]`, raises ValueError if the new username is taken."""
+        pass
+
+    @abstractmethod
+    def remove_user(self, user_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def changed_elsewhere(self) -> bool:
+        """Whether the store may have been written by another process since the last call."""
+        pass
+
+
+class TinyDBBackend(MetadataBackend):
+    """Legacy backend, the whole store is a JSON file rewritten at each write."""
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.db = TinyDB(file_name)
+        self.users = self.db.table("users")
+        self._mtime = None
+
+    def all(self):
+        return self.db.all()
+
+    def search(self, field, value):
+        return self.db.search(Query()[field] == value)
+
+    def search_name(self, pattern):
+        return self.db.search(Query().name.matches(pattern))
+
+    def insert(self, record):
+        if self.search("name", record["name"]):
+            raise ValueError(f"Setting {record['name']} already exists")
+        self.db.insert(record)
+
+    def upsert(self, record):
+        self.db.upsert(record, Query().name == record["name"])
+
+    def update(self, field, value, fields):
+        if "name" in fields and any(
+            r.get(field) != value for r in self.search("name", fields["name"])
+        ):
+            raise ValueError(f"Setting {fields['name']} already exists")
+        self.db.update(fields, Query()[field] == value)
+
+    def remove(self, field, value):
+        self.db.remove(Query()[field] == value)
+
+    def get_user(self, user_id):
+        return self.users.get(Query().id == user_id)
+
+    def get_user_by_username(self, username):
+        return self.users.get(Query().username == username)
+
+    def get_users(self, skip=0, limit=None):
+        users = self.users.all()
+        return users[skip:] if limit is None else users[skip:skip + limit]
+
+    def count_users(self):
+        return len(self.users)
+
+    def insert_user(self, user):
+        if self.get_user(user["id"]) or self.get_user_by_username(user["username"]):
+            raise ValueError("Cannot duplicate user")
+        self.users.insert(user)
+
+    def update_user(self, user):
+        other = self.get_user_by_username(user["username"])
+        if other and other["id"] != user["id"]:
+            raise ValueError("Cannot duplicate user")
+        self.users.update(user, Query().id == user["id"])
+
+    def remove_user(self, user_id):
+        self.users.remove(Query().id == user_id)
+
+    def changed_elsewhere(self):
+        # the JSON file is rewritten at each write, any write changes its mtime
+        try:
+            mtime = os.stat(self.file_name).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        changed = mtime != self._mtime
+        self._mtime = mtime
+        return changed
+
+
+class SQLiteBackend(MetadataBackend):
+    """SQLite backend, with indexes on name (unique), category and setting_id (and on id and username for users).
+
+    The database runs in WAL mode, so several workers can share the file:
+    readers do not block the writer and concurrent writes are serialized by SQLite.
+    Each thread gets its own connection.
+    """
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS settings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    setting_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    category TEXT,
+                    value TEXT NOT NULL,
+                    updated_at INTEGER
+                )"""
+            )
+            for field in ["category", "setting_id"]:
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS settings_{field} ON settings ({field})"
+                )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL UNIQUE,
+                    username TEXT NOT NULL UNIQUE,
+                    record TEXT NOT NULL
+                )"""
+            )
+        self._create_unique_name_index()
+
+    def _create_unique_name_index(self):
+        """Setting names are unique, so upserts are atomic even with several workers.
+
+        Stores created before the unique index may have duplicate names:
+        only the last record of each name is kept.
+        """
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'settings_name_unique'"
+            ).fetchone()
+            if not exists:
+                removed = conn.execute(
+                    "DELETE FROM settings WHERE id NOT IN (SELECT MAX(id) FROM settings GROUP BY name)"
+                ).rowcount
+                if removed:
+                    log.warning(f"Removed {removed} duplicate settings from {self.file_name}")
+                conn.execute("DROP INDEX IF EXISTS settings_name")
+                conn.execute("CREATE UNIQUE INDEX settings_name_unique ON settings (name)")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.file_name, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function(
+                "REGEXP", 2, lambda pattern, value: re.match(pattern, value) is not None
+            )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict:
+        return {
+            "name": row["name"],
+            "value": json.loads(row["value"]),
+            "category": row["category"],
+            "setting_id": row["setting_id"],
+            "updated_at": row["updated_at"],
+        }
+
+    @staticmethod
+    def _to_row(record: Dict) -> Dict:
+        row = {k: v for k, v in record.items() if k in ["setting_id", "name", "category", "updated_at"]}
+        if "value" in record:
+            row["value"] = json.dumps(record["value"])
+        return row
+
+    def _check_field(self, field):
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Cannot search settings by {field}")
+
+    def _select(self, where: str = "", params=()) -> List[Dict]:
+        rows = self.connection().execute(
+            f"SELECT * FROM settings {where} ORDER BY id", params
+        )
+        return [self._to_record(row) for row in rows]
+
+    def all(self):
+        return self._select()
+
+    def search(self, field, value):
+        self._check_field(field)
+        if value is None:
+            return self._select(f"WHERE {field} IS NULL")
+        return self._select(f"WHERE {field} = ?", (value,))
+
+    def search_name(self, pattern):
+        return self._select("WHERE name REGEXP ?", (pattern,))
+
+    def insert(self, record):
+        try:
+            with self.connection() as conn:
+                self._insert(conn, [record])
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Setting {record['name']} already exists")
+
+    def upsert(self, record):
+        with self.connection() as conn:
+            self._insert(conn, [record], replace=True)
+
+    def _insert(self, conn: sqlite3.Connection, records: List[Dict], replace: bool = False):
+        columns = ["setting_id", "name", "category", "value", "updated_at"]
+        rows = []
+        for record in records:
+            row = self._to_row(record)
+            rows.append(tuple(row.get(c) for c in columns))
+        query = f"INSERT INTO settings ({', '.join(columns)}) VALUES (?, ?, ?, ?, ?)"
+        if replace:
+            # a single statement, no other worker can insert the same name in between
+            query += " ON CONFLICT(name) DO UPDATE SET " + ", ".join(
+                f"{c} = excluded.{c}" for c in columns if c != "name"
+            )
+        conn.executemany(query, rows)
+
+    def update(self, field, value, fields):
+        self._check_field(field)
+        row = self._to_row(fields)
+        if not row:
+            return
+        assignments = ", ".join(f"{column} = ?" for column in row)
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    f"UPDATE settings SET {assignments} WHERE {field} = ?",
+                    (*row.values(), value),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Setting {fields['name']} already exists")
+
+    def remove(self, field, value):
+        self._check_field(field)
+        with self.connection() as conn:
+            conn.execute(f"DELETE FROM settings WHERE {field} = ?", (value,))
+
+    def _select_users(self, where: str = "", params=(), limit: str = "") -> List[Dict]:
+        rows = self.connection().execute(
+            f"SELECT record FROM users {where} ORDER BY id {limit}", params
+        )
+        return [json.loads(row["record"]) for row in rows]
+
+    def get_user(self, user_id):
+        users = self._select_users("WHERE user_id = ?", (user_id,))
+        return users[0] if users else None
+
+    def get_user_by_username(self, username):
+        users = self._select_users("WHERE username = ?", (username,))
+        return users[0] if users else None
+
+    def get_users(self, skip=0, limit=None):
+        return self._select_users(
+            params=(-1 if limit is None else limit, skip), limit="LIMIT ? OFFSET ?"
+        )
+
+    def count_users(self):
+        return self.connection().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def insert_user(self, user):
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    "INSERT INTO users (user_id, username, record) VALUES (?, ?, ?)",
+                    (user["id"], user["username"], json.dumps(user)),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError("Cannot duplicate user")
+
+    def update_user(self, user):
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    "UPDATE users SET username = ?, record = ? WHERE user_id = ?",
+                    (user["username"], json.dumps(user), user["id"]),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError("Cannot duplicate user")
+
+    def remove_user(self, user_id):
+        with self.connection() as conn:
+            conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+
+    def changed_elsewhere(self):
+        # data_version changes when other connections (threads or processes) commit,
+        # it is tracked separately for each thread connection
+        data_version = self.connection().execute("PRAGMA data_version").fetchone()[0]
+        changed = data_version != getattr(self._local, "data_version", None)
+        self._local.data_version = data_version
+        return changed
+
+    def migrate(self, records_loader) -> int:
+        """Insert the records returned by `records_loader`, only the first time the store is opened.
+
+        Migration is marked in the SQLite `user_version` and runs in a single write transaction,
+        so it happens once even if several workers start together.
+        """
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migrated = 0
+            if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+                records = records_loader()
+                # with duplicate names in the legacy store, the last record wins
+                self._insert(conn, records, replace=True)
+                migrated = len(records)
+                conn.execute("PRAGMA user_version = 1")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        return migrated
+
+
+def migrate_from_tinydb(tinydb_file: str, backend: SQLiteBackend) -> int:
+    """Copy settings from a TinyDB file into a new SQLite store.
+
+    Runs only once per SQLite store, the TinyDB file is left untouched.
+
+    Parameters
+    ----------
+    tinydb_file : str
+        Path of the legacy metadata JSON file.
+    backend : SQLiteBackend
+        Destination store.
+
+    Returns
+    -------
+    migrated : int
+        Number of migrated settings (0 if there was nothing to migrate).
+    """
+
+    def load_records():
+        if not os.path.exists(tinydb_file):
+            return []
+        return [dict(r) for r in TinyDB(tinydb_file).all()]
+
+    migrated = backend.migrate(load_records)
+    if migrated:
+        log.info(f"Migrated {migrated} settings from {tinydb_file} to {backend.file_name}")
+    return migrated
+
+
+def migrate_users_setting(backend: MetadataBackend) -> int:
+    """Move users from the legacy `users` setting (a single dict of all users) to user records.
+
+    Parameters
+    ----------
+    backend : MetadataBackend
+        Store to migrate.
+
+    Returns
+    -------
+    migrated : int
+        Number of migrated users.
+    """
+    legacy = backend.search("name", "users")
+    if not legacy:
+        return 0
+
+    migrated = 0
+    for user in legacy[0]["value"].values():
+        try:
+            backend.insert_user(user)
+            migrated += 1
+        except ValueError:
+            # already migrated by another worker
+            pass
+    backend.remove("name", "users")
+    log.info(f"Migrated {migrated} users to user records")
+    return migrated
 
 
 @singleton
 class Database:
     def __init__(self):
-        self.db = TinyDB(self.get_file_name())
+        self.db = self.get_backend()
+        migrate_users_setting(self.db)
+        self.cache = SettingsCache(self.db)
 
     def get_file_name(self):
         tinydb_file = get_env("CCAT_METADATA_FILE")
         return tinydb_file
 
+    def get_backend(self) -> MetadataBackend:
+        """Metadata backend set by `CCAT_METADATA_BACKEND` (`sqlite` or `tinydb`).
+
+        The SQLite file sits next to `CCAT_METADATA_FILE`, with `.sqlite` extension,
+        and the first time it is created it is filled with the content of the TinyDB file.
+        """
+        file_name = self.get_file_name()
+        if get_env("CCAT_METADATA_BACKEND") == "tinydb":
+            return TinyDBBackend(file_name)
 
-def get_db():
+        backend = SQLiteBackend(os.path.splitext(file_name)[0] + ".sqlite")
+        migrate_from_tinydb(file_name, backend)
+        return backend
+
+
+def get_db() -> MetadataBackend:
     return Database().db
+
+
+def get_cache() -> SettingsCache:
+    return Database().cache
+
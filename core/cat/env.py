@@ -1,4 +1,6 @@
 import os
+from dataclasses import dataclass, fields
+from functools import lru_cache
 
 
 def get_supported_env_variables():
@@ -10,17 +12,39 @@ def get_supported_env_variables():
         "CCAT_API_KEY_WS": None,
         "CCAT_DEBUG": "true",
         "CCAT_LOG_LEVEL": "INFO",
+        "CCAT_LOG_FORMAT": "pretty",
+        "CCAT_LOG_PROMPT_SAMPLE_RATE": "1",
+        "CCAT_LOG_PROMPT_MAX_CHARS": "2000",
         "CCAT_CORS_ALLOWED_ORIGINS": None,
         "CCAT_QDRANT_HOST": None,
         "CCAT_QDRANT_PORT": "6333",
         "CCAT_QDRANT_API_KEY": None,
         "CCAT_SAVE_MEMORY_SNAPSHOTS": "false",
         "CCAT_METADATA_FILE": "cat/data/metadata.json",
+        "CCAT_METADATA_BACKEND": "sqlite",
+        "CCAT_PLUGIN_INDEX_FILE": "cat/data/plugin_index.json",
+        "CCAT_PIP_CACHE_DIR": "",
+        "CCAT_PIP_FIND_LINKS": "",
+        "CCAT_PIP_OFFLINE": "false",
+        "CCAT_PLUGINS_LAZY_IMPORT": "false",
+        "CCAT_TOOL_PROCESS_POOL_SIZE": "2",
+        "CCAT_HOOK_TIMEOUT": "",
+        "CCAT_TOOL_TIMEOUT": "",
+        "CCAT_CIRCUIT_BREAKER_FAILURES": "5",
+        "CCAT_CIRCUIT_BREAKER_COOLDOWN": "60",
         "CCAT_JWT_SECRET": "secret",
         "CCAT_JWT_ALGORITHM": "HS256",
         "CCAT_JWT_EXPIRE_MINUTES": str(60 * 24),  # JWT expires after 1 day
         "CCAT_HTTPS_PROXY_MODE": False,
         "CCAT_CORS_FORWARDED_ALLOW_IPS": "*",
+        "CCAT_TOKEN_COUNTING": "eager",
+        "CCAT_OUTBOUND_MAX_CONCURRENCY": "10",
+        "CCAT_OUTBOUND_RATE_LIMIT": "",
+        "CCAT_READINESS_INTERVAL": "10",
+        "CCAT_TRACING": "",
+        "CCAT_TRACING_FILE": "cat/data/traces.jsonl",
+        "CCAT_TRACING_OTLP_ENDPOINT": "http://localhost:4318/v1/traces",
+        "CCAT_TRACING_IN_WHY": "false",
     }
 
 
@@ -35,11 +59,9 @@ def fix_legacy_env_variables():
             os.environ[new_name] = legacy_value
 
 
-def get_env(name):
-    """Utility to get an environment variable value. To be used only for supported Cat envs.
-    - covers default supported variables and their default value
-    - automagically handles legacy env variables missing the prefix "CCAT_"
-    """
+@lru_cache(maxsize=None)
+def get_default_env_variables():
+    """Default values of supported env variables, also under their legacy name, built once."""
 
     cat_default_env_variables = get_supported_env_variables()
 
@@ -49,11 +71,95 @@ def get_env(name):
     for k, v in cat_default_env_variables.items():
         legacy_name = k.replace("CCAT_", "")
         legacy_variables[legacy_name] = v
-    cat_default_env_variables = cat_default_env_variables | legacy_variables
+    return cat_default_env_variables | legacy_variables
+
 
-    if name in cat_default_env_variables:
-        default = cat_default_env_variables[name]
-    else:
-        default = None
+def get_env(name):
+    """Utility to get an environment variable value. To be used only for supported Cat envs.
+    - covers default supported variables and their default value
+    - automagically handles legacy env variables missing the prefix "CCAT_"
+    """
 
+    default = get_default_env_variables().get(name)
     return os.getenv(name, default)
+
+
+def _to_bool(value) -> bool:
+    return str(value).lower() in ("true", "1")
+
+
+@dataclass(frozen=True)
+class CatConfig:
+    """Typed snapshot of the supported env variables.
+
+    Read once (see `get_config`), so hot paths do not go through `os.environ`.
+    Changes to the environment are seen only after `reload_config`.
+    """
+
+    core_host: str
+    core_port: str
+    core_use_secure_protocols: bool
+    api_key: str | None
+    api_key_ws: str | None
+    debug: bool
+    log_level: str
+    log_format: str
+    log_prompt_sample_rate: float
+    log_prompt_max_chars: int
+    cors_allowed_origins: str | None
+    qdrant_host: str | None
+    qdrant_port: int
+    qdrant_api_key: str | None
+    save_memory_snapshots: bool
+    metadata_file: str
+    metadata_backend: str
+    plugin_index_file: str
+    pip_cache_dir: str
+    pip_find_links: str
+    pip_offline: bool
+    plugins_lazy_import: bool
+    tool_process_pool_size: int
+    jwt_secret: str
+    jwt_algorithm: str
+    jwt_expire_minutes: float
+    https_proxy_mode: bool
+    cors_forwarded_allow_ips: str
+    token_counting: str
+    outbound_max_concurrency: int
+    outbound_rate_limit: float | None
+    readiness_interval: float
+    tracing: str
+    tracing_file: str
+    tracing_otlp_endpoint: str
+    tracing_in_why: bool
+    hook_timeout: float | None
+    tool_timeout: float | None
+    circuit_breaker_failures: int
+    circuit_breaker_cooldown: float
+
+    @classmethod
+    def from_env(cls) -> "CatConfig":
+        converters = {
+            bool: _to_bool,
+            int: int,
+            float: float,
+            float | None: lambda v: float(v) if v else None,
+        }
+        values = {}
+        for field in fields(cls):
+            value = get_env(f"CCAT_{field.name.upper()}")
+            convert = converters.get(field.type)
+            values[field.name] = convert(value) if convert else value
+        return cls(**values)
+
+
+@lru_cache(maxsize=1)
+def get_config() -> CatConfig:
+    """Cat configuration, read from the environment the first time it is requested."""
+    return CatConfig.from_env()
+
+
+def reload_config() -> CatConfig:
+    """Read again the configuration from the environment."""
+    get_config.cache_clear()
+    return get_config()
@@ -1,4 +1,4 @@
-from .cat_form import CatForm, CatFormState
+from .cat_form import CatForm, CatFormState, CatFormStep
 from .form_decorator import form
 
-__all__ = ["CatForm", "CatFormState", "form"]
+__all__ = ["CatForm", "CatFormState", "CatFormStep", "form"]
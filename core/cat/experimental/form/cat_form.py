@@ -1,4 +1,5 @@
 import json
+import inspect
 from enum import Enum
 from typing import List, Dict
 from pydantic import BaseModel, ValidationError
@@ -15,6 +16,13 @@ class CatFormState(Enum):
     CLOSED = "closed"
 
 
+# Output of the single LLM call doing a whole form step
+class CatFormStep(BaseModel):
+    exit: bool = False
+    confirm: bool = False
+    fields: Dict = {}
+
+
 class CatForm:  # base model of forms
     model_class: BaseModel
     procedure_type: str = "form"
@@ -23,6 +31,10 @@ class CatForm:  # base model of forms
     start_examples: List[str]
     stop_examples: List[str] = []
     ask_confirm: bool = False
+    # check exit intent, confirmation and extract fields with a single LLM call
+    single_call: bool = True
+    # role of the LLM used by the form (see `cat.factory.llm.LLM_ROLES`)
+    llm_role: str = "utility"
     triggers_map = None
     _autopilot = False
 
@@ -63,7 +75,7 @@ JSON:
     "confirm": """
 
         # Queries the LLM and check if user is agree or not
-        response = self.cat.llm(confirm_prompt)
+        response = self.cat.llm(confirm_prompt, role=self.llm_role)
         return "true" in response.lower()
 
     # Check if the user wants to exit the form
@@ -99,7 +111,7 @@ JSON:
     "exit": """
 
         # Queries the LLM and check if user is agree or not
-        response = self.cat.llm(check_exit_prompt)
+        response = self.cat.llm(check_exit_prompt, role=self.llm_role)
         return "true" in response.lower()
 
     # Execute the dialogue step
@@ -107,6 +119,12 @@ JSON:
         # could we enrich prompt completion with episodic/declarative memories?
         # self.cat.working_memory.episodic_memories = []
 
+        # one LLM call for the whole step, multiple calls as a fallback
+        if self.single_call:
+            step = self.step()
+            if step is not None:
+                return self._next_from_step(step)
+
         # If state is WAIT_CONFIRM, check user confirm response..
         if self._state == CatFormState.WAIT_CONFIRM:
             if self.confirm():
@@ -126,6 +144,35 @@ JSON:
         if self._state == CatFormState.INCOMPLETE:
             self._model = self.update()
 
+        return self._next_after_update()
+
+    # Async version of the dialogue step, awaited by the FormAgent.
+    # Forms can override it, or define `next` and `submit` as coroutines.
+    async def anext(self):
+        output = self.next()
+        if inspect.isawaitable(output):
+            output = await output
+        return output
+
+    def _next_from_step(self, step: CatFormStep):
+        if self._state == CatFormState.WAIT_CONFIRM:
+            if step.confirm:
+                self._state = CatFormState.CLOSED
+                return self.submit(self._model)
+            elif step.exit:
+                self._state = CatFormState.CLOSED
+            else:
+                self._state = CatFormState.INCOMPLETE
+
+        if step.exit:
+            self._state = CatFormState.CLOSED
+
+        if self._state == CatFormState.INCOMPLETE:
+            self._model = self.update(step.fields)
+
+        return self._next_after_update()
+
+    def _next_after_update(self):
         # If state is COMPLETE, ask confirm (or execute action directly)
         if self._state == CatFormState.COMPLETE:
             if self.ask_confirm:
@@ -137,11 +184,72 @@ JSON:
         # if state is still INCOMPLETE, recap and ask for new info
         return self.message()
 
+    # Check exit intent, confirmation and extract fields with one LLM call.
+    # Returns None if the LLM output cannot be parsed.
+    def step(self) -> CatFormStep | None:
+        prompt = self.step_prompt()
+        log.debug(prompt)
+
+        json_str = self.cat.llm(prompt, role=self.llm_role)
+
+        try:
+            step = parse_json(json_str, pydantic_model=CatFormStep)
+        except Exception as e:
+            log.warning(f"Form step output not parsable, falling back to multiple calls: {e}")
+            return None
+
+        # confirmation only makes sense when waiting for it
+        if self._state != CatFormState.WAIT_CONFIRM:
+            step.confirm = False
+
+        return step
+
+    def step_prompt(self):
+        history = self.cat.stringify_chat_history()
+
+        # Stop examples
+        stop_examples = """
+Examples where "exit" is true:
+- exit form
+- stop it"""
+
+        for se in self.stop_examples:
+            stop_examples += f"\n- {se}"
+
+        if self._state == CatFormState.WAIT_CONFIRM:
+            confirm_description = "type boolean, `true` if the user is confirming the current JSON"
+        else:
+            confirm_description = "type boolean, always `false`"
+
+        prompt = f"""Your task is to produce a JSON out of a conversation, to fill up a form.
+The JSON must have this format:
+```json
+{{
+    "exit": // type boolean, `true` if the user wants to exit the form
+    "confirm": // {confirm_description}
+    "fields": {self._fields_structure()}
+}}
+```
+{stop_examples}
+
+This is the current form JSON:
+```json
+{json.dumps(self._model, indent=4)}
+```
+
+This is the conversation:
+{history}
+
+JSON:
+"""
+        return prompt
+
     # Updates the form with the information extracted from the user's response
     # (Return True if the model is updated)
-    def update(self):
+    def update(self, json_details: Dict | None = None):
         # Conversation to JSON
-        json_details = self.extract()
+        if json_details is None:
+            json_details = self.extract()
         json_details = self.sanitize(json_details)
 
         # model merge old and new
@@ -200,9 +308,9 @@ JSON:
         prompt = self.extraction_prompt()
         log.debug(prompt)
 
-        json_str = self.cat.llm(prompt)
+        json_str = self.cat.llm(prompt, role=self.llm_role)
 
-        log.debug(f"Form JSON after parser:\n{json_str}")
+        log.debug("Form JSON after parser:\n{}", json_str)
 
         # json parser
         try:
@@ -217,15 +325,7 @@ JSON:
         history = self.cat.stringify_chat_history()
 
         # JSON structure
-        # BaseModel.__fields__['my_field'].type_
-        JSON_structure = "{"
-        for field_name, field in self.model_class.model_fields.items():
-            if field.description:
-                description = field.description
-            else:
-                description = ""
-            JSON_structure += f'\n\t"{field_name}": // {description} Must be of type `{field.annotation.__name__}` or `null`'  # field.required?
-        JSON_structure += "\n}"
+        JSON_structure = self._fields_structure()
 
         # TODO: reintroduce examples
         prompt = f"""Your task is to fill up a JSON out of a conversation.
@@ -250,6 +350,18 @@ Updated JSON:
         prompt_escaped = prompt.replace("{", "{{").replace("}", "}}")
         return prompt_escaped
 
+    def _fields_structure(self):
+        # BaseModel.__fields__['my_field'].type_
+        JSON_structure = "{"
+        for field_name, field in self.model_class.model_fields.items():
+            if field.description:
+                description = field.description
+            else:
+                description = ""
+            JSON_structure += f'\n\t"{field_name}": // {description} Must be of type `{field.annotation.__name__}` or `null`'  # field.required?
+        JSON_structure += "\n}"
+        return JSON_structure
+
     # Sanitize model (take away unwanted keys and null values)
     # NOTE: unwanted keys are automatically taken away by pydantic
     def sanitize(self, model):
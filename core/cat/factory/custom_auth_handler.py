@@ -1,15 +1,22 @@
+import time
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from typing import Dict
 from pytz import utc
 import jwt
 
-from cat.db.crud import get_users
+from fastapi.concurrency import run_in_threadpool
+
+from cat.db.crud import get_user, get_user_by_username
 from cat.auth.permissions import (
     AuthPermission, AuthResource, AuthUserInfo, get_base_permissions, get_full_permissions
 )
 from cat.auth.auth_utils import is_jwt, check_password
-from cat.env import get_env
+from cat.env import get_config
 from cat.log import log
+from cat import metrics
 
 
 class BaseAuthHandler(ABC):  # TODOAUTH: pydantic model?
@@ -58,24 +65,64 @@ class BaseAuthHandler(ABC):  # TODOAUTH: pydantic model?
         pass
 
 
+# max number of verified tokens kept in memory by the core auth handler
+JWT_CACHE_SIZE = 1024
+
+
 # Core auth handler, verify token on local idp
 class CoreAuthHandler(BaseAuthHandler):
 
+    def __init__(self):
+        # verified token claims, kept until the token expires (LRU)
+        self._verified_tokens: OrderedDict[tuple, Dict] = OrderedDict()
+        # tokens are decoded from the threadpool, the LRU cannot be reordered concurrently
+        self._verified_tokens_lock = threading.Lock()
+
+    def decode_jwt(self, token: str) -> Dict:
+        """Verify a JWT and return its claims.
+
+        Claims of verified tokens are cached until the token expires,
+        so a token is verified only once. Raises if the token is not valid.
+        """
+        config = get_config()
+        secret = config.jwt_secret
+        algorithm = config.jwt_algorithm
+        key = (token, secret, algorithm)
+
+        with self._verified_tokens_lock:
+            payload = self._verified_tokens.get(key)
+            if payload is not None:
+                if payload["exp"] > time.time():
+                    self._verified_tokens.move_to_end(key)
+                else:
+                    del self._verified_tokens[key]
+                    payload = None
+        if payload is not None:
+            metrics.CACHE_REQUESTS.inc(cache="jwt", result="hit")
+            return payload
+
+        metrics.CACHE_REQUESTS.inc(cache="jwt", result="miss")
+
+        payload = jwt.decode(token, secret, algorithms=[algorithm])
+
+        # tokens without expiration are verified every time
+        if "exp" in payload:
+            with self._verified_tokens_lock:
+                self._verified_tokens[key] = payload
+                if len(self._verified_tokens) > JWT_CACHE_SIZE:
+                    self._verified_tokens.popitem(last=False)
+        return payload
+
     async def authorize_user_from_jwt(
         self, token: str, auth_resource: AuthResource, auth_permission: AuthPermission
     ) -> AuthUserInfo | None:
         try:
             # decode token
-            payload = jwt.decode(
-                token,
-                get_env("CCAT_JWT_SECRET"),
-                algorithms=[get_env("CCAT_JWT_ALGORITHM")],
-            )
+            payload = self.decode_jwt(token)
 
             # get user from DB
-            users = get_users()
-            if payload["sub"] in users:
-                user = users[payload["sub"]]
+            user = get_user(payload["sub"])
+            if user:
                 # TODOAUTH: permissions check should be done in a method
                 if auth_resource in user["permissions"].keys() and \
                         auth_permission in user["permissions"][auth_resource]:
@@ -99,8 +146,8 @@ class CoreAuthHandler(BaseAuthHandler):
         auth_resource: AuthResource,
         auth_permission: AuthPermission,
     ) -> AuthUserInfo | None:
-        http_api_key = get_env("CCAT_API_KEY")
-        ws_api_key = get_env("CCAT_API_KEY_WS")
+        http_api_key = get_config().api_key
+        ws_api_key = get_config().api_key_ws
 
         # TODOAUTH: should we consider the user_id or just give
         #    admin permissions to all users with the right api keys?
@@ -127,29 +174,27 @@ class CoreAuthHandler(BaseAuthHandler):
     async def issue_jwt(self, username: str, password: str) -> str | None:
         # authenticate local user credentials and return a JWT token
 
-        # brutal search over users, which are stored in a simple dictionary.
-        # waiting to have graph in core to store them properly
-        # TODOAUTH: get rid of this shameful loop
-        users = get_users()
-        for user_id, user in users.items():
-            if user["username"] == username and check_password(password, user["password"]):
-                # TODOAUTH: expiration with timezone needs to be tested
-                # using seconds for easier testing
-                expire_delta_in_seconds = float(get_env("CCAT_JWT_EXPIRE_MINUTES")) * 60
-                expires = datetime.now(utc) + timedelta(seconds=expire_delta_in_seconds)
-                # TODOAUTH: add issuer and redirect_uri (and verify them when a token is validated)
-
-                jwt_content = {
-                    "sub": user_id,                      # Subject (the user ID)
-                    "username": username,                # Username
-                    "permissions": user["permissions"],  # User permissions
-                    "exp": expires                       # Expiry date as a Unix timestamp
-                }
-                return jwt.encode(
-                    jwt_content,
-                    get_env("CCAT_JWT_SECRET"),
-                    algorithm=get_env("CCAT_JWT_ALGORITHM"),
-                )
+        user = get_user_by_username(username)
+        # bcrypt is slow on purpose, keep it out of the event loop
+        if user and await run_in_threadpool(check_password, password, user["password"]):
+            # TODOAUTH: expiration with timezone needs to be tested
+            # using seconds for easier testing
+            config = get_config()
+            expire_delta_in_seconds = config.jwt_expire_minutes * 60
+            expires = datetime.now(utc) + timedelta(seconds=expire_delta_in_seconds)
+            # TODOAUTH: add issuer and redirect_uri (and verify them when a token is validated)
+
+            jwt_content = {
+                "sub": user["id"],                   # Subject (the user ID)
+                "username": username,                # Username
+                "permissions": user["permissions"],  # User permissions
+                "exp": expires                       # Expiry date as a Unix timestamp
+            }
+            return jwt.encode(
+                jwt_content,
+                config.jwt_secret,
+                algorithm=config.jwt_algorithm,
+            )
         return None
 
 
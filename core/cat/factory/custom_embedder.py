@@ -6,7 +6,8 @@ from typing import List
 from itertools import combinations
 from sklearn.feature_extraction.text import CountVectorizer
 from langchain_core.embeddings import Embeddings
-import httpx
+
+from cat.factory.outbound_gateway import OutboundGateway
 
 
 class DumbEmbedder(Embeddings):
@@ -55,12 +56,12 @@ class CustomOpenAIEmbeddings(Embeddings):
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         payload = json.dumps({"input": texts})
-        ret = httpx.post(self.url, data=payload, timeout=None)
+        ret = OutboundGateway().post(self.url, data=payload)
         ret.raise_for_status()
         return [e["embedding"] for e in ret.json()["data"]]
 
     def embed_query(self, text: str) -> List[float]:
         payload = json.dumps({"input": text})
-        ret = httpx.post(self.url, data=payload, timeout=None)
+        ret = OutboundGateway().post(self.url, data=payload)
         ret.raise_for_status()
         return ret.json()["data"][0]["embedding"]
@@ -1,10 +1,11 @@
 from typing import Optional, List, Any, Mapping, Dict
-import requests
 
 from langchain_core.language_models.llms import LLM
 from langchain_openai.chat_models import ChatOpenAI
 from langchain_community.chat_models.ollama import ChatOllama
 
+from cat.factory.outbound_gateway import OutboundGateway
+
 
 
 class LLMDefault(LLM):
@@ -49,7 +50,7 @@ class LLMCustom(LLM):
         }
 
         try:
-            response_json = requests.post(self.url, json=request_body).json()
+            response_json = OutboundGateway().post(self.url, json_body=request_body).json()
         except Exception as exc:
             raise ValueError(
                 "Custom LLM endpoint error " "during http POST request"
@@ -8,9 +8,10 @@ from langchain_openai import ChatOpenAI, OpenAI
 from langchain_cohere import ChatCohere
 from langchain_google_genai import ChatGoogleGenerativeAI
 
-from typing import Type
+from typing import Type, Dict
 import json
 from pydantic import BaseModel, ConfigDict
+from langchain.base_language import BaseLanguageModel
 
 from cat.factory.custom_llm import LLMDefault, LLMCustom, CustomOpenAI, CustomOllama
 from cat.mad_hatter.mad_hatter import MadHatter
@@ -282,6 +283,42 @@ class LLMGeminiChatConfig(LLMSettings):
     )
 
 
+# Roles a language model can have:
+# - chat: the main model, answering the user (it is the one selected with `llm_selected`)
+# - router: procedures selection and classification
+# - utility: small tasks, like forms extraction and confirmation
+LLM_ROLES = ["chat", "router", "utility"]
+
+# roles falling back to another role when they have no dedicated model
+LLM_ROLES_FALLBACK = {
+    "router": "utility",
+    "utility": "chat",
+}
+
+
+class LLMRegistry:
+    """Language models by role.
+
+    A role without a dedicated model uses the model of its fallback role, down to the `chat` model.
+    """
+
+    def __init__(self, llms: Dict[str, BaseLanguageModel]):
+        if "chat" not in llms:
+            raise Exception("LLMRegistry needs at least the chat model")
+        self._llms = llms
+
+    def get(self, role: str = "chat") -> BaseLanguageModel:
+        if role not in LLM_ROLES:
+            raise ValueError(f"LLM role `{role}` not supported. Must be one of {LLM_ROLES}")
+        while role not in self._llms:
+            role = LLM_ROLES_FALLBACK[role]
+        return self._llms[role]
+
+    @property
+    def roles(self) -> Dict[str, BaseLanguageModel]:
+        return {role: self.get(role) for role in LLM_ROLES}
+
+
 def get_allowed_language_models():
     list_llms_default = [
         LLMOpenAIChatConfig,
@@ -0,0 +1,234 @@
+import time
+import json
+import random
+import threading
+from concurrent.futures import Future
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from cat.utils import singleton_meta
+from cat.env import get_config
+from cat.log import log
+
+
+# status codes meaning the provider is throttling us (or temporarily down)
+RETRY_STATUS_CODES = [429, 503]
+
+
+class TokenBucket:
+    """Token bucket rate limiter, allows `rate` requests per second with bursts up to `burst` requests."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class OutboundProvider:
+    """Connection pool, limits and retry policy for a single provider (host)."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        rate_limit: float | None = None,
+        burst: int | None = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 300.0,
+        transport: httpx.BaseTransport | None = None,
+    ):
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.bucket = None
+        if rate_limit:
+            self.bucket = TokenBucket(rate_limit, burst or max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # persistent connections, reused by all requests to this provider
+        self.client = httpx.Client(
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=max_concurrency, max_keepalive_connections=max_concurrency
+            ),
+            transport=transport,
+        )
+        # requests being sent, when the provider is replaced its client is closed after the last one
+        self.active_requests = 0
+        self.retired = False
+
+    def backoff(self, attempt: int, response: httpx.Response) -> float:
+        # respect the provider if it tells us how long to wait
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+class OutboundGateway(metaclass=singleton_meta):
+    """Shared gateway for outbound HTTP calls to LLM and embedder providers.
+
+    For each provider (host) it keeps a persistent connection pool, limits concurrent requests
+    and request rate, and retries throttled requests with jittered backoff.
+    Identical requests in flight at the same time are sent only once and share the response.
+
+    Defaults come from `CCAT_OUTBOUND_MAX_CONCURRENCY` and `CCAT_OUTBOUND_RATE_LIMIT` (requests per second),
+    single providers can be tuned with `configure_provider`.
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, OutboundProvider] = {}
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def configure_provider(self, host: str, **kwargs) -> OutboundProvider:
+        """Set limits for a provider, replacing the current ones.
+
+        Parameters
+        ----------
+        host : str
+            Host of the provider (e.g. `localhost:8080`).
+        kwargs :
+            Arguments of `OutboundProvider` (max_concurrency, rate_limit, burst, max_retries, ...).
+        """
+        provider = self._new_provider(**kwargs)
+        with self._lock:
+            previous = self._providers.get(host)
+            self._providers[host] = provider
+            if previous is None:
+                return provider
+            previous.retired = True
+            # requests in flight keep using the old provider until they are done
+            idle = previous.active_requests == 0
+        if idle:
+            previous.client.close()
+        return provider
+
+    def get_provider(self, url: str) -> OutboundProvider:
+        with self._lock:
+            return self._get_provider(url)
+
+    def _get_provider(self, url: str) -> OutboundProvider:
+        host = urlparse(url).netloc
+        if host not in self._providers:
+            self._providers[host] = self._new_provider()
+        return self._providers[host]
+
+    def _acquire(self, url: str) -> OutboundProvider:
+        with self._lock:
+            provider = self._get_provider(url)
+            provider.active_requests += 1
+            return provider
+
+    def _release(self, provider: OutboundProvider):
+        with self._lock:
+            provider.active_requests -= 1
+            if not provider.retired or provider.active_requests > 0:
+                return
+        provider.client.close()
+
+    def _new_provider(self, **kwargs) -> OutboundProvider:
+        kwargs.setdefault("max_concurrency", get_config().outbound_max_concurrency)
+        kwargs.setdefault("rate_limit", get_config().outbound_rate_limit)
+        return OutboundProvider(**kwargs)
+
+    def post(
+        self,
+        url: str,
+        json_body=None,
+        data: str | bytes | None = None,
+        headers: Dict[str, str] | None = None,
+        coalesce: bool = True,
+    ) -> httpx.Response:
+        """POST to a provider, going through its limits.
+
+        Parameters
+        ----------
+        url : str
+            Provider endpoint.
+        json_body :
+            JSON serializable body.
+        data : str or bytes
+            Raw body, used if `json_body` is None.
+        headers : Dict[str, str]
+            Request headers.
+        coalesce : bool
+            Share the response with identical requests already in flight.
+
+        Returns
+        -------
+        response : httpx.Response
+            Provider response, status is not checked.
+        """
+        if json_body is not None:
+            data = json.dumps(json_body, sort_keys=True)
+            headers = {"Content-Type": "application/json", **(headers or {})}
+
+        if not coalesce:
+            return self._send(url, data, headers)
+
+        key = (url, data, tuple(sorted((headers or {}).items())))
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not is_leader:
+            log.debug(f"Coalescing request to {url}")
+            return future.result()
+
+        try:
+            response = self._send(url, data, headers)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            raise e
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _send(self, url, data, headers) -> httpx.Response:
+        provider = self._acquire(url)
+        try:
+            attempt = 0
+            while True:
+                if provider.bucket:
+                    provider.bucket.acquire()
+                with provider.semaphore:
+                    response = provider.client.post(url, content=data, headers=headers)
+
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= provider.max_retries:
+                    return response
+
+                wait = provider.backoff(attempt, response)
+                log.warning(
+                    f"{url} answered {response.status_code}, retrying in {wait:.2f}s ({attempt + 1}/{provider.max_retries})"
+                )
+                time.sleep(wait)
+                attempt += 1
+        finally:
+            self._release(provider)
@@ -2,8 +2,8 @@
 
 import logging
 import sys
-import inspect
 import json
+import random
 from pprint import pformat
 from loguru import logger
 
@@ -15,6 +15,11 @@ def get_log_level():
     return get_env("CCAT_LOG_LEVEL")
 
 
+def get_log_format():
+    """Return the log output format, `pretty` or `json`."""
+    return get_env("CCAT_LOG_FORMAT")
+
+
 class CatLogEngine:
     """The log engine.
 
@@ -24,6 +29,9 @@ class CatLogEngine:
     ----------
     LOG_LEVEL : str
         Level of logging set in the `.env` file.
+    LOG_FORMAT : str
+        Output format set in the `.env` file, `pretty` (colored text, for development)
+        or `json` (one JSON object per line, written by a background thread).
 
     Notes
     -----
@@ -42,6 +50,13 @@ class CatLogEngine:
 
     def __init__(self):
         self.LOG_LEVEL = get_log_level()
+        self.LOG_FORMAT = get_log_format()
+        # fraction of LLM prompts/outputs logged in json mode, and their max length
+        self.prompt_sample_rate = float(get_env("CCAT_LOG_PROMPT_SAMPLE_RATE"))
+        self.prompt_max_chars = int(get_env("CCAT_LOG_PROMPT_MAX_CHARS"))
+        # numeric severity of each level, to filter messages before doing any work
+        self._levels_no = {}
+        self._min_level_no = self.get_level_no(self.LOG_LEVEL)
         self.default_log()
 
         # workaround for pdfminer logging
@@ -60,7 +75,37 @@ class CatLogEngine:
         bool
 
         """
-        return record["level"].no >= logger.level(self.LOG_LEVEL).no
+        return record["level"].no >= self._min_level_no
+
+    def get_level_no(self, level):
+        """Numeric severity of a level name, cached.
+
+        Parameters
+        ----------
+        level : str
+
+        Returns
+        -------
+        int
+
+        """
+        if level not in self._levels_no:
+            self._levels_no[level] = logger.level(level).no
+        return self._levels_no[level]
+
+    def is_enabled(self, level):
+        """Whether messages of the given level are logged.
+
+        Parameters
+        ----------
+        level : str
+
+        Returns
+        -------
+        bool
+
+        """
+        return self.get_level_no(level) >= self._min_level_no
 
     def default_log(self):
         """Set the same debug level to all the project dependencies.
@@ -76,7 +121,17 @@ class CatLogEngine:
         log_format = f"{time} {level} {origin} \n{message}"
 
         logger.remove()
-        if self.LOG_LEVEL == "DEBUG":
+        if self.structured:
+            # formatting happens on the caller thread, writing on a background one
+            return logger.add(
+                sys.stdout,
+                colorize=False,
+                format=self.json_format,
+                filter=self.show_log_level,
+                level=self.LOG_LEVEL,
+                enqueue=True,
+            )
+        elif self.LOG_LEVEL == "DEBUG":
             return logger.add(
                 sys.stdout,
                 colorize=True,
@@ -94,6 +149,101 @@ class CatLogEngine:
                 level=self.LOG_LEVEL,
             )
 
+    @property
+    def structured(self):
+        """Whether logs are written as JSON lines."""
+        return self.LOG_FORMAT == "json"
+
+    def json_format(self, record):
+        """Loguru format function serializing a record as a single JSON line.
+
+        Parameters
+        ----------
+        record : dict
+            Loguru record.
+
+        Returns
+        -------
+        str
+            Loguru format string.
+
+        """
+        extra = record["extra"]
+        line = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "name": extra.get("original_name", record["name"]),
+            "class": extra.get("original_class"),
+            "function": extra.get("original_caller", record["function"]),
+            "line": extra.get("original_line", record["line"]),
+            "message": record["message"],
+        }
+        # event fields
+        line.update({k: v for k, v in extra.items() if not k.startswith("original_") and k != "json"})
+        if record["exception"]:
+            line["exception"] = repr(record["exception"].value)
+
+        extra["json"] = json.dumps(line, default=str)
+        return "{extra[json]}\n"
+
+    def truncate(self, text):
+        """Cap a text to `CCAT_LOG_PROMPT_MAX_CHARS` characters.
+
+        Parameters
+        ----------
+        text : str
+
+        Returns
+        -------
+        str
+
+        """
+        text = str(text)
+        if len(text) <= self.prompt_max_chars:
+            return text
+        cut = len(text) - self.prompt_max_chars
+        return f"{text[:self.prompt_max_chars]}... [{cut} chars truncated]"
+
+    def sample_prompt(self):
+        """Whether an LLM prompt/output should be logged, according to `CCAT_LOG_PROMPT_SAMPLE_RATE`.
+
+        Returns
+        -------
+        bool
+
+        """
+        return self.prompt_sample_rate > 0 and random.random() < self.prompt_sample_rate
+
+    def event(self, event, msg, level="INFO", **fields):
+        """Log a structured event.
+
+        In json mode `fields` are written as keys of the JSON line, in pretty mode only `msg` is shown.
+
+        Parameters
+        ----------
+        event : str
+            Event name, e.g. `llm_prompt`.
+        msg : str
+            Human readable message.
+        level : str
+            Logging level.
+        fields :
+            JSON serializable event data.
+
+        """
+        if not self.is_enabled(level):
+            return
+
+        (package, module, klass, caller, line) = self.get_caller_info(skip=2)
+        logger.bind(
+            original_name=f"{package}.{module}",
+            original_line=line,
+            original_class=klass,
+            original_caller=caller,
+            event=event,
+            **fields,
+        ).log(level, msg)
+
     def get_caller_info(self, skip=3):
         """Get the name of a caller in the format module.class.method.
 
@@ -125,16 +275,16 @@ class CatLogEngine:
 
         An empty string is returned if skipped levels exceed stack height.
         """
-        stack = inspect.stack()
-        start = 0 + skip
-        if len(stack) < start + 1:
+        try:
+            parentframe = sys._getframe(skip)
+        except ValueError:
             return ""
-        parentframe = stack[start][0]
 
         # module and packagename.
-        module_info = inspect.getmodule(parentframe)
-        if module_info:
-            mod = module_info.__name__.split(".")
+        package, module = "", ""
+        module_name = parentframe.f_globals.get("__name__")
+        if module_name:
+            mod = module_name.split(".")
             package = mod[0]
             module = ".".join(mod[1:])
 
@@ -157,39 +307,47 @@ class CatLogEngine:
 
         return package, module, klass, caller, line
 
-    def __call__(self, msg, level="DEBUG"):
+    def __call__(self, msg, level="DEBUG", *args):
         """Alias of self.log()"""
-        self.log(msg, level)
+        self.log(msg, level, *args)
 
-    def debug(self, msg):
+    def debug(self, msg, *args):
         """Logs a DEBUG message"""
-        self.log(msg, level="DEBUG")
+        self.log(msg, "DEBUG", *args)
 
-    def info(self, msg):
+    def info(self, msg, *args):
         """Logs an INFO message"""
-        self.log(msg, level="INFO")
+        self.log(msg, "INFO", *args)
 
-    def warning(self, msg):
+    def warning(self, msg, *args):
         """Logs a WARNING message"""
-        self.log(msg, level="WARNING")
+        self.log(msg, "WARNING", *args)
 
-    def error(self, msg):
+    def error(self, msg, *args):
         """Logs an ERROR message"""
-        self.log(msg, level="ERROR")
+        self.log(msg, "ERROR", *args)
 
-    def critical(self, msg):
+    def critical(self, msg, *args):
         """Logs a CRITICAL message"""
-        self.log(msg, level="CRITICAL")
+        self.log(msg, "CRITICAL", *args)
 
-    def log(self, msg, level="DEBUG"):
+    def log(self, msg, level="DEBUG", *args):
         """Log a message
 
+        Nothing is done (no caller lookup, no formatting) if the level is below the global log level.
+
         Parameters
         ----------
         msg :
-            Message to be logged.
+            Message to be logged. If `args` are given, it is a format string
+            and is formatted only if the message is actually logged.
         level : str
-            Logging level."""
+            Logging level.
+        args :
+            Arguments for the format string, e.g. `log.debug("Executing {}", hook.name)`."""
+
+        if not self.is_enabled(level):
+            return
 
         (package, module, klass, caller, line) = self.get_caller_info()
 
@@ -200,8 +358,14 @@ class CatLogEngine:
             original_caller=caller,
         )
 
+        # lazy formatting
+        if args:
+            msg = str(msg).format(*args)
+
         # prettify
-        if type(msg) in [dict, list, str]:  # TODO: should be recursive
+        if self.structured:
+            msg = msg if isinstance(msg, str) else pformat(msg)
+        elif type(msg) in [dict, list, str]:  # TODO: should be recursive
             try:
                 msg = json.dumps(msg, indent=4)
             except Exception:
@@ -1,8 +1,8 @@
 from typing import Any, Dict, List
 from langchain.callbacks.base import BaseCallbackHandler
 from langchain_core.outputs.llm_result import LLMResult
-import tiktoken
 from cat.convo.messages import LLMModelInteraction
+from cat.looking_glass.token_counter import TokenCounter
 import time
 
 
@@ -20,34 +20,31 @@ class ModelInteractionHandler(BaseCallbackHandler):
     Langchain callback handler for tracking model interactions.
     """
 
-    def __init__(self, stray, source: str):
+    def __init__(self, stray, source: str, llm=None):
         self.stray = stray
-        self.stray.working_memory.model_interactions.append(
-            LLMModelInteraction(
-                source=source,
-                prompt="",
-                reply="",
-                input_tokens=0,
-                output_tokens=0,
-                ended_at=0,
-            )
+        self.interaction = LLMModelInteraction(
+            source=source,
+            prompt="",
+            reply="",
+            input_tokens=0,
+            output_tokens=0,
+            ended_at=0,
         )
+        self.stray.working_memory.model_interactions.append(self.interaction)
 
-    def _count_tokens(self, text: str) -> int:
-        # cl100k_base is the most common encoding for OpenAI models such as GPT-3.5, GPT-4 - what about other providers?
-        encoding = tiktoken.get_encoding("cl100k_base")
-        return len(encoding.encode(text))
+        # tokenizer is cached by the token counter, one per model
+        self.tokenizer = TokenCounter().get_tokenizer(llm or stray._llm)
 
     def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs) -> None:
-        input_tokens = sum(self._count_tokens(prompt) for prompt in prompts)
         self.last_interaction.prompt = ''.join(prompts)
-        self.last_interaction.input_tokens = input_tokens
 
     def on_llm_end(self, response: LLMResult, **kwargs) -> None:
-        self.last_interaction.output_tokens = self._count_tokens(response.generations[0][0].text)
         self.last_interaction.reply = response.generations[0][0].text
         self.last_interaction.ended_at = time.time()
 
+        # count now, or after the reply is sent
+        self.stray.count_tokens(self.last_interaction, self.tokenizer)
+
     @property
     def last_interaction(self) -> LLMModelInteraction:
-        return self.stray.working_memory.model_interactions[-1]
+        return self.interaction
@@ -18,7 +18,7 @@ import cat.factory.auth_handler as auth_handlers
 from cat.db import crud, models
 from cat.factory.embedder import get_embedder_from_name
 import cat.factory.embedder as embedders
-from cat.factory.llm import LLMDefaultConfig
+from cat.factory.llm import LLMDefaultConfig, LLMRegistry, LLM_ROLES
 from cat.factory.llm import get_llm_from_name
 from cat.agents.main_agent import MainAgent
 from cat.looking_glass.white_rabbit import WhiteRabbit
@@ -85,9 +85,6 @@ class CheshireCat:
         self.mad_hatter.on_finish_plugins_sync_callback = self.embed_procedures
         self.embed_procedures()  # first time launched manually
 
-        # Main agent instance (for reasoning)
-        self.main_agent = self.mad_hatter.get_option("main_agent")()
-
         # Rabbit Hole Instance
         # self.rabbit_hole = RabbitHole(self)  # :(
         self.rabbit_hole = self.mad_hatter.get_option("rabbit_hole")(self)
@@ -95,6 +92,11 @@ class CheshireCat:
         # allows plugins to do something after the cat bootstrap is complete
         self.mad_hatter.execute_hook("after_cat_bootstrap", cat=self)
 
+    @property
+    def main_agent(self) -> MainAgent:
+        """Main agent instance (for reasoning), built again when plugins change."""
+        return self.mad_hatter.get_option_instance("main_agent")
+
     def load_natural_language(self):
         """Load Natural Language related objects.
 
@@ -112,6 +114,7 @@ class CheshireCat:
         """
         # LLM and embedder
         self._llm = self.load_language_model()
+        self.llm_registry = self.load_llm_registry()
         self.embedder = self.load_language_embedder()
 
     def load_language_model(self) -> BaseLanguageModel:
@@ -152,6 +155,37 @@ class CheshireCat:
 
         return llm
 
+    def load_llm_registry(self) -> LLMRegistry:
+        """Language models by role (`chat`, `router`, `utility`).
+
+        The `chat` role is the main LLM. Other roles have their own model if configured in the `llm_roles` settings,
+        otherwise they fall back to the `chat` model.
+
+        Returns
+        -------
+        llm_registry : LLMRegistry
+            Registry of the language models by role.
+        """
+
+        llms = {"chat": self._llm}
+
+        for role_setting in crud.get_settings_by_category(category="llm_roles"):
+            role = role_setting["name"].replace("llm_role_", "")
+            if role not in LLM_ROLES or role == "chat":
+                continue
+
+            FactoryClass = get_llm_from_name(role_setting["value"]["name"])
+            if FactoryClass is None:
+                log.warning(f"LLM {role_setting['value']['name']} for role {role} is not available")
+                continue
+
+            try:
+                llms[role] = FactoryClass.get_llm_from_config(role_setting["value"]["config"])
+            except Exception as e:
+                log.error(f"Unable to load LLM {role_setting['value']['name']} for role {role}, using the chat model: {e}")
+
+        return LLMRegistry(llms)
+
     def load_language_embedder(self) -> embedders.EmbedderSettings:
         """Hook into the  embedder selection.
 
@@ -333,16 +367,27 @@ class CheshireCat:
                     }
         return hashes
 
-    def embed_procedures(self):
-        # Retrieve from vectorDB all procedural embeddings
-        embedded_procedures = self.memory.vectors.procedural.get_all_points()
+    def embed_procedures(self, sources=None):
+        # Easy access to active procedures in mad_hatter (source of truth!)
+        active_procedures = self.mad_hatter.procedures
+
+        if sources is None:
+            # Retrieve from vectorDB all procedural embeddings
+            embedded_procedures = self.memory.vectors.procedural.get_all_points()
+        else:
+            # Only procedures of a toggled plugin, by name
+            embedded_procedures = []
+            for source in sources:
+                embedded_procedures += self.memory.vectors.procedural.get_all_points(
+                    {"source": source}
+                )
+            active_procedures = [p for p in active_procedures if p.name in sources]
+
         embedded_procedures_hashes = self.build_embedded_procedures_hashes(
             embedded_procedures
         )
-
-        # Easy access to active procedures in mad_hatter (source of truth!)
         active_procedures_hashes = self.build_active_procedures_hashes(
-            self.mad_hatter.procedures
+            active_procedures
         )
 
         # points_to_be_kept     = set(active_procedures_hashes.keys()) and set(embedded_procedures_hashes.keys()) not necessary
@@ -387,7 +432,7 @@ class CheshireCat:
 
     # REFACTOR: cat.llm should be available here, without streaming clearly
     # (one could be interested in calling the LLM anytime, not only when there is a session)
-    def llm(self, prompt, *args, **kwargs) -> str:
+    def llm(self, prompt, *args, role: str = "chat", **kwargs) -> str:
         """Generate a response using the LLM model.
 
         This method is useful for generating a response with both a chat and a completion model using the same syntax
@@ -396,6 +441,8 @@ class CheshireCat:
         ----------
         prompt : str
             The prompt for generating the response.
+        role : str
+            Role of the LLM to use (`chat`, `router` or `utility`).
 
         Returns
         -------
@@ -417,7 +464,7 @@ class CheshireCat:
         chain = (
             prompt
             | RunnableLambda(lambda x: utils.langchain_log_prompt(x, f"{caller} prompt"))
-            | self._llm
+            | self.llm_registry.get(role)
             | RunnableLambda(lambda x: utils.langchain_log_output(x, f"{caller} prompt output"))
             | StrOutputParser()
         )
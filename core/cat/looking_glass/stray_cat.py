@@ -1,9 +1,14 @@
 import time
 import asyncio
+import threading
 import traceback
-import tiktoken
+from collections import OrderedDict
 from typing import Literal, get_args, List, Dict, Union, Any
 
+import numpy as np
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+
 from langchain.docstore.document import Document
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, BaseMessage
 from langchain_core.runnables import RunnableConfig, RunnableLambda
@@ -15,13 +20,22 @@ from fastapi import WebSocket
 from cat.log import log
 from cat.looking_glass.cheshire_cat import CheshireCat
 from cat.looking_glass.callbacks import NewTokenHandler, ModelInteractionHandler
+from cat.looking_glass.token_counter import TokenCounter
 from cat.memory.working_memory import WorkingMemory
 from cat.convo.messages import CatMessage, UserMessage, MessageWhy, Role, EmbedderModelInteraction
 from cat.agents import AgentOutput
 from cat import utils
+from cat import metrics
+from cat.tracing import Tracer
 
 MSG_TYPES = Literal["notification", "chat", "error", "chat_token"]
 
+# labels centroids used by `StrayCat.classify` in embedder mode,
+#   shared among all strays (key is embedder id and labels)
+LABELS_CENTROIDS_CACHE_SIZE = 128
+labels_centroids_cache = OrderedDict()
+labels_centroids_lock = threading.Lock()
+
 
 # The Stray cat goes around tools and hook, making troubles
 class StrayCat:
@@ -44,6 +58,9 @@ class StrayCat:
 
         self.__loop = asyncio.new_event_loop()
 
+        # model interactions waiting for their tokens to be counted
+        self.__pending_token_counts = []
+
     def __repr__(self):
         return f"StrayCat(user_id={self.user_id})"
 
@@ -193,17 +210,18 @@ class StrayCat:
         log.info(f"Recall query: '{recall_query}'")
 
         # Embed recall query
-        recall_query_embedding = self.embedder.embed_query(recall_query)
+        with Tracer().span("embed"), metrics.STAGE_DURATION.time(stage="embed"):
+            recall_query_embedding = self.embedder.embed_query(recall_query)
         self.working_memory.recall_query = recall_query
         
         # keep track of embedder model usage
-        self.working_memory.model_interactions.append(
-            EmbedderModelInteraction(
-                prompt=recall_query,
-                reply=recall_query_embedding,
-                input_tokens=len(tiktoken.get_encoding("cl100k_base").encode(recall_query)),
-            )
+        embedder_interaction = EmbedderModelInteraction(
+            prompt=recall_query,
+            reply=recall_query_embedding,
+            input_tokens=0,
         )
+        self.working_memory.model_interactions.append(embedder_interaction)
+        self.count_tokens(embedder_interaction)
 
         # hook to do something before recall begins
         self.mad_hatter.execute_hook("before_cat_recalls_memories", cat=self)
@@ -257,7 +275,9 @@ class StrayCat:
 
             # recall relevant memories for collection
             vector_memory = getattr(self.memory.vectors, memory_type)
-            memories = vector_memory.recall_memories_from_embedding(**config)
+            with Tracer().span("recall", collection=memory_type), \
+                    metrics.RECALL_DURATION.time(collection=memory_type):
+                memories = vector_memory.recall_memories_from_embedding(**config)
 
             setattr(
                 self.working_memory, memory_key, memories
@@ -266,7 +286,7 @@ class StrayCat:
         # hook to modify/enrich retrieved memories
         self.mad_hatter.execute_hook("after_cat_recalls_memories", cat=self)
 
-    def llm(self, prompt: str, stream: bool = False) -> str:
+    def llm(self, prompt: str, stream: bool = False, role: str = "chat") -> str:
         """Generate a response using the LLM model.
 
         This method is useful for generating a response with both a chat and a completion model using the same syntax
@@ -275,6 +295,10 @@ class StrayCat:
         ----------
         prompt : str
             The prompt for generating the response.
+        stream : bool
+            Whether to stream the tokens via websocket.
+        role : str
+            Role of the LLM to use: `chat` (main model), `router` or `utility` (cheaper models for small tasks).
 
         Returns
         -------
@@ -288,9 +312,11 @@ class StrayCat:
         if stream:
             callbacks.append(NewTokenHandler(self))
 
+        llm = self.get_llm(role)
+
         # Add a token counter to the callbacks
         caller = utils.get_caller_info()
-        callbacks.append(ModelInteractionHandler(self, caller or "StrayCat"))
+        callbacks.append(ModelInteractionHandler(self, caller or "StrayCat", llm=llm))
 
         
 
@@ -306,7 +332,7 @@ class StrayCat:
         chain = (
             prompt
             | RunnableLambda(lambda x: utils.langchain_log_prompt(x, f"{caller} prompt"))
-            | self._llm
+            | llm
             | RunnableLambda(lambda x: utils.langchain_log_output(x, f"{caller} prompt output"))
             | StrOutputParser()
         )
@@ -318,6 +344,30 @@ class StrayCat:
 
         return output
 
+    def count_tokens(self, interaction, tokenizer=None):
+        """Count tokens of a model interaction.
+
+        Tokens are counted immediately, or queued until the reply is sent if `CCAT_TOKEN_COUNTING` is `deferred`.
+
+        Parameters
+        ----------
+        interaction : ModelInteraction
+            Model interaction to fill with token counts.
+        tokenizer : Callable[[str], int], optional
+            Tokenizer to use. Defaults to the token counter default tokenizer.
+        """
+        token_counter = TokenCounter()
+        if token_counter.deferred:
+            self.__pending_token_counts.append((interaction, tokenizer))
+        else:
+            token_counter.count_interaction(interaction, tokenizer)
+
+    def flush_token_counts(self):
+        """Count tokens of deferred model interactions in a background thread."""
+        pending = self.__pending_token_counts
+        self.__pending_token_counts = []
+        if pending:
+            TokenCounter().count_interactions_in_background(pending)
 
     async def __call__(self, message_dict):
         """Call the Cat instance.
@@ -344,6 +394,23 @@ class StrayCat:
 
         """
 
+        status = "error"
+        tracer = Tracer()
+        try:
+            # the whole turn sees the same hooks and tools, even if plugins change meanwhile
+            with self.mad_hatter.pinned_registry(), \
+                    tracer.start_trace("turn", user_id=self.user_id) as trace, \
+                    metrics.TURN_DURATION.time():
+                final_output = await self.__reply(message_dict)
+            if isinstance(final_output, CatMessage):
+                status = "ok"
+                if trace and tracer.attach_to_why:
+                    final_output.why.trace = trace.to_list()
+            return final_output
+        finally:
+            metrics.TURNS.inc(status=status)
+
+    async def __reply(self, message_dict):
         # Parse websocket message into UserMessage obj
         user_message = UserMessage.model_validate(message_dict)
         log.info(user_message)
@@ -388,7 +455,8 @@ class StrayCat:
 
         # reply with agent
         try:
-            agent_output: AgentOutput = await self.main_agent.execute(self)
+            with Tracer().span("agent", agent="main"):
+                agent_output: AgentOutput = await self.main_agent.execute(self)
         except Exception as e:
             # This error happens when the LLM
             #   does not respect prompt instructions.
@@ -420,12 +488,13 @@ class StrayCat:
         # store user message in episodic memory
         # TODO: vectorize and store also conversation chunks
         #   (not raw dialog, but summarization)
-        user_message_embedding = self.embedder.embed_documents([user_message_text])
-        _ = self.memory.vectors.episodic.add_point(
-            doc.page_content,
-            user_message_embedding[0],
-            doc.metadata,
-        )
+        with metrics.STAGE_DURATION.time(stage="episodic_store"):
+            user_message_embedding = self.embedder.embed_documents([user_message_text])
+            _ = self.memory.vectors.episodic.add_point(
+                doc.page_content,
+                user_message_embedding[0],
+                doc.metadata,
+            )
 
         # why this response?
         why = self.__build_why()
@@ -455,6 +524,8 @@ class StrayCat:
             cat_message = self.loop.run_until_complete(self.__call__(user_message_json))
             # send message back to client
             self.send_chat_message(cat_message)
+            # reply is sent, deferred token counting can happen now
+            self.flush_token_counts()
         except Exception as e:
             # Log any unexpected errors
             log.error(e)
@@ -463,7 +534,10 @@ class StrayCat:
             self.send_error(e)
 
     def classify(
-        self, sentence: str, labels: List[str] | Dict[str, List[str]]
+        self,
+        sentence: str,
+        labels: List[str] | Dict[str, List[str]],
+        method: Literal["llm", "embedder"] = "llm",
     ) -> str | None:
         """Classify a sentence.
 
@@ -473,6 +547,10 @@ class StrayCat:
             Sentence to be classified.
         labels : List[str] or Dict[str, List[str]]
             Possible output categories and optional examples.
+        method : str
+            `llm` asks the language model. `embedder` embeds the sentence and returns the label
+            whose examples are closest to it (labels without examples are compared by name).
+            The examples are embedded only once.
 
         Returns
         -------
@@ -493,8 +571,16 @@ class StrayCat:
         ... cat.classify("it is a bad day", labels=example_labels)
         "negative"
 
+        Examples can be compared to the sentence with the embedder, without calling the LLM:
+
+        >>> cat.classify("it is a bad day", labels=example_labels, method="embedder")
+        "negative"
+
         """
 
+        if method == "embedder":
+            return self.__classify_with_embedder(sentence, labels)
+
         if isinstance(labels, dict):
             labels_names = labels.keys()
             examples_list = "\n\nExamples:"
@@ -515,18 +601,72 @@ Allowed classes are:
 
 "{sentence}" -> """
 
-        response = self.llm(prompt)
+        response = self.llm(prompt, role="router")
         log.info(response)
 
         # find the closest match and its score with levenshtein distance
-        best_label, score = min(
-            ((label, utils.levenshtein_distance(response, label)) for label in labels_names),
-            key=lambda x: x[1],
+        best_label, score, _ = process.extractOne(
+            response, list(labels_names), scorer=Levenshtein.normalized_distance
         )
 
         # set 0.5 as threshold - let's see if it works properly
         return best_label if score < 0.5 else None
 
+    def __classify_with_embedder(
+        self, sentence: str, labels: List[str] | Dict[str, List[str]]
+    ) -> str | None:
+        if not isinstance(labels, dict):
+            labels = {label: [] for label in labels}
+
+        labels_names, centroids = self.__get_labels_centroids(labels)
+
+        sentence_embedding = np.array(self.embedder.embed_query(sentence), dtype=float)
+        norm = np.linalg.norm(sentence_embedding)
+        if norm == 0:
+            return None
+
+        # cosine similarity with each label centroid
+        similarities = centroids @ (sentence_embedding / norm)
+        return labels_names[int(np.argmax(similarities))]
+
+    def __get_labels_centroids(self, labels: Dict[str, List[str]]):
+        embedder = self.embedder
+        key = (id(embedder), tuple((k, tuple(v)) for k, v in labels.items()))
+
+        with labels_centroids_lock:
+            if key in labels_centroids_cache:
+                labels_centroids_cache.move_to_end(key)
+                metrics.CACHE_REQUESTS.inc(cache="labels_centroids", result="hit")
+                # the embedder is kept in the cache, so its id cannot be reused
+                _, labels_names, centroids = labels_centroids_cache[key]
+                return labels_names, centroids
+
+        metrics.CACHE_REQUESTS.inc(cache="labels_centroids", result="miss")
+
+        # embed all the examples at once (a label without examples is an example of itself)
+        labels_names = list(labels.keys())
+        labels_examples = [labels[name] or [name] for name in labels_names]
+        examples_embeddings = np.array(
+            embedder.embed_documents([ex for examples in labels_examples for ex in examples]),
+            dtype=float,
+        )
+
+        centroids = []
+        start = 0
+        for examples in labels_examples:
+            centroid = examples_embeddings[start:start + len(examples)].mean(axis=0)
+            norm = np.linalg.norm(centroid)
+            centroids.append(centroid / norm if norm > 0 else centroid)
+            start += len(examples)
+        centroids = np.array(centroids)
+
+        with labels_centroids_lock:
+            labels_centroids_cache[key] = (embedder, labels_names, centroids)
+            if len(labels_centroids_cache) > LABELS_CENTROIDS_CACHE_SIZE:
+                labels_centroids_cache.popitem(last=False)
+
+        return labels_names, centroids
+
     def stringify_chat_history(self, latest_n: int = 5) -> str:
         """Serialize chat history.
         Converts to text the recent conversation turns.
@@ -583,6 +723,10 @@ Allowed classes are:
     def _llm(self):
         return CheshireCat()._llm
 
+    def get_llm(self, role: str = "chat"):
+        """Get the LLM for a role (`chat`, `router` or `utility`)."""
+        return CheshireCat().llm_registry.get(role)
+
     @property
     def embedder(self):
         return CheshireCat().embedder
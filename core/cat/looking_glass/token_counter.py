@@ -0,0 +1,149 @@
+import math
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, List, Tuple
+
+import tiktoken
+
+from cat.convo.messages import ModelInteraction, LLMModelInteraction
+from cat.utils import singleton_meta
+from cat.env import get_config
+from cat.log import log
+from cat import metrics
+
+
+# cl100k_base is the most common encoding for OpenAI models such as GPT-3.5, GPT-4
+DEFAULT_ENCODING = "cl100k_base"
+
+Tokenizer = Callable[[str], int]
+
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str) -> tiktoken.Encoding | None:
+    """Load a tiktoken encoding only once per process.
+
+    Returns None if the encoding cannot be loaded (e.g. no network to download it),
+    in that case token counts are estimated.
+    """
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        log.warning(f"Unable to load tokenizer {encoding_name}, token counts will be estimated: {e}")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), used when no tokenizer is available."""
+    return math.ceil(len(text) / 4)
+
+
+class TokenCounter(metaclass=singleton_meta):
+    """Shared token counting service.
+
+    Tokenizers are resolved once per model and cached, so counting does not reload encodings at every call.
+    Depending on `CCAT_TOKEN_COUNTING`, tokens are counted as soon as a model replies (`eager`)
+    or in a background thread after the reply has been sent to the user (`deferred`).
+    """
+
+    def __init__(self):
+        # tokenizers registered by plugins, indexed by langchain `_llm_type`
+        self._custom_tokenizers: Dict[str, Tokenizer] = {}
+        # resolved tokenizers, indexed by (llm_type, model_name)
+        self._tokenizers: Dict[Tuple[str | None, str | None], Tokenizer] = {}
+        self._executor = None
+        # background countings submitted and not done yet
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    @property
+    def deferred(self) -> bool:
+        return get_config().token_counting == "deferred"
+
+    def register_tokenizer(self, llm_type: str, tokenizer: Tokenizer):
+        """Register a tokenizer for a provider, identified by the langchain `_llm_type` of its models.
+
+        Parameters
+        ----------
+        llm_type : str
+            Langchain `_llm_type` of the language model (e.g. "openai-chat", "ollama-chat").
+        tokenizer : Callable[[str], int]
+            Function returning the number of tokens in a text.
+        """
+        self._custom_tokenizers[llm_type] = tokenizer
+        self._tokenizers = {}
+
+    def get_tokenizer(self, llm=None) -> Tokenizer:
+        """Get the cached tokenizer for a language model (or the default one if `llm` is None)."""
+        llm_type = getattr(llm, "_llm_type", None)
+        model_name = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+        if not isinstance(model_name, str):
+            model_name = None
+
+        key = (llm_type, model_name)
+        if key not in self._tokenizers:
+            self._tokenizers[key] = self._build_tokenizer(llm_type, model_name)
+        return self._tokenizers[key]
+
+    def _build_tokenizer(self, llm_type: str | None, model_name: str | None) -> Tokenizer:
+        if llm_type in self._custom_tokenizers:
+            return self._custom_tokenizers[llm_type]
+
+        # OpenAI models have a known encoding, other providers default to cl100k_base
+        encoding_name = DEFAULT_ENCODING
+        if model_name:
+            try:
+                encoding_name = tiktoken.encoding_name_for_model(model_name)
+            except KeyError:
+                pass
+
+        encoding = get_encoding(encoding_name)
+        if encoding is None:
+            return estimate_tokens
+
+        # special tokens in user text should be counted, not rejected
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+    def count(self, text: str, llm=None) -> int:
+        """Count tokens in a text with the tokenizer of the given language model."""
+        return self.get_tokenizer(llm)(text)
+
+    def count_interaction(self, interaction: ModelInteraction, tokenizer: Tokenizer = None):
+        """Fill token counts of a model interaction."""
+        if tokenizer is None:
+            tokenizer = self.get_tokenizer()
+
+        interaction.input_tokens = tokenizer(interaction.prompt)
+        if isinstance(interaction, LLMModelInteraction):
+            interaction.output_tokens = tokenizer(interaction.reply)
+            metrics.LLM_TOKENS.inc(interaction.input_tokens, direction="input")
+            metrics.LLM_TOKENS.inc(interaction.output_tokens, direction="output")
+        else:
+            metrics.EMBEDDER_TOKENS.inc(interaction.input_tokens)
+
+    def count_interactions_in_background(
+        self, interactions: List[Tuple[ModelInteraction, Tokenizer]]
+    ) -> Future:
+        """Fill token counts of several model interactions in a background thread."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="token_counter"
+            )
+            metrics.QUEUE_DEPTH.set_function(lambda: self._pending, queue="token_counting")
+
+        def count_all():
+            for interaction, tokenizer in interactions:
+                try:
+                    self.count_interaction(interaction, tokenizer)
+                except Exception as e:
+                    log.error(f"Error counting tokens: {e}")
+
+        with self._pending_lock:
+            self._pending += 1
+        future = self._executor.submit(count_all)
+        future.add_done_callback(self._counting_done)
+        return future
+
+    def _counting_done(self, future: Future):
+        with self._pending_lock:
+            self._pending -= 1
@@ -0,0 +1,118 @@
+import time
+import asyncio
+import threading
+import concurrent.futures
+from typing import Dict, List, Tuple
+
+from cat.env import get_config
+from cat.log import log
+
+
+# before Python 3.11 asyncio and concurrent.futures timeouts are not the builtin TimeoutError
+TIMEOUT_ERRORS = (TimeoutError, asyncio.TimeoutError, concurrent.futures.TimeoutError)
+
+
+class CircuitBreaker:
+    """Failure tracking of a plugin hook or tool.
+
+    After `CCAT_CIRCUIT_BREAKER_FAILURES` consecutive failures or timeouts the breaker opens
+    and the hook or tool is bypassed for `CCAT_CIRCUIT_BREAKER_COOLDOWN` seconds.
+    Then it is tried again: a success closes the breaker, a failure opens it for another cooldown.
+
+    Attributes
+    ----------
+    kind : str
+        `hook` or `tool`.
+    plugin_id : str
+        Plugin the hook or tool belongs to.
+    name : str
+        Hook or tool name.
+    """
+
+    def __init__(self, kind: str, plugin_id: str, name: str):
+        self.kind = kind
+        self.plugin_id = plugin_id
+        self.name = name
+
+        self.consecutive_failures = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.open_until = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        return self.open_until > time.monotonic()
+
+    @property
+    def state(self) -> str:
+        if self.is_open():
+            return "open"
+        if self.consecutive_failures >= get_config().circuit_breaker_failures:
+            # cooldown is over, next call is a trial
+            return "half_open"
+        return "closed"
+
+    def record_success(self):
+        # lock free when nothing changes, as it is the case for almost every call
+        if self.consecutive_failures:
+            with self._lock:
+                self.consecutive_failures = 0
+
+    def record_failure(self, error: Exception, timeout: bool = False):
+        config = get_config()
+        with self._lock:
+            self.consecutive_failures += 1
+            self.failures += 1
+            if timeout:
+                self.timeouts += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+
+            if self.consecutive_failures >= config.circuit_breaker_failures:
+                self.open_until = time.monotonic() + config.circuit_breaker_cooldown
+                log.warning(
+                    f"{self.kind.capitalize()} {self.plugin_id}::{self.name} failed "
+                    f"{self.consecutive_failures} times in a row, "
+                    f"bypassed for {config.circuit_breaker_cooldown}s"
+                )
+
+    def to_dict(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "open_for": max(0.0, self.open_until - time.monotonic()),
+            "last_error": self.last_error,
+        }
+
+
+class CircuitBreakers:
+    """Circuit breakers of the plugins hooks and tools, created at their first use.
+    A breaker covers all the functions a plugin registers for the same hook."""
+
+    def __init__(self):
+        self._breakers: Dict[Tuple[str, str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, plugin_id: str, name: str) -> CircuitBreaker:
+        key = (kind, plugin_id, name)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(key, CircuitBreaker(kind, plugin_id, name))
+        return breaker
+
+    def of_plugin(self, plugin_id: str) -> List[CircuitBreaker]:
+        """Breakers of the hooks and tools of a plugin that failed at least once."""
+        return [
+            b for b in list(self._breakers.values()) if b.plugin_id == plugin_id and b.failures
+        ]
+
+    def reset(self, plugin_id: str):
+        """Forget failures of a plugin (e.g. when it is activated again)."""
+        with self._lock:
+            for key in [k for k in self._breakers if k[1] == plugin_id]:
+                del self._breakers[key]
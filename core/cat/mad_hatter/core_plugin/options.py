@@ -1,6 +1,8 @@
 from cat.mad_hatter.decorators import option
 from cat.rabbit_hole import RabbitHole
 from cat.agents.main_agent import MainAgent
+from cat.agents.procedures_agent import ProceduresAgent
+from cat.agents.memory_agent import MemoryAgent
 from cat.looking_glass.white_rabbit import WhiteRabbit
 from cat.log import log
 
@@ -21,4 +23,12 @@ class WhiteRabbitDefault(WhiteRabbit):
 class MainAgentDefault(MainAgent):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        log.warning("\n\n\nWELLAAA!!!!!!\n\n\n")
\ No newline at end of file
+        log.warning("\n\n\nWELLAAA!!!!!!\n\n\n")
+
+@option("procedures_agent", priority=0)
+class ProceduresAgentDefault(ProceduresAgent):
+    pass
+
+@option("memory_agent", priority=0)
+class MemoryAgentDefault(MemoryAgent):
+    pass
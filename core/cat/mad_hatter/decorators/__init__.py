@@ -1,6 +1,6 @@
 from cat.mad_hatter.decorators.tool import CatTool, tool
-from cat.mad_hatter.decorators.hook import CatHook, hook
+from cat.mad_hatter.decorators.hook import CatHook, LazyCatHook, hook
 from cat.mad_hatter.decorators.plugin_decorator import CatPluginDecorator, plugin
 from cat.mad_hatter.decorators.options import CatOption, option
 
-__all__ = ["CatTool", "tool", "CatHook", "hook", "CatPluginDecorator", "plugin", "CatOption", "option"]
+__all__ = ["CatTool", "tool", "CatHook", "LazyCatHook", "hook", "CatPluginDecorator", "plugin", "CatOption", "option"]
@@ -1,22 +1,49 @@
+import importlib
 from typing import Union, Callable
 
 
 # class to represent a @hook
 class CatHook:
-    def __init__(self, name: str, func: Callable, priority: int):
+    def __init__(self, name: str, func: Callable, priority: int, timeout: float | None = None):
         self.function = func
         self.name = name
         self.priority = priority
+        # time budget in seconds, CCAT_HOOK_TIMEOUT if None
+        self.timeout = timeout
 
     def __repr__(self) -> str:
         return f"CatHook(name={self.name}, priority={self.priority})"
 
 
+# a @hook found by reading the plugin source, its module is imported the first time the hook runs
+class LazyCatHook(CatHook):
+    def __init__(self, name: str, priority: int, module_name: str, symbol: str):
+        self.name = name
+        self.priority = priority
+        # hooks with a timeout are never lazy, see `static_manifest`
+        self.timeout = None
+        self.module_name = module_name
+        self.symbol = symbol
+        self._function = None
+
+    @property
+    def function(self) -> Callable:
+        if self._function is None:
+            module = importlib.import_module(self.module_name)
+            self._function = getattr(module, self.symbol).function
+        return self._function
+
+    def __repr__(self) -> str:
+        return f"LazyCatHook(name={self.name}, priority={self.priority}, module={self.module_name})"
+
+
 # @hook decorator. Any function in a plugin decorated by @hook and named properly (among list of available hooks) is used by the Cat
 # @hook priority defaults to 1, the higher the more important. Hooks in the default core plugin have all priority=0 so they are automatically overwritten from plugins
-def hook(*args: Union[str, Callable], priority: int = 1) -> Callable:
+def hook(*args: Union[str, Callable], priority: int = 1, timeout: float | None = None) -> Callable:
     """
     Make hooks out of functions, can be used with or without arguments.
+    `timeout` is the time budget of the hook in seconds (default `CCAT_HOOK_TIMEOUT`),
+    a hook going over it is abandoned and the hook chain goes on without its result.
     Examples:
         .. code-block:: python
             @hook
@@ -29,7 +56,7 @@ def hook(*args: Union[str, Callable], priority: int = 1) -> Callable:
 
     def _make_with_name(hook_name: str) -> Callable:
         def _make_hook(func: Callable[[str], str]) -> CatHook:
-            hook_ = CatHook(name=hook_name, func=func, priority=priority)
+            hook_ = CatHook(name=hook_name, func=func, priority=priority, timeout=timeout)
             return hook_
 
         return _make_hook
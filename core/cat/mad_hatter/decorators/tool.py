@@ -1,10 +1,16 @@
+import asyncio
 import inspect
+import contextvars
 
 from typing import Union, Callable, List
 from inspect import signature
 
 from langchain_core.tools import BaseTool
 
+from cat.env import get_config
+from cat.tracing import Tracer
+from cat.mad_hatter.tool_executor import TOOL_EXECUTIONS, ToolProcessPool
+
 
 
 # All @tool decorated functions in plugins become a CatTool.
@@ -16,9 +22,21 @@ class CatTool(BaseTool):
         func: Callable,
         return_direct: bool = False,
         examples: List[str] = [],
+        execution: str = "thread",
+        timeout: float | None = None,
+        memory_limit_mb: int | None = None,
     ):
         description = func.__doc__.strip()
 
+        if execution not in TOOL_EXECUTIONS:
+            raise ValueError(f"Tool {name}: execution must be one of {TOOL_EXECUTIONS}, not {execution}")
+        if inspect.iscoroutinefunction(func) and execution == "process":
+            raise ValueError(f"Tool {name}: async tools cannot run in a process")
+        if timeout is not None and execution == "inline" and not inspect.iscoroutinefunction(func):
+            raise ValueError(f"Tool {name}: inline sync tools cannot have a timeout")
+        if memory_limit_mb is not None and execution != "process":
+            raise ValueError(f"Tool {name}: memory limits apply only to tools running in a process")
+
         # call parent contructor
         super().__init__(
             name=name, func=func, description=description, return_direct=return_direct
@@ -30,6 +48,12 @@ class CatTool(BaseTool):
         self.description = description
         self.return_direct = return_direct
 
+        # how the tool runs if it is sync, see `tool` decorator
+        self.execution = execution
+        # time budget in seconds, CCAT_TOOL_TIMEOUT if None
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+
         self.triggers_map = {
             "description": [f"{name}: {description}"],
             "start_example": examples,
@@ -50,15 +74,29 @@ class CatTool(BaseTool):
     
     # we run tools always async, even if they are not defined so in a plugin
     async def _arun(self, input_by_llm, stray):
-
-        # await if the tool is async
-        if inspect.iscoroutinefunction(self.func):
-            return await self.func(input_by_llm, cat=stray)
-
-        # run in executor if the tool is not async
-        return await stray.loop.run_in_executor(
-            None, self.func, input_by_llm, stray
-        )
+        timeout = self.timeout if self.timeout is not None else get_config().tool_timeout
+
+        with Tracer().span("tool", tool=self.name, execution=self.execution):
+            # await if the tool is async
+            if inspect.iscoroutinefunction(self.func):
+                return await asyncio.wait_for(self.func(input_by_llm, cat=stray), timeout)
+
+            if self.execution == "inline":
+                return self.func(input_by_llm, stray)
+
+            if self.execution == "process":
+                return await ToolProcessPool().run(
+                    self, input_by_llm, timeout=timeout, memory_limit_mb=self.memory_limit_mb
+                )
+
+            # run in executor if the tool is not async
+            #   (in the current context, so spans opened by the tool are nested in this one)
+            return await asyncio.wait_for(
+                stray.loop.run_in_executor(
+                    None, contextvars.copy_context().run, self.func, input_by_llm, stray
+                ),
+                timeout,
+            )
 
     # override `extra = 'forbid'` for Tool pydantic model in langchain
     class Config:
@@ -73,13 +111,26 @@ class CatTool(BaseTool):
 # @tool decorator, a modified version of a langchain Tool that also takes a Cat instance as argument
 # adapted from https://github.com/hwchase17/langchain/blob/master/langchain/agents/tools.py
 def tool(
-    *args: Union[str, Callable], return_direct: bool = False, examples: List[str] = []
+    *args: Union[str, Callable],
+    return_direct: bool = False,
+    examples: List[str] = [],
+    execution: str = "thread",
+    timeout: float | None = None,
+    memory_limit_mb: int | None = None,
 ) -> Callable:
     """
     Make tools out of functions, can be used with or without arguments.
     Requires:
         - Function must be of type (str, cat) -> str
         - Function must have a docstring
+    Execution of sync tools:
+        - "thread" (default): in a thread pool, next to the other conversations
+        - "inline": directly in the event loop, only for tools doing almost nothing
+        - "process": in a process pool shared by tools, for CPU heavy or untrusted code.
+          The tool gets `cat=None`, its function must be defined at module level,
+          input and output must be picklable. `memory_limit_mb` caps its memory.
+        `timeout` (seconds) applies to "thread" and "process" sync tools and to async tools,
+        a "process" tool that times out has its worker process terminated.
     Examples:
         .. code-block:: python
             @tool
@@ -90,6 +141,10 @@ def tool(
             def search_api(query: str, cat) -> str:
                 # Searches the API for the query.
                 return "https://api.com/search?q=" + query
+            @tool(execution="process", timeout=30, memory_limit_mb=1024)
+            def fit_model(data_path: str, cat) -> str:
+                # Fits a model on the data.
+                ...
     """
 
     def _make_with_name(tool_name: str) -> Callable:
@@ -100,6 +155,9 @@ def tool(
                 func=func,
                 return_direct=return_direct,
                 examples=examples,
+                execution=execution,
+                timeout=timeout,
+                memory_limit_mb=memory_limit_mb,
             )
             return tool_
 
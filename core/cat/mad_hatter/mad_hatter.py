@@ -1,12 +1,22 @@
 import os
+import sys
+import time
 import glob
+import bisect
 import shutil
-import inspect
+import threading
 import traceback
+import contextvars
+import concurrent.futures
 from copy import deepcopy
+from contextlib import contextmanager
 from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
 
 from cat.log import log
+from cat import metrics
+from cat.env import get_config
+from cat.tracing import Tracer
 
 import cat.utils as utils
 from cat.utils import singleton
@@ -16,11 +26,10 @@ from cat.db.models import Setting
 
 from cat.mad_hatter.plugin_extractor import PluginExtractor
 from cat.mad_hatter.plugin import Plugin
-from cat.mad_hatter.decorators.hook import CatHook
-from cat.mad_hatter.decorators.tool import CatTool
-from cat.mad_hatter.decorators.options import CatOption
-
-from cat.experimental.form import CatForm
+from cat.mad_hatter.plugin_index import PluginIndex
+from cat.mad_hatter.plugins_registry import PluginsRegistry, pinned_registry
+from cat.mad_hatter.plugin_dependencies import DependencyJob
+from cat.mad_hatter.circuit_breaker import CircuitBreakers, TIMEOUT_ERRORS
 
 
 # This class is responsible for plugins functionality:
@@ -38,26 +47,48 @@ class MadHatter:
     def __init__(self):
         self.plugins: Dict[str, Plugin] = {}  # plugins dictionary
 
-        self.hooks: Dict[
-            str, List[CatHook]
-        ] = {}  # dict of active plugins hooks ( hook_name -> [CatHook, CatHook, ...])
-        self.tools: List[CatTool] = []  # list of active plugins tools
-        self.forms: List[CatForm] = []  # list of active plugins forms
+        # hooks, tools, forms and options of active plugins,
+        #   replaced as a whole (never modified) when plugins change
+        self._registry = PluginsRegistry()
+        # only one writer at a time builds the next registry, readers never wait
+        self._registry_lock = threading.RLock()
 
         self.active_plugins: List[str] = []
 
-        self.options: Dict[
-            str, List[CatOption]
-        ] = {}  # dict of active plugins options ( option_name -> [CatOption, CatOption, ...])
+        # plugin id of modules calling get_plugin
+        self._plugin_of_module: Dict[str, str] = {}
 
         self.plugins_folder = utils.get_plugins_path()
 
+        # on disk index of plugins, to skip unchanged plugins at startup
+        self.index = PluginIndex()
+
+        # background installations of plugin requirements (plugin_id -> last job),
+        #   one at a time as pip installs into the same environment
+        self.dependency_jobs: Dict[str, DependencyJob] = {}
+        self._dependencies_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="plugin_dependencies"
+        )
+
+        # failures of hooks and tools, to bypass for a while the ones failing repeatedly
+        self.circuit_breakers = CircuitBreakers()
+        # hooks with a time budget run here, so the caller can stop waiting for them
+        self._hooks_executor = ThreadPoolExecutor(
+            max_workers=32, thread_name_prefix="plugin_hooks"
+        )
+        # timed out hooks still running, by plugin: a plugin cannot fill the executor
+        #   with stuck hooks and make the hooks of other plugins time out too
+        self.max_abandoned_hooks = 2
+        self._abandoned_hooks: Dict[str, int] = {}
+        self._abandoned_hooks_lock = threading.Lock()
+
         # this callback is set from outside to be notified when plugin sync is finished
-        self.on_finish_plugins_sync_callback = lambda: None
+        #   (with the names of the changed procedures, or None if all of them may have changed)
+        self.on_finish_plugins_sync_callback = lambda sources=None: None
 
         self.find_plugins()
 
-    def install_plugin(self, package_plugin):
+    def install_plugin(self, package_plugin) -> DependencyJob | None:
         # extract zip/tar file into plugin folder
         extractor = PluginExtractor(package_plugin)
         plugin_path = extractor.extract(self.plugins_folder)
@@ -71,8 +102,8 @@ class MadHatter:
         # create plugin obj
         self.load_plugin(plugin_path)
 
-        # activate it
-        self.toggle_plugin(plugin_id)
+        # activate it, returns the job installing its dependencies (if any)
+        return self.toggle_plugin(plugin_id)
 
     def uninstall_plugin(self, plugin_id):
         if self.plugin_exists(plugin_id) and (plugin_id != "core_plugin"):
@@ -83,15 +114,18 @@ class MadHatter:
             # remove plugin from cache
             plugin_path = self.plugins[plugin_id].path
             del self.plugins[plugin_id]
+            self.index.remove(plugin_id)
+            self.index.save()
 
             # remove plugin folder
             shutil.rmtree(plugin_path)
 
     # discover all plugins
     def find_plugins(self):
-        # emptying plugin dictionary, plugins will be discovered from disk
-        # and stored in a dictionary plugin_id -> plugin_obj
-        self.plugins = {}
+        # plugins will be discovered from disk and stored in a new dictionary plugin_id -> plugin_obj,
+        #   swapped in when complete so lookups during the rebuild still see the previous one
+        previous_plugins = self.plugins
+        plugins = {}
 
         self.active_plugins = self.load_active_plugins_from_db()
 
@@ -107,74 +141,191 @@ class MadHatter:
         log.info("ACTIVE PLUGINS:")
         log.info(self.active_plugins)
 
-        # discover plugins, folder by folder
-        for folder in all_plugin_folders:
-            self.load_plugin(folder)
-
+        def discover(folder):
             plugin_id = os.path.basename(os.path.normpath(folder))
-
-            if plugin_id in self.active_plugins:
+            previous = previous_plugins.get(plugin_id)
+            # an active plugin unchanged on disk is kept as it is, no need to import it again
+            if (
+                previous
+                and previous.active
+                and plugin_id in self.active_plugins
+                and previous.fingerprint == PluginIndex.fingerprint(previous.path)
+            ):
+                return previous
+            return self.create_plugin(folder)
+
+        # discover plugins in parallel (folder scan, manifest), then activate them in order
+        with ThreadPoolExecutor(max_workers=min(32, len(all_plugin_folders))) as executor:
+            discovered = list(executor.map(discover, all_plugin_folders))
+
+        for plugin in discovered:
+            if plugin is not None:
+                plugins[plugin.id] = plugin
+        self.plugins = plugins
+
+        for plugin in plugins.values():
+            if plugin.id in self.active_plugins and not plugin.active:
                 try:
-                    self.plugins[plugin_id].activate()
+                    plugin.activate()
                 except Exception as e:
                     # Couldn't activate the plugin -> Deactivate it
-                    if plugin_id in self.active_plugins:
-                        self.toggle_plugin(plugin_id)
+                    if plugin.id in self.active_plugins:
+                        self.toggle_plugin(plugin.id)
                     raise e
 
+        self.index.save()
+
         self.sync_hooks_tools_and_forms()
 
-    def load_plugin(self, plugin_path):
+    def create_plugin(self, plugin_path) -> Plugin | None:
         # Instantiate plugin.
         #   If the plugin is inactive, only manifest will be loaded
         #   If active, also settings, tools and hooks
         try:
-            plugin = Plugin(plugin_path)
-            # if plugin is valid, keep a reference
-            self.plugins[plugin.id] = plugin
+            return Plugin(plugin_path, index=self.index)
         except Exception as e:
             # Something happened while loading the plugin.
             # Print the error and go on with the others.
             log.error(str(e))
+            return None
+
+    def load_plugin(self, plugin_path):
+        plugin = self.create_plugin(plugin_path)
+        # if plugin is valid, keep a reference
+        if plugin:
+            self.plugins[plugin.id] = plugin
+
+    # registry of the current conversation turn if pinned, otherwise the latest one
+    @property
+    def registry(self) -> PluginsRegistry:
+        pinned = pinned_registry.get()
+        return self._registry if pinned is None else pinned
+
+    @contextmanager
+    def pinned_registry(self):
+        """Read the same registry for the whole block (e.g. a conversation turn),
+        even if plugins are installed or toggled meanwhile."""
+        token = pinned_registry.set(self.registry)
+        try:
+            yield
+        finally:
+            pinned_registry.reset(token)
+
+    @property
+    def hooks(self):
+        return self.registry.hooks
+
+    @property
+    def tools(self):
+        return self.registry.tools
+
+    @property
+    def forms(self):
+        return self.registry.forms
+
+    @property
+    def options(self):
+        return self.registry.options
 
     # Load hooks, tools and forms of the active plugins into MadHatter
     def sync_hooks_tools_and_forms(self):
-        # emptying tools, hooks and forms
-        self.hooks = {}
-        self.tools = []
-        self.forms = []
-        self.options = {}
-
-        for _, plugin in self.plugins.items():
-            # load hooks, tools and forms from active plugins
-            if plugin.id in self.active_plugins:
-                # cache tools
-                self.tools += plugin.tools
-
-                self.forms += plugin.forms
-                
-                # cache hooks (indexed by hook name)
-                for h in plugin.hooks:
-                    if h.name not in self.hooks.keys():
-                        self.hooks[h.name] = []
-                    self.hooks[h.name].append(h)
-
-                # cache options (indexed by option name)
-                for o in plugin.options:
-                    if o.name not in self.options.keys():
-                        self.options[o.name] = []
-                    self.options[o.name].append(o)
-
-        # sort each hooks list by priority
-        for hook_name in self.hooks.keys():
-            self.hooks[hook_name].sort(key=lambda x: x.priority, reverse=True)
-
-        # sort each options list by priority
-        for option_name in self.options.keys():
-            self.options[option_name].sort(key=lambda x: x.priority, reverse=True)
+        # build the new registry on the side
+        hooks = {}
+        tools = []
+        forms = []
+        options = {}
+
+        with self._registry_lock:
+            for _, plugin in self.plugins.items():
+                # load hooks, tools and forms from active plugins
+                if plugin.id in self.active_plugins:
+                    # cache tools
+                    tools += plugin.tools
+
+                    forms += plugin.forms
+
+                    # cache hooks (indexed by hook name)
+                    for h in plugin.hooks:
+                        if h.name not in hooks.keys():
+                            hooks[h.name] = []
+                        hooks[h.name].append(h)
+
+                    # cache options (indexed by option name)
+                    for o in plugin.options:
+                        if o.name not in options.keys():
+                            options[o.name] = []
+                        options[o.name].append(o)
+
+            # sort each hooks list by priority
+            for hook_name in hooks.keys():
+                hooks[hook_name].sort(key=lambda x: x.priority, reverse=True)
+
+            # sort each options list by priority
+            for option_name in options.keys():
+                options[option_name].sort(key=lambda x: x.priority, reverse=True)
+
+            # publish it
+            self._registry = PluginsRegistry.build(hooks, tools, forms, options)
 
         # notify sync has finished (the Cat will ensure all tools are embedded in vector memory)
-        self.on_finish_plugins_sync_callback()
+        self.on_finish_plugins_sync_callback(sources=None)
+
+    # Add hooks, tools, forms and options of a newly activated plugin,
+    #   in the same order a full sync would give (priority, then plugin order).
+    #   A new registry is built from the current one and then published.
+    def _register_plugin(self, plugin: Plugin):
+        order = {plugin_id: i for i, plugin_id in enumerate(self.plugins)}
+
+        def plugin_order(x):
+            return order.get(x.plugin_id, len(order))
+
+        def priority_order(x):
+            return (-x.priority, plugin_order(x))
+
+        with self._registry_lock:
+            current = self._registry
+
+            tools = list(current.tools)
+            for t in plugin.tools:
+                bisect.insort(tools, t, key=plugin_order)
+
+            forms = list(current.forms)
+            for f in plugin.forms:
+                bisect.insort(forms, f, key=plugin_order)
+
+            hooks = dict(current.hooks)
+            for h in plugin.hooks:
+                chain = list(hooks.get(h.name, []))
+                bisect.insort(chain, h, key=priority_order)
+                hooks[h.name] = chain
+
+            options = dict(current.options)
+            for o in plugin.options:
+                chain = list(options.get(o.name, []))
+                bisect.insort(chain, o, key=priority_order)
+                options[o.name] = chain
+
+            self._registry = PluginsRegistry.build(hooks, tools, forms, options)
+
+    # Remove hooks, tools, forms and options of a plugin being deactivated
+    def _unregister_plugin(self, plugin: Plugin):
+        with self._registry_lock:
+            current = self._registry
+
+            tools = [t for t in current.tools if t.plugin_id != plugin.id]
+            forms = [f for f in current.forms if f.plugin_id != plugin.id]
+
+            hooks = dict(current.hooks)
+            options = dict(current.options)
+            for registry, items in [(hooks, plugin.hooks), (options, plugin.options)]:
+                for name in {i.name for i in items}:
+                    chain = [i for i in registry.get(name, ()) if i.plugin_id != plugin.id]
+                    if chain:
+                        registry[name] = chain
+                    else:
+                        registry.pop(name, None)
+
+            self._registry = PluginsRegistry.build(hooks, tools, forms, options)
 
     # check if plugin exists
     def plugin_exists(self, plugin_id):
@@ -200,8 +351,9 @@ class MadHatter:
         crud.upsert_setting_by_name(new_setting)
 
     # activate / deactivate plugin
-    def toggle_plugin(self, plugin_id):
+    def toggle_plugin(self, plugin_id, install_in_background=True):
         if self.plugin_exists(plugin_id):
+            plugin = self.plugins[plugin_id]
             plugin_is_active = plugin_id in self.active_plugins
 
             # update list of active plugins
@@ -211,20 +363,31 @@ class MadHatter:
                 # Execute hook on plugin deactivation
                 # Deactivation hook must happen before actual deactivation,
                 # otherwise the hook will not be available in _plugin_overrides anymore
-                for hook in self.plugins[plugin_id]._plugin_overrides:
-                    if hook.name == "deactivated":
-                        hook.function(self.plugins[plugin_id])
+                if "deactivated" in plugin._plugin_overrides:
+                    plugin._plugin_overrides["deactivated"].function(plugin)
 
-                # Deactivate the plugin
-                self.plugins[plugin_id].deactivate()
+                # procedures whose triggers have to be removed from memory
+                procedures = {p.name for p in plugin.tools + plugin.forms}
+
+                # Remove hooks, tools and forms from cache, then deactivate the plugin
+                self._unregister_plugin(plugin)
+                plugin.deactivate()
                 # Remove the plugin from the list of active plugins
                 self.active_plugins.remove(plugin_id)
+                # a plugin activated again starts with a clean slate
+                self.circuit_breakers.reset(plugin_id)
             else:
+                # missing requirements are installed in background,
+                #   the plugin is activated when the installation is done
+                missing_requirements = install_in_background and plugin.missing_requirements()
+                if missing_requirements:
+                    return self.install_dependencies(plugin_id, missing_requirements)
+
                 log.warning(f"Toggle plugin {plugin_id}: Activate")
 
                 # Activate the plugin
                 try:
-                    self.plugins[plugin_id].activate()
+                    plugin.activate()
                 except Exception as e:
                     # Couldn't activate the plugin
                     raise e
@@ -232,53 +395,108 @@ class MadHatter:
                 # Execute hook on plugin activation
                 # Activation hook must happen before actual activation,
                 # otherwise the hook will still not be available in _plugin_overrides
-                for hook in self.plugins[plugin_id]._plugin_overrides:
-                    if hook.name == "activated":
-                        hook.function(self.plugins[plugin_id])
+                if "activated" in plugin._plugin_overrides:
+                    plugin._plugin_overrides["activated"].function(plugin)
 
-                # Add the plugin in the list of active plugins
+                # Add the plugin in the list of active plugins, and its hooks, tools and forms to cache
                 self.active_plugins.append(plugin_id)
+                self._register_plugin(plugin)
+
+                # procedures whose triggers have to be embedded
+                procedures = {p.name for p in plugin.tools + plugin.forms}
 
             # update DB with list of active plugins, delete duplicate plugins
             self.save_active_plugins_to_db(list(set(self.active_plugins)))
+            self.index.save()
 
-            # update cache and embeddings
-            self.sync_hooks_tools_and_forms()
+            # update embeddings of the toggled plugin procedures only
+            self.on_finish_plugins_sync_callback(sources=procedures)
 
         else:
             raise Exception("Plugin {plugin_id} not present in plugins folder")
         
+    def install_dependencies(self, plugin_id: str, requirements: List[str]) -> DependencyJob:
+        """Install plugin requirements in background, then activate the plugin.
+
+        If an installation for the plugin is already pending or running, that job is returned.
+        """
+        job = self.dependency_jobs.get(plugin_id)
+        if job and not job.finished:
+            return job
+
+        job = DependencyJob(plugin_id, requirements)
+        self.dependency_jobs[plugin_id] = job
+
+        def activate():
+            # the plugin may have been uninstalled or activated meanwhile
+            if self.plugin_exists(plugin_id) and plugin_id not in self.active_plugins:
+                self.toggle_plugin(plugin_id, install_in_background=False)
+
+        def install_and_activate():
+            try:
+                job.run(activate)
+            except Exception as e:
+                log.error(f"Plugin {plugin_id} not activated: {e}")
+
+        log.info(f"Plugin {plugin_id} will be activated after installing {job.requirements}")
+        job.future = self._dependencies_executor.submit(install_and_activate)
+        return job
+
     def get_option(self, option_name, *args):
+        options = self.registry.options.get(option_name)
         # check if option is supported
-        if option_name not in self.options.keys():
+        if not options:
             raise Exception(f"Option {option_name} not present in any plugin")
 
         # return the most important option
-        return self.options[option_name][0].class_
+        return options[0].class_
 
         raise Exception(f"No matching option found for {option_name} with args {args}")
 
+    def get_option_instance(self, option_name):
+        """Instance of the most important option class, built once per registry snapshot
+        and reused until plugins change. For components with no per-call state, as agents."""
+
+        # instance and class are read from the same registry
+        registry = self.registry
+        instance = registry.instances.get(option_name)
+        if instance is None:
+            options = registry.options.get(option_name)
+            if not options:
+                raise Exception(f"Option {option_name} not present in any plugin")
+            instance = registry.instances.setdefault(option_name, options[0].class_())
+        return instance
+
     # execute requested hook
     def execute_hook(self, hook_name, *args, cat):
+        # hooks are read once, from a consistent registry
+        hooks = self.registry.hooks.get(hook_name)
         # check if hook is supported
-        if hook_name not in self.hooks.keys():
+        if hooks is None:
             raise Exception(f"Hook {hook_name} not present in any plugin")
 
+        start = time.perf_counter()
+        tracer = Tracer()
+
         # Hook has no arguments (aside cat)
         #  no need to pipe
         if len(args) == 0:
-            for hook in self.hooks[hook_name]:
+            for hook in hooks:
+                breaker = self.circuit_breakers.get("hook", hook.plugin_id, hook.name)
+                if breaker.is_open():
+                    log.debug("Bypassing {}::{}, circuit breaker open", hook.plugin_id, hook.name)
+                    continue
                 try:
                     log.debug(
-                        f"Executing {hook.plugin_id}::{hook.name} with priority {hook.priority}"
+                        "Executing {}::{} with priority {}",
+                        hook.plugin_id, hook.name, hook.priority,
                     )
-                    hook.function(cat=cat)
+                    with tracer.span("hook", hook=hook_name, plugin=hook.plugin_id):
+                        self._call_hook(hook, cat=cat)
+                    breaker.record_success()
                 except Exception as e:
-                    log.error(f"Error in plugin {hook.plugin_id}::{hook.name}")
-                    log.error(e)
-                    plugin_obj = self.plugins[hook.plugin_id]
-                    log.warning(plugin_obj.plugin_specific_error_message())
-                    traceback.print_exc()
+                    self._hook_failed(hook, breaker, e)
+            metrics.HOOK_DURATION.observe(time.perf_counter() - start, hook=hook_name)
             return
 
         # Hook with arguments.
@@ -288,46 +506,100 @@ class MadHatter:
         tea_cup = deepcopy(args[0])
 
         # run hooks
-        for hook in self.hooks[hook_name]:
+        for hook in hooks:
+            breaker = self.circuit_breakers.get("hook", hook.plugin_id, hook.name)
+            if breaker.is_open():
+                log.debug("Bypassing {}::{}, circuit breaker open", hook.plugin_id, hook.name)
+                continue
             try:
                 # pass tea_cup to the hooks, along other args
                 # hook has at least one argument, and it will be piped
                 log.debug(
-                    f"Executing {hook.plugin_id}::{hook.name} with priority {hook.priority}"
-                )
-                tea_spoon = hook.function(
-                    deepcopy(tea_cup), *deepcopy(args[1:]), cat=cat
+                    "Executing {}::{} with priority {}",
+                    hook.plugin_id, hook.name, hook.priority,
                 )
+                with tracer.span("hook", hook=hook_name, plugin=hook.plugin_id):
+                    tea_spoon = self._call_hook(
+                        hook, deepcopy(tea_cup), *deepcopy(args[1:]), cat=cat
+                    )
+                breaker.record_success()
                 # log.debug(f"Hook {hook.plugin_id}::{hook.name} returned {tea_spoon}")
                 if tea_spoon is not None:
                     tea_cup = tea_spoon
             except Exception as e:
-                log.error(f"Error in plugin {hook.plugin_id}::{hook.name}")
-                log.error(e)
-                plugin_obj = self.plugins[hook.plugin_id]
-                log.warning(plugin_obj.plugin_specific_error_message())
-                traceback.print_exc()
+                self._hook_failed(hook, breaker, e)
 
         # tea_cup has passed through all hooks. Return final output
+        metrics.HOOK_DURATION.observe(time.perf_counter() - start, hook=hook_name)
         return tea_cup
 
+    def _call_hook(self, hook, *args, cat):
+        timeout = hook.timeout if hook.timeout is not None else get_config().hook_timeout
+        if timeout is None:
+            return hook.function(*args, cat=cat)
+
+        with self._abandoned_hooks_lock:
+            abandoned = self._abandoned_hooks.get(hook.plugin_id, 0)
+        if abandoned >= self.max_abandoned_hooks:
+            # not even tried (e.g. as circuit breaker trial) until those hooks are over
+            raise RuntimeError(f"{abandoned} timed out hooks of {hook.plugin_id} are still running")
+
+        # run in the current context, so spans and the pinned registry are seen by the hook
+        future = self._hooks_executor.submit(
+            contextvars.copy_context().run, hook.function, *args, cat=cat
+        )
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            # a hook still queued never runs, a running one keeps running in background
+            #   and its result will be ignored
+            if not future.cancel():
+                self._hook_abandoned(hook.plugin_id, future)
+            raise TimeoutError(f"Hook did not return in {timeout}s") from None
+
+    def _hook_abandoned(self, plugin_id, future):
+        with self._abandoned_hooks_lock:
+            self._abandoned_hooks[plugin_id] = self._abandoned_hooks.get(plugin_id, 0) + 1
+
+        def finished(_):
+            with self._abandoned_hooks_lock:
+                self._abandoned_hooks[plugin_id] -= 1
+                if not self._abandoned_hooks[plugin_id]:
+                    del self._abandoned_hooks[plugin_id]
+
+        future.add_done_callback(finished)
+
+    def _hook_failed(self, hook, breaker, error):
+        breaker.record_failure(error, timeout=isinstance(error, TIMEOUT_ERRORS))
+        log.error(f"Error in plugin {hook.plugin_id}::{hook.name}")
+        log.error(error)
+        plugin_obj = self.plugins[hook.plugin_id]
+        log.warning(plugin_obj.plugin_specific_error_message())
+        traceback.print_exc()
+
     # get plugin object (used from within a plugin)
     # TODO: should we allow to take directly another plugins' obj?
     # TODO: throw exception if this method is called from outside the plugins folder
     def get_plugin(self):
-        # who's calling?
-        calling_frame = inspect.currentframe().f_back
-        # Get the module associated with the frame
-        module = inspect.getmodule(calling_frame)
-        # Get the absolute and then relative path of the calling module's file
-        abs_path = inspect.getabsfile(module)
-        rel_path = os.path.relpath(abs_path)
-        # Replace the root and get only the current plugin folder
-        plugin_suffix = rel_path.replace(utils.get_plugins_path(), "")
-        # Plugin's folder
-        name = plugin_suffix.split("/")[0]
+        # who's calling? (the plugin of a module is found once, then cached)
+        caller_globals = sys._getframe(1).f_globals
+        module_name = caller_globals.get("__name__")
+        name = self._plugin_of_module.get(module_name)
+        if name is None:
+            # Get the absolute and then relative path of the calling module's file
+            abs_path = os.path.abspath(caller_globals["__file__"])
+            rel_path = os.path.relpath(abs_path)
+            # Replace the root and get only the current plugin folder
+            plugin_suffix = rel_path.replace(utils.get_plugins_path(), "")
+            # Plugin's folder
+            name = plugin_suffix.split("/")[0]
+            self._plugin_of_module[module_name] = name
         return self.plugins[name]
 
     @property
     def procedures(self):
-        return self.tools + self.forms
+        return self.registry.procedures
+
+    @property
+    def procedures_by_name(self):
+        return self.registry.procedures_by_name
@@ -1,17 +1,20 @@
 import os
 import sys
 import json
-import glob
-import tempfile
+import threading
 import traceback
 import importlib
-import subprocess
+from copy import deepcopy
 from typing import Dict, List
 from inspect import getmembers, isclass
 from pydantic import BaseModel, ValidationError
 from packaging.requirements import Requirement
 
-from cat.mad_hatter.decorators import CatTool, CatHook, CatPluginDecorator, CatOption
+from cat.mad_hatter.decorators import CatTool, CatHook, LazyCatHook, CatPluginDecorator, CatOption
+from cat.mad_hatter.plugin_index import PluginIndex
+from cat.mad_hatter.plugin_dependencies import get_installed_packages, install_requirements
+from cat.mad_hatter.static_manifest import scan_plugin
+from cat.env import get_config
 from cat.experimental.form import CatForm
 from cat.utils import to_camel_case
 from cat.log import log
@@ -28,7 +31,7 @@ class PluginSettingsModel(BaseModel):
 
 
 class Plugin:
-    def __init__(self, plugin_path: str):
+    def __init__(self, plugin_path: str, index: PluginIndex | None = None):
         # does folder exist?
         if not os.path.exists(plugin_path) or not os.path.isdir(plugin_path):
             raise Exception(
@@ -38,9 +41,13 @@ class Plugin:
         # where the plugin is on disk
         self._path: str = plugin_path
 
+        # size and mtime of the plugin files, to know if the plugin index entry is still valid
+        self._fingerprint = PluginIndex.fingerprint(self._path)
+
         # search for .py files in folder
-        py_files_path = os.path.join(self._path, "**/*.py")
-        self.py_files = glob.glob(py_files_path, recursive=True)
+        self.py_files = sorted(
+            os.path.join(self._path, f) for f in self._fingerprint if f.endswith(".py")
+        )
 
         if len(self.py_files) == 0:
             raise Exception(
@@ -50,8 +57,18 @@ class Plugin:
         # plugin id is just the folder name
         self._id: str = os.path.basename(os.path.normpath(plugin_path))
 
+        # index entry of an unchanged plugin, holding what was found at the last startup
+        self._index = index
+        index_entry = index.get(self._id, self._fingerprint) if index else None
+        self._index_entry = index_entry or {}
+
         # plugin manifest (name, decription, thumb, etc.)
-        self._manifest = self._load_manifest()
+        if index_entry:
+            self._manifest = index_entry["manifest"]
+        else:
+            self._manifest = self._load_manifest()
+            if index:
+                index.update(self._id, fingerprint=self._fingerprint, manifest=self._manifest)
 
         # list of tools, forms and hooks contained in the plugin.
         #   The MadHatter will cache them for easier access,
@@ -61,8 +78,13 @@ class Plugin:
         self._forms: List[CatForm] = []  # list of plugin forms
         self._options: List[CatOption] = [] # list of plugin options
 
-        # list of @plugin decorated functions overriding default plugin behaviour
-        self._plugin_overrides = []  # TODO: make this a dictionary indexed by func name, for faster access
+        # @plugin decorated functions overriding default plugin behaviour, indexed by function name
+        self._plugin_overrides: Dict[str, CatPluginDecorator] = {}
+
+        # settings.json content, valid as long as the file (mtime, size) does not change
+        self._settings_cache = None
+        self._settings_stat = None
+        self._settings_lock = threading.Lock()
 
         # plugin starts deactivated
         self._active = False
@@ -99,21 +121,20 @@ class Plugin:
 
         self._hooks = []
         self._tools = []
-        self._plugin_overrides = []
+        self._plugin_overrides = {}
         self._options = []
         self._active = False
 
     # get plugin settings JSON schema
     def settings_schema(self):
         # is "settings_schema" hook defined in the plugin?
-        for h in self._plugin_overrides:
-            if h.name == "settings_schema":
-                return h.function()
-            else:
-                # if the "settings_schema" is not defined but
-                # "settings_model" is it get the schema from the model
-                if h.name == "settings_model":
-                    return h.function().model_json_schema()
+        if "settings_schema" in self._plugin_overrides:
+            return self._plugin_overrides["settings_schema"].function()
+
+        # if the "settings_schema" is not defined but
+        # "settings_model" is it get the schema from the model
+        if "settings_model" in self._plugin_overrides:
+            return self._plugin_overrides["settings_model"].function().model_json_schema()
 
         # default schema (empty)
         return PluginSettingsModel.model_json_schema()
@@ -121,9 +142,8 @@ class Plugin:
     # get plugin settings Pydantic model
     def settings_model(self):
         # is "settings_model" hook defined in the plugin?
-        for h in self._plugin_overrides:
-            if h.name == "settings_model":
-                return h.function()
+        if "settings_model" in self._plugin_overrides:
+            return self._plugin_overrides["settings_model"].function()
 
         # default schema (empty)
         return PluginSettingsModel
@@ -131,9 +151,8 @@ class Plugin:
     # load plugin settings
     def load_settings(self):
         # is "settings_load" hook defined in the plugin?
-        for h in self._plugin_overrides:
-            if h.name == "load_settings":
-                return h.function()
+        if "load_settings" in self._plugin_overrides:
+            return self._plugin_overrides["load_settings"].function()
 
         # by default, plugin settings are saved inside the plugin folder
         #   in a JSON file called settings.json
@@ -146,21 +165,34 @@ class Plugin:
         # load settings.json if exists
         if os.path.isfile(settings_file_path):
             try:
-                with open(settings_file_path, "r") as json_file:
-                    settings = json.load(json_file)
-                    return settings
-
+                return deepcopy(self._read_settings_file(settings_file_path))
             except Exception as e:
                 log.error(f"Unable to load plugin {self._id} settings: {e}")
                 log.warning(self.plugin_specific_error_message())
                 raise e
 
+    # settings.json content, parsed again only if the file changed
+    def _read_settings_file(self, settings_file_path):
+        stat = os.stat(settings_file_path)
+        file_stat = (stat.st_mtime_ns, stat.st_size)
+
+        with self._settings_lock:
+            if self._settings_stat == file_stat:
+                return self._settings_cache
+
+        with open(settings_file_path, "r") as json_file:
+            settings = json.load(json_file)
+
+        with self._settings_lock:
+            self._settings_cache = settings
+            self._settings_stat = file_stat
+        return settings
+
     # save plugin settings
     def save_settings(self, settings: Dict):
         # is "settings_save" hook defined in the plugin?
-        for h in self._plugin_overrides:
-            if h.name == "save_settings":
-                return h.function(settings)
+        if "save_settings" in self._plugin_overrides:
+            return self._plugin_overrides["save_settings"].function(settings)
 
         # by default, plugin settings are saved inside the plugin folder
         #   in a JSON file called settings.json
@@ -172,10 +204,18 @@ class Plugin:
         # overwrite settings over old ones
         updated_settings = {**old_settings, **settings}
 
-        # write settings.json in plugin folder
+        # write settings.json in plugin folder,
+        #   atomically so readers never find it half written
         try:
-            with open(settings_file_path, "w") as json_file:
+            tmp_file_path = f"{settings_file_path}.tmp"
+            with open(tmp_file_path, "w") as json_file:
                 json.dump(updated_settings, json_file, indent=4)
+            os.replace(tmp_file_path, settings_file_path)
+
+            stat = os.stat(settings_file_path)
+            with self._settings_lock:
+                self._settings_cache = deepcopy(updated_settings)
+                self._settings_stat = (stat.st_mtime_ns, stat.st_size)
             return updated_settings
         except Exception as e:
             log.error(f"Unable to save plugin {self._id} settings: {e}")
@@ -245,52 +285,45 @@ class Plugin:
 
         return meta
 
-    def _install_requirements(self):
+    def missing_requirements(self) -> List[str]:
+        """Lines of requirements.txt whose package is not installed."""
         req_file = os.path.join(self.path, "requirements.txt")
         filtered_requirements = []
 
-        if os.path.exists(req_file):
-            installed_packages = {x.name for x in importlib.metadata.distributions()}
-
-            try:
-                with open(req_file, "r") as read_file:
-                    requirements = read_file.readlines()
+        if not os.path.exists(req_file):
+            return []
 
-                for req in requirements:
-                    log.info(f"Installing requirements for: {self.id}")
+        # always checked against the current environment (installed packages are read
+        #   once per process): the plugin index can outlive the environment, e.g. in a
+        #   recreated container with the same mounted folder
+        installed_packages = get_installed_packages()
 
-                    # get package name
-                    package_name = Requirement(req).name
-
-                    # check if package is installed
-                    if package_name not in installed_packages:
-                        filtered_requirements.append(req)
-                    else:
-                        log.debug(f"{package_name} is alredy installed")
+        try:
+            with open(req_file, "r") as read_file:
+                requirements = read_file.readlines()
 
-            except Exception as e:
-                log.error(f"Error during requirements check: {e}, for {self.id}")
+            for req in requirements:
+                # get package name
+                package_name = Requirement(req).name
 
-            if len(filtered_requirements) == 0:
-                return
+                # check if package is installed
+                if package_name not in installed_packages:
+                    filtered_requirements.append(req)
+                else:
+                    log.debug(f"{package_name} is alredy installed")
 
-            with tempfile.NamedTemporaryFile(mode="w") as tmp:
-                tmp.write("".join(filtered_requirements))
-                # If flush is not performed, when pip reads the file it is empty
-                tmp.flush()
+        except Exception as e:
+            log.error(f"Error during requirements check: {e}, for {self.id}")
 
-                try:
-                    subprocess.run(
-                        ["pip", "install", "--no-cache-dir", "-r", tmp.name], check=True
-                    )
-                except subprocess.CalledProcessError as e:
-                    log.error(f"Error during installing {self.id} requirements: {e}")
+        return filtered_requirements
 
-                    # Uninstall the previously installed packages
-                    log.info(f"Uninstalling requirements for: {self.id}")
-                    subprocess.run(["pip", "uninstall", "-r", tmp.name], check=True)
+    def _install_requirements(self):
+        filtered_requirements = self.missing_requirements()
+        if len(filtered_requirements) == 0:
+            return
 
-                    raise Exception(f"Error during {self.id} requirements installation")
+        log.info(f"Installing requirements for: {self.id}")
+        install_requirements(self.id, filtered_requirements)
 
     # lists of hooks and tools
     def _load_decorated_functions(self):
@@ -300,22 +333,42 @@ class Plugin:
         plugin_overrides = []
         options = []
 
+        # with lazy import, modules only defining hooks are imported when one of their hooks runs
+        static_manifest = {}
+        if get_config().plugins_lazy_import:
+            static_manifest = self._static_manifest()
+
         for py_file in self.py_files:
             py_filename = py_file.replace(".py", "").replace("/", ".")
 
+            static_module = static_manifest.get(os.path.relpath(py_file, self._path))
+            if static_module is not None:
+                log.debug(f"Lazy import module {py_filename}")
+                hooks += [
+                    (h["symbol"], LazyCatHook(h["name"], h["priority"], py_filename, h["symbol"]))
+                    for h in static_module["hooks"]
+                ]
+                continue
+
             log.debug(f"Import module {py_filename}")
 
             # save a reference to decorated functions
             try:
                 plugin_module = importlib.import_module(py_filename)
 
-                hooks += getmembers(plugin_module, self._is_cat_hook)
-                tools += getmembers(plugin_module, self._is_cat_tool)
-                forms += getmembers(plugin_module, self._is_cat_form)
-                plugin_overrides += getmembers(
-                    plugin_module, self._is_cat_plugin_override
-                )
-                options += getmembers(plugin_module, self._is_cat_option)
+                # a single pass over the module members
+                for member in getmembers(plugin_module):
+                    obj = member[1]
+                    if self._is_cat_hook(obj):
+                        hooks.append(member)
+                    elif self._is_cat_tool(obj):
+                        tools.append(member)
+                    elif self._is_cat_form(obj):
+                        forms.append(member)
+                    elif self._is_cat_plugin_override(obj):
+                        plugin_overrides.append(member)
+                    elif self._is_cat_option(obj):
+                        options.append(member)
             except Exception as e:
                 log.error(
                     f"Error in {py_filename}: {str(e)}. Unable to load plugin {self._id}"
@@ -327,11 +380,25 @@ class Plugin:
         self._hooks = list(map(self._clean_hook, hooks))
         self._tools = list(map(self._clean_tool, tools))
         self._forms = list(map(self._clean_form, forms))
-        self._plugin_overrides = list(
-            map(self._clean_plugin_override, plugin_overrides)
-        )
+        self._plugin_overrides = {}
+        for override in map(self._clean_plugin_override, plugin_overrides):
+            # the first one found wins, as when overrides were looked up in a list
+            self._plugin_overrides.setdefault(override.name, override)
         self._options = list(map(self._clean_option, options))
 
+    # hooks of each module, found reading the source and kept in the plugin index
+    def _static_manifest(self):
+        static_manifest = self._index_entry.get("static_manifest")
+        if static_manifest is None:
+            static_manifest = scan_plugin(self._path, self.py_files)
+            self._update_index(static_manifest=static_manifest)
+        return static_manifest
+
+    def _update_index(self, **fields):
+        if self._index:
+            self._index.update(self._id, **fields)
+            self._index_entry.update(fields)
+
     def plugin_specific_error_message(self):
         name = self.manifest.get("name")
         url = self.manifest.get("plugin_url")
@@ -408,6 +475,10 @@ class Plugin:
     def manifest(self):
         return self._manifest
 
+    @property
+    def fingerprint(self):
+        return self._fingerprint
+
     @property
     def active(self):
         return self._active
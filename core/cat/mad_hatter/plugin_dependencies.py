@@ -0,0 +1,122 @@
+import time
+import tempfile
+import subprocess
+import importlib.metadata
+from functools import lru_cache
+from typing import Callable, Dict, List
+
+from cat.env import get_config
+from cat.log import log
+
+
+# names of the installed distributions, shared by all plugins requirements checks
+#   (cleared after pip installs something)
+@lru_cache(maxsize=1)
+def get_installed_packages():
+    return {x.name for x in importlib.metadata.distributions()}
+
+
+def pip_install_command(requirements_file: str) -> List[str]:
+    """pip command installing a requirements file.
+
+    `CCAT_PIP_CACHE_DIR` keeps downloaded and built wheels across installs and restarts,
+    `CCAT_PIP_FIND_LINKS` is a local folder of wheels to install from,
+    with `CCAT_PIP_OFFLINE` only that folder is used (no package index).
+    """
+    config = get_config()
+    command = ["pip", "install"]
+
+    if config.pip_cache_dir:
+        command += ["--cache-dir", config.pip_cache_dir]
+    else:
+        command += ["--no-cache-dir"]
+
+    if config.pip_find_links:
+        command += ["--find-links", config.pip_find_links]
+    if config.pip_offline:
+        command += ["--no-index"]
+
+    return command + ["-r", requirements_file]
+
+
+def install_requirements(plugin_id: str, requirements: List[str]):
+    """Install requirements with pip, blocking. Raises if the installation fails."""
+    with tempfile.NamedTemporaryFile(mode="w") as tmp:
+        tmp.write("".join(r if r.endswith("\n") else f"{r}\n" for r in requirements))
+        # If flush is not performed, when pip reads the file it is empty
+        tmp.flush()
+
+        try:
+            subprocess.run(pip_install_command(tmp.name), check=True)
+        except subprocess.CalledProcessError as e:
+            log.error(f"Error during installing {plugin_id} requirements: {e}")
+
+            # Uninstall the previously installed packages
+            log.info(f"Uninstalling requirements for: {plugin_id}")
+            subprocess.run(["pip", "uninstall", "-y", "-r", tmp.name], check=True)
+
+            raise Exception(f"Error during {plugin_id} requirements installation")
+        finally:
+            get_installed_packages.cache_clear()
+
+
+class DependencyJob:
+    """Background installation of the requirements of a plugin, followed by its activation.
+
+    Attributes
+    ----------
+    plugin_id : str
+        Plugin the requirements belong to.
+    requirements : List[str]
+        Requirements being installed.
+    status : str
+        One of `pending`, `running` (installing), `activating`, `done` (installed and activated), `failed`.
+    error : str | None
+        Why the installation or the activation failed.
+    """
+
+    def __init__(self, plugin_id: str, requirements: List[str]):
+        self.plugin_id = plugin_id
+        self.requirements = [r.strip() for r in requirements]
+        self.status = "pending"
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def run(self, activate: Callable[[], None] | None = None):
+        """Install the requirements, then call `activate`. Raises if any of them fails."""
+        self.status = "running"
+        self.started_at = time.time()
+        log.info(f"Installing requirements for {self.plugin_id}: {self.requirements}")
+        try:
+            install_requirements(self.plugin_id, self.requirements)
+            if activate is not None:
+                self.status = "activating"
+                try:
+                    activate()
+                except Exception as e:
+                    raise Exception(f"Activation failed: {e}") from e
+            self.status = "done"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            raise
+        finally:
+            self.finished_at = time.time()
+
+    def to_dict(self) -> Dict:
+        return {
+            "plugin_id": self.plugin_id,
+            "requirements": self.requirements,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
@@ -0,0 +1,103 @@
+import os
+import json
+import threading
+from typing import Dict, List
+
+from cat.env import get_config
+from cat.log import log
+
+
+# files not taken into account in a plugin fingerprint
+#   (settings are written by the plugin itself at runtime)
+IGNORED_FILES = {"settings.json"}
+
+
+class PluginIndex:
+    """On disk index of the plugins found at startup.
+
+    For each plugin it keeps the fingerprint of the plugin folder (size and mtime of each file),
+    the parsed manifest and, with `CCAT_PLUGINS_LAZY_IMPORT`, the static manifest of its modules.
+    Entries are valid as long as the fingerprint does not change, so unchanged plugins skip
+    reading `plugin.json` and scanning their sources at the next startup.
+    Plugin modules still have to be imported (unless lazy import applies), that is where most
+    of the startup time goes. Nothing depending on the Python environment
+    (e.g. installed requirements) is kept here, as the index can outlive it.
+
+    The index file is set by `CCAT_PLUGIN_INDEX_FILE`.
+    """
+
+    def __init__(self):
+        self.file_name = self.get_file_name()
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if os.path.isfile(self.file_name):
+            try:
+                with open(self.file_name, "r") as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                log.warning(f"Could not read plugin index {self.file_name}, rebuilding it: {e}")
+
+    def get_file_name(self) -> str:
+        return get_config().plugin_index_file
+
+    @staticmethod
+    def fingerprint(plugin_path: str) -> Dict[str, List[int]]:
+        """Size and mtime of each file in the plugin folder, keyed by relative path."""
+        fingerprint = {}
+        folders = [""]
+        while folders:
+            folder = folders.pop()
+            with os.scandir(os.path.join(plugin_path, folder)) as entries:
+                for entry in entries:
+                    # skip hidden files and folders, as glob does, and bytecode
+                    if entry.name.startswith(".") or entry.name == "__pycache__":
+                        continue
+                    relative_path = os.path.join(folder, entry.name)
+                    if entry.is_dir():
+                        folders.append(relative_path)
+                    elif entry.name not in IGNORED_FILES:
+                        stat = entry.stat()
+                        fingerprint[relative_path] = [stat.st_size, stat.st_mtime_ns]
+        return fingerprint
+
+    def get(self, plugin_id: str, fingerprint: Dict) -> Dict | None:
+        """Index entry of a plugin, or None if missing or the plugin changed on disk."""
+        with self._lock:
+            entry = self._entries.get(plugin_id)
+            if entry is None or entry.get("fingerprint") != fingerprint:
+                return None
+            return dict(entry)
+
+    def update(self, plugin_id: str, **fields):
+        """Set fields of a plugin entry, a new `fingerprint` resets the entry."""
+        with self._lock:
+            entry = self._entries.get(plugin_id, {})
+            if "fingerprint" in fields and entry.get("fingerprint") != fields["fingerprint"]:
+                entry = {}
+            entry.update(fields)
+            self._entries[plugin_id] = entry
+            self._dirty = True
+
+    def remove(self, plugin_id: str):
+        with self._lock:
+            if self._entries.pop(plugin_id, None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Write the index if it changed, atomically so a crash never leaves it half written."""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = json.dumps(self._entries, indent=4)
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(self.file_name) or ".", exist_ok=True)
+            tmp_file_name = f"{self.file_name}.tmp"
+            with open(tmp_file_name, "w") as f:
+                f.write(entries)
+            os.replace(tmp_file_name, self.file_name)
+        except Exception as e:
+            log.warning(f"Could not save plugin index {self.file_name}: {e}")
@@ -0,0 +1,73 @@
+from types import MappingProxyType
+from dataclasses import dataclass, field
+from contextvars import ContextVar
+from typing import Any, Dict, List, Mapping, Tuple
+
+from cat.mad_hatter.decorators.hook import CatHook
+from cat.mad_hatter.decorators.tool import CatTool
+from cat.mad_hatter.decorators.options import CatOption
+from cat.experimental.form import CatForm
+
+
+@dataclass(frozen=True)
+class PluginsRegistry:
+    """Immutable snapshot of the hooks, tools, forms and options of the active plugins.
+
+    The MadHatter builds a new snapshot on the side at each plugins change and publishes it
+    by swapping a single reference, so readers never see a partial registry and need no lock.
+
+    Attributes
+    ----------
+    hooks : Mapping[str, Tuple[CatHook]]
+        Hooks by name, sorted by priority.
+    tools : Tuple[CatTool]
+        Tools, in plugins order.
+    forms : Tuple[CatForm]
+        Forms, in plugins order.
+    options : Mapping[str, Tuple[CatOption]]
+        Options by name, sorted by priority.
+    procedures : Tuple[CatTool | CatForm]
+        Tools and then forms.
+    procedures_by_name : Mapping[str, CatTool | CatForm]
+        Procedures by name, in procedures order.
+    instances : Dict[str, Any]
+        Instances of option classes built for this snapshot, see `MadHatter.get_option_instance`.
+    """
+
+    hooks: Mapping[str, Tuple[CatHook, ...]] = field(default_factory=lambda: MappingProxyType({}))
+    tools: Tuple[CatTool, ...] = ()
+    forms: Tuple[CatForm, ...] = ()
+    options: Mapping[str, Tuple[CatOption, ...]] = field(default_factory=lambda: MappingProxyType({}))
+    procedures: Tuple = field(init=False)
+    procedures_by_name: Mapping[str, CatTool | CatForm] = field(init=False)
+    instances: Dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    def __post_init__(self):
+        # procedures and their name index are computed once per snapshot, not at each turn
+        procedures = self.tools + self.forms
+        procedures_by_name = {}
+        for procedure in procedures:
+            # with duplicate names the last procedure wins
+            procedures_by_name[procedure.name] = procedure
+        object.__setattr__(self, "procedures", procedures)
+        object.__setattr__(self, "procedures_by_name", MappingProxyType(procedures_by_name))
+
+    @classmethod
+    def build(
+        cls,
+        hooks: Dict[str, List[CatHook]],
+        tools: List[CatTool],
+        forms: List[CatForm],
+        options: Dict[str, List[CatOption]],
+    ) -> "PluginsRegistry":
+        """Freeze lists and dictionaries into a snapshot."""
+        return cls(
+            hooks=MappingProxyType({name: tuple(chain) for name, chain in hooks.items()}),
+            tools=tuple(tools),
+            forms=tuple(forms),
+            options=MappingProxyType({name: tuple(chain) for name, chain in options.items()}),
+        )
+
+
+# snapshot pinned for the current conversation turn
+pinned_registry: ContextVar[PluginsRegistry | None] = ContextVar("cat_pinned_registry", default=None)
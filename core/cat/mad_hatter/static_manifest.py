@@ -0,0 +1,116 @@
+import os
+import ast
+from typing import Dict, List
+
+
+# decorators making plugin objects, by the name they are defined with
+DECORATORS = {"hook", "tool", "plugin", "option", "form"}
+
+# modules a @hook can be imported from
+HOOK_MODULES = {"cat.mad_hatter.decorators", "cat.mad_hatter.decorators.hook"}
+
+
+def _imported_decorators(tree: ast.Module) -> Dict[str, str] | None:
+    """Local name -> module of the decorators imported by a module,
+    None if they cannot be told statically (aliased or star imports)."""
+    imported = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ImportFrom):
+            continue
+        for alias in node.names:
+            if alias.name == "*":
+                return None
+            if alias.name in DECORATORS or (alias.asname or alias.name) in DECORATORS:
+                # e.g. `import tool as t`, or something else imported as `hook`
+                if alias.asname not in (None, alias.name):
+                    return None
+                imported[alias.name] = node.module
+    return imported
+
+
+def _static_hook(function: ast.FunctionDef, decorator: ast.expr) -> Dict | None:
+    """Name and priority of a @hook, if they are literals."""
+    name = function.name
+    priority = 1
+    if isinstance(decorator, ast.Call):
+        if len(decorator.args) > 1:
+            return None
+        for arg in decorator.args:
+            if not isinstance(arg, ast.Constant) or not isinstance(arg.value, str):
+                return None
+            name = arg.value
+        for keyword in decorator.keywords:
+            if keyword.arg != "priority" or not isinstance(keyword.value, ast.Constant):
+                return None
+            priority = keyword.value.value
+    return {"name": name, "priority": priority, "symbol": function.name}
+
+
+def scan_module(source: str) -> Dict[str, List[Dict]] | None:
+    """Find the hooks of a plugin module without importing it.
+
+    Parameters
+    ----------
+    source : str
+        Python source of the module.
+
+    Returns
+    -------
+    Dict | None
+        `{"hooks": [{"name", "priority", "symbol"}, ...]}`, or None if the module must be imported
+        to know what it contains: it defines tools, forms, options or plugin overrides,
+        it defines no hook at all, or it uses decorators in a way that cannot be read statically
+        (aliased imports, decorators not imported from the Cat, calls, nested definitions).
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    imported = _imported_decorators(tree)
+    if imported is None:
+        return None
+
+    hooks = []
+    for node in tree.body:
+        # decorators used anywhere else at module level, e.g. `my_hook = hook(function)`
+        #   or definitions under `if` / `try`
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            for child in ast.walk(node):
+                if isinstance(child, ast.Name) and child.id in DECORATORS:
+                    return None
+                if isinstance(child, ast.Attribute) and child.attr in DECORATORS:
+                    return None
+            continue
+
+        for decorator in node.decorator_list:
+            # only `@hook` and `@hook(...)`, with `hook` imported from the Cat decorators
+            target = decorator.func if isinstance(decorator, ast.Call) else decorator
+            if not isinstance(target, ast.Name) or target.id != "hook":
+                return None
+            if imported.get("hook") not in HOOK_MODULES or not isinstance(node, ast.FunctionDef):
+                return None
+            static_hook = _static_hook(node, decorator)
+            if static_hook is None:
+                return None
+            hooks.append(static_hook)
+
+    # nothing recognised, the module may still make plugin objects in other ways
+    if not hooks:
+        return None
+
+    return {"hooks": hooks}
+
+
+def scan_plugin(plugin_path: str, py_files: List[str]) -> Dict[str, Dict | None]:
+    """Static manifest of each python file of a plugin, keyed by path relative to the plugin folder.
+    See `scan_module`."""
+    manifest = {}
+    for py_file in py_files:
+        relative_path = os.path.relpath(py_file, plugin_path)
+        try:
+            with open(py_file, "r") as f:
+                manifest[relative_path] = scan_module(f.read())
+        except OSError:
+            manifest[relative_path] = None
+    return manifest
@@ -0,0 +1,121 @@
+import asyncio
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict
+
+try:
+    import resource
+except ImportError:  # not available on Windows, memory limits are not enforced
+    resource = None
+
+from cat.env import get_config
+from cat.log import log
+from cat.utils import singleton_meta
+
+
+# how a sync tool can be run
+TOOL_EXECUTIONS = ("inline", "thread", "process")
+
+
+def _run_tool(module_name: str, symbol: str, tool_input, memory_limit_mb: int | None):
+    """Run a tool in a worker process.
+
+    The tool function is found again by its module and name in the worker,
+    where the plugin module gets imported the first time one of its tools runs.
+    """
+
+    cat_tool = getattr(importlib.import_module(module_name), symbol)
+    func = getattr(cat_tool, "func", cat_tool)
+
+    if memory_limit_mb is None or resource is None:
+        return func(tool_input, cat=None)
+
+    # cap the address space of the worker for this call only
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = memory_limit_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        return func(tool_input, cat=None)
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+class ToolProcessPool(metaclass=singleton_meta):
+    """Process pool shared by the tools declared with `@tool(execution="process")`.
+
+    Workers are started with `spawn`, `CCAT_TOOL_PROCESS_POOL_SIZE` at most.
+    When a call times out its worker is still busy with it, so the pool is retired:
+    new calls go to a new pool, and the workers of the old one are terminated as soon as
+    the other calls running on it are over.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        # calls still awaited, by pool
+        self._pending: Dict[ProcessPoolExecutor, int] = {}
+
+    def _acquire(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=get_config().tool_process_pool_size,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._pending[self._executor] = 0
+            self._pending[self._executor] += 1
+            return self._executor
+
+    def _release(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            self._pending[executor] -= 1
+            if executor is self._executor or self._pending[executor] > 0:
+                return
+            del self._pending[executor]
+        self._terminate(executor)
+
+    def _retire(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+
+    @staticmethod
+    def _terminate(executor: ProcessPoolExecutor):
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    async def run(self, cat_tool, tool_input, timeout: float | None = None, memory_limit_mb: int | None = None):
+        """Run a sync tool in the pool, without its `cat` argument (set to None)."""
+
+        executor = self._acquire()
+        try:
+            future = executor.submit(
+                _run_tool, cat_tool.func.__module__, cat_tool.func.__name__, tool_input, memory_limit_mb
+            )
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"Tool {cat_tool.name} timed out after {timeout}s, its worker process will be terminated")
+            self._retire(executor)
+            raise
+        except BrokenProcessPool:
+            # a worker died (e.g. killed by the OS), next calls get a new pool
+            log.error(f"Worker process of tool {cat_tool.name} died")
+            self._retire(executor)
+            raise
+        finally:
+            self._release(executor)
+
+    def shutdown(self):
+        with self._lock:
+            executors = list(self._pending)
+            self._executor = None
+            self._pending = {}
+        for executor in executors:
+            self._terminate(executor)
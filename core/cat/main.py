@@ -10,9 +10,13 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 
 from cat.log import log
+from cat import metrics
 from cat.env import get_env, fix_legacy_env_variables
+from cat.utils import get_cat_version
 from cat.routes import (
     base,
+    health,
+    metrics as metrics_route,
     auth,
     users,
     settings,
@@ -27,6 +31,7 @@ from cat.routes import (
 from cat.routes.static import admin, static
 from cat.routes.openapi import get_openapi_configuration_function
 from cat.looking_glass.cheshire_cat import CheshireCat
+from cat.mad_hatter.tool_executor import ToolProcessPool
 
 
 # TODO: take away in v2
@@ -44,8 +49,16 @@ async def lifespan(app: FastAPI):
     # - Starlette allows this: https://www.starlette.io/applications/#storing-state-on-the-app-instance
     app.state.ccat = CheshireCat()
 
+    # read the version now, so health probes never go to disk
+    get_cat_version()
+
+    # readiness checks run in background
+    app.state.readiness = health.ReadinessProbe(app.state.ccat)
+    app.state.readiness.start()
+
     # Dict of pseudo-sessions (key is the user_id)
     app.state.strays = {}
+    metrics.ACTIVE_STRAYS.set_function(lambda: len(app.state.strays))
 
     # set a reference to asyncio event loop
     app.state.event_loop = asyncio.get_running_loop()
@@ -55,6 +68,11 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    await app.state.readiness.stop()
+
+    # stop worker processes of tools, if any
+    ToolProcessPool().shutdown()
+
 
 def custom_generate_unique_id(route: APIRoute):
     return f"{route.name}"
@@ -80,6 +98,8 @@ cheshire_cat_api.add_middleware(
 
 # Add routers to the middleware stack.
 cheshire_cat_api.include_router(base.router, tags=["Status"])
+cheshire_cat_api.include_router(health.router, tags=["Status"])
+cheshire_cat_api.include_router(metrics_route.router, tags=["Status"])
 cheshire_cat_api.include_router(auth.router, tags=["User Auth"], prefix="/auth")
 cheshire_cat_api.include_router(users.router, tags=["Users"], prefix="/users")
 cheshire_cat_api.include_router(settings.router, tags=["Settings"], prefix="/settings")
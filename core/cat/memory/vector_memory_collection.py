@@ -25,6 +25,7 @@ from langchain.docstore.document import Document
 
 from cat.log import log
 from cat.env import get_env
+from cat.tracing import Tracer
 
 
 class VectorMemoryCollection:
@@ -181,6 +182,10 @@ class VectorMemoryCollection:
 
         # TODO: may be adapted to upload batches of points as langchain does.
         # Not necessary now as the bottleneck is the embedder
+        with Tracer().span("vector_upsert", collection=self.collection_name):
+            return self._add_point(content, vector, metadata, id, **kwargs)
+
+    def _add_point(self, content, vector, metadata, id, **kwargs):
         point = PointStruct(
             id=id or uuid.uuid4().hex,
             payload={
@@ -259,10 +264,11 @@ class VectorMemoryCollection:
         return langchain_documents_from_points
 
     # retrieve all the points in the collection
-    def get_all_points(self):
-        # retrieving the points
+    def get_all_points(self, metadata: dict = None):
+        # retrieving the points (optionally only those matching metadata)
         all_points, _ = self.client.scroll(
             collection_name=self.collection_name,
+            scroll_filter=self._qdrant_filter_from_dict(metadata),
             with_vectors=True,
             limit=10000,  # yeah, good for now dear :*
         )
@@ -0,0 +1,212 @@
+"""Metrics of the conversation pipeline, exported in Prometheus text format by `/metrics`."""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from cat.utils import singleton_meta
+
+
+# default histogram buckets, in seconds
+DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+
+def _format_labels(labelnames: Tuple[str], labelvalues: Tuple[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    """Base class for metrics, holding one value per combination of label values."""
+
+    type = None
+
+    def __init__(self, name: str, description: str, labelnames: List[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str], object] = {}
+        self._lock = threading.Lock()
+        MetricsRegistry().register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+        lines += self.samples()
+        return "\n".join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in values]
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name, description, labelnames=()):
+        super().__init__(name, description, labelnames)
+        self._functions: Dict[Tuple[str], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        """Read the value from `function` at each export."""
+        with self._lock:
+            self._functions[self._key(labels)] = function
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = function()
+            except Exception:
+                pass
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in values.items()]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, description, labelnames=(), buckets: List[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = sorted(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            if key not in self._values:
+                # counts per bucket (non cumulative), sum, count
+                self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts, _, _ = state = self._values[key]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block of code."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get_count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            values = [(k, list(counts), total, count) for k, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry(metaclass=singleton_meta):
+    """All the metrics of the process."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric):
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Metrics in Prometheus text exposition format."""
+        return "\n".join(m.render() for m in self.metrics.values()) + "\n"
+
+
+# conversation
+TURNS = Counter("cat_turns_total", "Conversation turns, by status", ["status"])
+TURN_DURATION = Histogram("cat_turn_duration_seconds", "Duration of a conversation turn")
+STAGE_DURATION = Histogram(
+    "cat_stage_duration_seconds",
+    "Duration of the stages of a conversation turn (embed, recall, procedures_agent, memory_agent, episodic_store)",
+    ["stage"],
+)
+RECALL_DURATION = Histogram(
+    "cat_recall_duration_seconds", "Duration of the recall from a memory collection", ["collection"]
+)
+HOOK_DURATION = Histogram("cat_hook_duration_seconds", "Duration of hooks execution", ["hook"])
+
+# connections
+ACTIVE_STRAYS = Gauge("cat_active_strays", "Users with an active session")
+ACTIVE_WEBSOCKETS = Gauge("cat_active_websockets", "Open websocket connections")
+QUEUE_DEPTH = Gauge("cat_queue_depth", "Pending jobs in background queues", ["queue"])
+
+# models
+LLM_TOKENS = Counter("cat_llm_tokens_total", "Tokens sent to and received from LLMs", ["direction"])
+EMBEDDER_TOKENS = Counter("cat_embedder_tokens_total", "Tokens sent to embedders")
+
+# caches
+CACHE_REQUESTS = Counter("cat_cache_requests_total", "Cache lookups, by cache and result", ["cache", "result"])
+
+# rabbit hole
+INGESTED_DOCUMENTS = Counter("cat_rabbithole_documents_total", "Documents (files, urls, texts) ingested")
+INGESTED_CHUNKS = Counter("cat_rabbithole_chunks_total", "Chunks stored in declarative memory")
+INGESTION_DURATION = Histogram(
+    "cat_rabbithole_ingestion_duration_seconds",
+    "Duration of documents ingestion",
+    buckets=[0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600],
+)
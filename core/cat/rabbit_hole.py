@@ -20,6 +20,7 @@ from langchain.document_loaders.blob_loaders.schema import Blob
 
 from cat.utils import singleton, singleton_meta
 from cat.log import log
+from cat import metrics
 
 
 # @singleton
@@ -342,6 +343,7 @@ class RabbitHole(metaclass=singleton_meta):
         """
 
         log.info(f"Preparing to memorize {len(docs)} vectors")
+        ingestion_start = time.perf_counter()
 
         # hook the docs before they are stored in the vector memory
         docs = stray.mad_hatter.execute_hook(
@@ -387,6 +389,10 @@ class RabbitHole(metaclass=singleton_meta):
             # wait a little to avoid APIs rate limit errors
             time.sleep(0.05)
 
+        metrics.INGESTED_DOCUMENTS.inc()
+        metrics.INGESTED_CHUNKS.inc(len(stored_points))
+        metrics.INGESTION_DURATION.observe(time.perf_counter() - ingestion_start)
+
         # hook the points after they are stored in the vector memory
         stray.mad_hatter.execute_hook(
             "after_rabbithole_stored_documents", source, stored_points, cat=stray
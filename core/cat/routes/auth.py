@@ -70,7 +70,7 @@ async def auth_index(
     template_context = {
         "referer": referer,
         "error_message": error_message,
-        "show_default_passwords": len(crud.get_users().keys()) == 2,
+        "show_default_passwords": crud.count_users() == 2,
     }
 
     response = templates.TemplateResponse(
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, BackgroundTasks
 from typing import Dict
-import tomli
 from cat.auth.permissions import AuthPermission, AuthResource
 from cat.auth.connection import HTTPAuth
 
 from cat.convo.messages import CatMessage
+from cat.utils import get_cat_version
 
 router = APIRouter()
 
@@ -15,17 +15,17 @@ async def home(
     stray=Depends(HTTPAuth(AuthResource.STATUS, AuthPermission.READ)),
 ) -> Dict:
     """Server status"""
-    with open("pyproject.toml", "rb") as f:
-        project_toml = tomli.load(f)["project"]
-
-    return {"status": "We're all mad here, dear!", "version": project_toml["version"]}
+    return {"status": "We're all mad here, dear!", "version": get_cat_version()}
 
 
 @router.post("/message", response_model=CatMessage)
 async def message_with_cat(
+    background_tasks: BackgroundTasks,
     payload: Dict = Body({"text": "hello!"}),
     stray=Depends(HTTPAuth(AuthResource.CONVERSATION, AuthPermission.WRITE)),
 ) -> Dict:
     """Get a response from the Cat"""
     answer = await stray({"user_id": stray.user_id, **payload})
+    # deferred token counting happens after the response is sent
+    background_tasks.add_task(stray.flush_token_counts)
     return answer
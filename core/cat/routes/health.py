@@ -0,0 +1,107 @@
+import time
+import asyncio
+from typing import Dict
+
+from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from cat.env import get_config
+from cat.log import log
+from cat.db import crud
+from cat.factory.custom_llm import LLMDefault
+from cat.utils import get_cat_version
+
+router = APIRouter()
+
+
+class ReadinessProbe:
+    """Checks whether the Cat can serve conversations.
+
+    Checks run in background every `CCAT_READINESS_INTERVAL` seconds,
+    so `/ready` only returns the last result.
+    """
+
+    def __init__(self, ccat):
+        self.ccat = ccat
+        self.checks: Dict[str, Dict] = {}
+        self.checked_at = None
+        self._task = None
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.checks) and all(c["ok"] for c in self.checks.values())
+
+    def check_vector_db(self) -> Dict:
+        # a cheap call that needs the vector db to be reachable
+        self.ccat.memory.vectors.vector_db.get_collections()
+        return {"ok": True}
+
+    def check_llm(self) -> Dict:
+        llm = self.ccat._llm
+        # with no LLM configured, or a configuration failing to load, the Cat falls back
+        #   to the default LLM, which only replies to configure one
+        configured = crud.get_setting_by_name(name="llm_selected") is not None
+        ok = configured and llm is not None and not isinstance(llm, LLMDefault)
+        return {"ok": ok, "llm": type(llm).__name__}
+
+    def check_plugins(self) -> Dict:
+        mad_hatter = self.ccat.mad_hatter
+        missing = [p for p in mad_hatter.active_plugins if p not in mad_hatter.plugins]
+        return {"ok": len(missing) == 0, "missing": missing}
+
+    def run_checks(self):
+        checks = {}
+        for name, check in [
+            ("vector_db", self.check_vector_db),
+            ("llm", self.check_llm),
+            ("plugins", self.check_plugins),
+        ]:
+            try:
+                checks[name] = check()
+            except Exception as e:
+                checks[name] = {"ok": False, "error": str(e)}
+
+        if self.checks and self.ready and not all(c["ok"] for c in checks.values()):
+            log.warning(f"Cat is not ready: {checks}")
+        self.checks = checks
+        self.checked_at = time.time()
+
+    async def run_forever(self, interval: float):
+        while True:
+            await run_in_threadpool(self.run_checks)
+            await asyncio.sleep(interval)
+
+    def start(self):
+        self._task = asyncio.create_task(
+            self.run_forever(get_config().readiness_interval)
+        )
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+@router.get("/health")
+async def health() -> Dict:
+    """Liveness probe, answers as long as the server is up"""
+    return {"status": "healthy", "version": get_cat_version()}
+
+
+@router.get("/ready")
+async def ready(request: Request) -> JSONResponse:
+    """Readiness probe, result of the last background checks (vector db, LLM, plugins)"""
+    probe: ReadinessProbe = request.app.state.readiness
+    return JSONResponse(
+        status_code=200 if probe.ready else 503,
+        content={
+            "ready": probe.ready,
+            "version": get_cat_version(),
+            "checked_at": probe.checked_at,
+            "checks": probe.checks,
+        },
+    )
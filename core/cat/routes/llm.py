@@ -4,7 +4,7 @@ from cat.auth.connection import HTTPAuth
 from cat.auth.permissions import AuthPermission, AuthResource
 from fastapi import Request, APIRouter, Body, HTTPException, Depends
 
-from cat.factory.llm import get_llms_schemas
+from cat.factory.llm import get_llms_schemas, get_llm_from_name, LLM_ROLES
 from cat.db import crud, models
 from cat.log import log
 from cat import utils
@@ -20,6 +20,10 @@ LLM_CATEGORY = "llm_factory"
 # llm selected configuration is saved under this name
 LLM_SELECTED_NAME = "llm_selected"
 
+# llms for roles other than `chat` are saved in settings table under this category,
+#   each one named `llm_role_<role>`
+LLM_ROLES_CATEGORY = "llm_roles"
+
 
 # get configured LLMs and configuration schemas
 @router.get("/settings")
@@ -52,9 +56,18 @@ def get_llms_settings(
             }
         )
 
+    # llm selected for each role (`chat` is the selected configuration)
+    roles = {role: None for role in LLM_ROLES}
+    roles["chat"] = selected
+    for role_setting in crud.get_settings_by_category(category=LLM_ROLES_CATEGORY):
+        role = role_setting["name"].replace("llm_role_", "")
+        if role in roles:
+            roles[role] = role_setting["value"]["name"]
+
     return {
         "settings": settings,
         "selected_configuration": selected,
+        "roles": roles,
     }
 
 
@@ -94,9 +107,14 @@ def upsert_llm_setting(
     request: Request,
     languageModelName: str,
     payload: Dict = Body({"openai_api_key": "your-key-here"}),
+    role: str = "chat",
     stray=Depends(HTTPAuth(AuthResource.LLM, AuthPermission.EDIT)),
 ) -> Dict:
-    """Upsert the Large Language Model setting"""
+    """Upsert the Large Language Model setting.
+
+    By default the main (`chat`) LLM is set. Pass `role=router` or `role=utility`
+    to set a dedicated model (usually smaller and faster) for procedures selection, classification and forms.
+    """
     LLM_SCHEMAS = get_llms_schemas()
 
     # check that languageModelName is a valid name
@@ -109,6 +127,40 @@ def upsert_llm_setting(
             },
         )
 
+    if role not in LLM_ROLES:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": f"Role {role} not supported. Must be one of {LLM_ROLES}"},
+        )
+
+    if role != "chat":
+        # the model must load before it is saved, otherwise the role would silently
+        #   fall back to the chat model
+        FactoryClass = get_llm_from_name(languageModelName)
+        try:
+            FactoryClass.get_llm_from_config(payload)
+        except Exception as e:
+            log.error(f"Unable to load {languageModelName} for role {role}: {e}")
+            raise HTTPException(
+                status_code=400, detail={"error": utils.explicit_error_message(e)}
+            )
+
+        # role models have their own configuration, so the same LLM class can be used
+        #   with different models (e.g. a mini model for utility calls)
+        crud.upsert_setting_by_name(
+            models.Setting(
+                name=f"llm_role_{role}",
+                category=LLM_ROLES_CATEGORY,
+                value={"name": languageModelName, "config": payload},
+            )
+        )
+
+        ccat = request.app.state.ccat
+        # reload only the models by role, embedder and memory are not affected
+        ccat.llm_registry = ccat.load_llm_registry()
+
+        return {"name": languageModelName, "value": payload, "role": role}
+
     # create the setting and upsert it
     final_setting = crud.upsert_setting_by_name(
         models.Setting(name=languageModelName, category=LLM_CATEGORY, value=payload)
@@ -144,3 +196,32 @@ def upsert_llm_setting(
     ccat.mad_hatter.find_plugins()
 
     return status
+
+
+@router.delete("/roles/{role}")
+def delete_llm_role(
+    request: Request,
+    role: str,
+    stray=Depends(HTTPAuth(AuthResource.LLM, AuthPermission.DELETE)),
+) -> Dict:
+    """Remove the dedicated model of a role, which falls back to the `chat` model."""
+
+    if role not in LLM_ROLES or role == "chat":
+        allowed_roles = [r for r in LLM_ROLES if r != "chat"]
+        raise HTTPException(
+            status_code=400,
+            detail={"error": f"Role {role} not supported. Must be one of {allowed_roles}"},
+        )
+
+    setting = crud.get_setting_by_name(name=f"llm_role_{role}")
+    if setting is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": f"No model set for role {role}"},
+        )
+    crud.delete_setting_by_id(setting["setting_id"])
+
+    ccat = request.app.state.ccat
+    ccat.llm_registry = ccat.load_llm_registry()
+
+    return {"deleted": role}
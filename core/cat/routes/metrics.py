@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from cat.metrics import MetricsRegistry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Metrics of the conversation pipeline, in Prometheus text format"""
+    return PlainTextResponse(
+        MetricsRegistry().render(), media_type="text/plain; version=0.0.4"
+    )
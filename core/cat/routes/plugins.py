@@ -100,12 +100,13 @@ async def install_plugin(
     plugin_archive_path = f"/tmp/{file.filename}"
     with open(plugin_archive_path, "wb+") as f:
         f.write(file.file.read())
-    ccat.mad_hatter.install_plugin(plugin_archive_path)
+    job = ccat.mad_hatter.install_plugin(plugin_archive_path)
 
     return {
         "filename": file.filename,
         "content_type": file.content_type,
         "info": "Plugin is being installed asynchronously",
+        "dependencies": job.to_dict() if job else None,
     }
 
 
@@ -123,13 +124,17 @@ async def install_plugin_from_registry(
     # download zip from registry
     try:
         tmp_plugin_path = registry_download_plugin(payload["url"])
-        ccat.mad_hatter.install_plugin(tmp_plugin_path)
+        job = ccat.mad_hatter.install_plugin(tmp_plugin_path)
     except Exception as e:
         log.error("Could not download plugin form registry")
         log.error(e)
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
-    return {"url": payload["url"], "info": "Plugin is being installed asynchronously"}
+    return {
+        "url": payload["url"],
+        "info": "Plugin is being installed asynchronously",
+        "dependencies": job.to_dict() if job else None,
+    }
 
 
 @router.put("/toggle/{plugin_id}", status_code=200)
@@ -149,7 +154,12 @@ async def toggle_plugin(
 
     try:
         # toggle plugin
-        ccat.mad_hatter.toggle_plugin(plugin_id)
+        job = ccat.mad_hatter.toggle_plugin(plugin_id)
+        if job:
+            return {
+                "info": f"Installing {plugin_id} dependencies, the plugin will be activated when done",
+                "dependencies": job.to_dict(),
+            }
         return {"info": f"Plugin {plugin_id} toggled"}
     except Exception as e:
         raise HTTPException(status_code=500, detail={"error": str(e)})
@@ -272,10 +282,32 @@ async def get_plugin_details(
         {"name": hook.name, "priority": hook.priority} for hook in plugin.hooks
     ]
     plugin_info["tools"] = [{"name": tool.name} for tool in plugin.tools]
+    # hooks and tools that failed, and whether they are currently bypassed
+    plugin_info["circuit_breakers"] = [
+        breaker.to_dict() for breaker in ccat.mad_hatter.circuit_breakers.of_plugin(plugin_id)
+    ]
 
     return {"data": plugin_info}
 
 
+@router.get("/{plugin_id}/dependencies")
+async def get_plugin_dependencies_job(
+    plugin_id: str,
+    request: Request,
+    stray=Depends(HTTPAuth(AuthResource.PLUGINS, AuthPermission.READ)),
+) -> Dict:
+    """Returns the status of the last background installation of the plugin requirements"""
+
+    # access cat instance
+    ccat = request.app.state.ccat
+
+    if not ccat.mad_hatter.plugin_exists(plugin_id):
+        raise HTTPException(status_code=404, detail={"error": "Plugin not found"})
+
+    job = ccat.mad_hatter.dependency_jobs.get(plugin_id)
+    return {"data": job.to_dict() if job else None}
+
+
 @router.delete("/{plugin_id}")
 async def delete_plugin(
     plugin_id: str,
@@ -31,7 +31,10 @@ def create_setting(
     payload = models.Setting(**payload.model_dump())
 
     # save to DB
-    new_setting = crud.create_setting(payload)
+    try:
+        new_setting = crud.create_setting(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"error": str(e)})
 
     return {"setting": new_setting}
 
@@ -76,7 +79,10 @@ def update_setting(
     payload.setting_id = settingId  # force this to be the setting_id
 
     # save to DB
-    updated_setting = crud.update_setting_by_id(payload)
+    try:
+        updated_setting = crud.update_setting_by_id(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"error": str(e)})
 
     return {"setting": updated_setting}
 
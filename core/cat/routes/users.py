@@ -33,76 +33,78 @@ class UserResponse(UserBase):
 @router.post("/", response_model=UserResponse)
 def create_user(
     new_user: UserCreate,
-    users_db = Depends(crud.get_users),
     stray=Depends(HTTPAuth(AuthResource.USERS, AuthPermission.WRITE)),
 ):
-    # check for user duplication with shameful loop
-    for id, u in users_db.items():
-        if u["username"] == new_user.username:
-            raise HTTPException(
-                status_code=403,
-                detail={"error": "Cannot duplicate user"}
-            )
-        
+    if crud.get_user_by_username(new_user.username):
+        raise HTTPException(
+            status_code=403,
+            detail={"error": "Cannot duplicate user"}
+        )
+
     #hash password
     new_user.password = hash_password(new_user.password)
-        
+
     # create user
-    new_id = str(uuid4())
-    users_db[new_id] = {
-        "id": new_id,
-        **new_user.model_dump()
-    }
-    crud.update_users(users_db)
-    return users_db[new_id]
+    try:
+        return crud.create_user({
+            "id": str(uuid4()),
+            **new_user.model_dump()
+        })
+    except ValueError:
+        # created in the meantime
+        raise HTTPException(
+            status_code=403,
+            detail={"error": "Cannot duplicate user"}
+        )
 
 @router.get("/", response_model=List[UserResponse])
 def read_users(
     skip: int = 0,
     limit: int = 100,
-    users_db = Depends(crud.get_users),
     stray=Depends(HTTPAuth(AuthResource.USERS, AuthPermission.LIST)),
 ):
-    users = list(users_db.values())[skip: skip + limit]
-    return users
+    users = crud.get_users(skip=skip, limit=limit)
+    return list(users.values())
 
 @router.get("/{user_id}", response_model=UserResponse)
 def read_user(
     user_id: str,
-    users_db = Depends(crud.get_users),
     stray=Depends(HTTPAuth(AuthResource.USERS, AuthPermission.READ)),
 ):
-    if user_id not in users_db:
+    user = crud.get_user(user_id)
+    if not user:
         raise HTTPException(status_code=404, detail={"error": "User not found"})
-    return users_db[user_id]
+    return user
 
 @router.put("/{user_id}", response_model=UserResponse)
 def update_user(
     user_id: str,
     user: UserUpdate,
-    users_db = Depends(crud.get_users),
     stray=Depends(HTTPAuth(AuthResource.USERS, AuthPermission.EDIT)),
 ):
-    if user_id not in users_db:
+    stored_user = crud.get_user(user_id)
+    if not stored_user:
         raise HTTPException(status_code=404, detail={"error": "User not found"})
     
-    stored_user = users_db[user_id]
     if user.password:
         user.password = hash_password(user.password)
     updated_user = stored_user | user.model_dump(exclude_unset=True)
-    users_db[user_id] = updated_user
-    crud.update_users(users_db)
-    return updated_user
+    try:
+        return crud.update_user(updated_user)
+    except ValueError:
+        raise HTTPException(
+            status_code=403,
+            detail={"error": "Cannot duplicate user"}
+        )
 
 @router.delete("/{user_id}", response_model=UserResponse)
 def delete_user(
     user_id: str,
-    users_db = Depends(crud.get_users),
     stray=Depends(HTTPAuth(AuthResource.USERS, AuthPermission.DELETE)),
 ):
-    if user_id not in users_db:
+    user = crud.get_user(user_id)
+    if not user:
         raise HTTPException(status_code=404, detail={"error": "User not found"})
     
-    user = users_db.pop(user_id)
-    crud.update_users(users_db)
+    crud.delete_user(user_id)
     return user
@@ -6,6 +6,7 @@ from fastapi.concurrency import run_in_threadpool
 
 from cat.looking_glass.stray_cat import StrayCat
 from cat.log import log
+from cat import metrics
 
 
 router = APIRouter()
@@ -37,6 +38,7 @@ async def websocket_endpoint(
 
     # Add the new WebSocket connection to the manager.
     await websocket.accept()
+    metrics.ACTIVE_WEBSOCKETS.inc()
     try:
         # Process messages
         await receive_message(websocket, stray)
@@ -44,5 +46,7 @@ async def websocket_endpoint(
         # Handle the event where the user disconnects their WebSocket.
         stray._StrayCat__ws = None
         log.info("WebSocket connection closed")
+    finally:
+        metrics.ACTIVE_WEBSOCKETS.dec()
     # finally:
     #     del strays[user_id]
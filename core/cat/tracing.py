@@ -0,0 +1,220 @@
+"""Per-turn tracing of the conversation pipeline.
+
+A trace is opened for each conversation turn, hooks, recall, agents, tools and vector upserts
+open nested spans inside it. Finished traces are exported in background to a JSON lines file
+or to an OTLP/HTTP collector (OTLP JSON encoding), depending on `CCAT_TRACING`.
+"""
+
+import os
+import json
+import time
+import secrets
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import httpx
+
+from cat.env import get_config
+from cat.log import log
+from cat.utils import singleton_meta
+
+
+class Span:
+    """A timed operation inside a trace."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None = None, attributes: Dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.start_time = time.time_ns()
+        self.end_time = None
+        self.error = None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return ((self.end_time or time.time_ns()) - self.start_time) / 1e9
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """Spans of a single conversation turn."""
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+
+    def to_list(self) -> List[Dict]:
+        return [s.to_dict() for s in self.spans]
+
+
+class FileSpanExporter:
+    """Append finished traces to a JSON lines file, one span per line."""
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+
+    def export(self, trace: Trace):
+        os.makedirs(os.path.dirname(self.file_name) or ".", exist_ok=True)
+        with open(self.file_name, "a") as f:
+            for span in trace.spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class OTLPSpanExporter:
+    """Send finished traces to an OTLP/HTTP collector, with OTLP JSON encoding."""
+
+    def __init__(self, endpoint: str, transport: httpx.BaseTransport | None = None):
+        self.endpoint = endpoint
+        self.client = httpx.Client(timeout=10, transport=transport)
+
+    @staticmethod
+    def _attribute(key, value) -> Dict:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _span(self, span: Span) -> Dict:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # internal
+            "startTimeUnixNano": str(span.start_time),
+            "endTimeUnixNano": str(span.end_time),
+            "attributes": [self._attribute(k, v) for k, v in span.attributes.items()],
+            # 1 is ok, 2 is error
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return otlp_span
+
+    def export(self, trace: Trace):
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [self._attribute("service.name", "cheshire-cat")]},
+                "scopeSpans": [{
+                    "scope": {"name": "cat"},
+                    "spans": [self._span(s) for s in trace.spans],
+                }],
+            }]
+        }
+        response = self.client.post(self.endpoint, json=body)
+        response.raise_for_status()
+
+
+# current trace and span
+_current: ContextVar[tuple | None] = ContextVar("cat_tracing_current", default=None)
+
+
+class Tracer(metaclass=singleton_meta):
+    """Opens traces and spans, and exports finished traces.
+
+    Configured by `CCAT_TRACING` (empty to disable, `file` or `otlp`), `CCAT_TRACING_FILE`,
+    `CCAT_TRACING_OTLP_ENDPOINT` and `CCAT_TRACING_IN_WHY` (attach spans to the message `why`).
+    When tracing is disabled, opening a span does nothing.
+    """
+
+    def __init__(self):
+        self.exporters = []
+        self.attach_to_why = False
+        self._executor = None
+        self.configure()
+
+    def configure(self, exporters: List | None = None, attach_to_why: bool | None = None):
+        """Set exporters and `why` attachment, by default they are read from the configuration."""
+        config = get_config()
+        if exporters is None:
+            exporters = []
+            if config.tracing == "file":
+                exporters.append(FileSpanExporter(config.tracing_file))
+            elif config.tracing == "otlp":
+                exporters.append(OTLPSpanExporter(config.tracing_otlp_endpoint))
+        self.exporters = exporters
+        self.attach_to_why = config.tracing_in_why if attach_to_why is None else attach_to_why
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters) or self.attach_to_why
+
+    @contextmanager
+    def start_trace(self, name: str, **attributes):
+        """Open a trace and its root span, the trace is exported when the block ends (also on errors)."""
+        if not self.enabled:
+            yield None
+            return
+
+        trace = Trace()
+        try:
+            with self._open_span(trace, None, name, attributes):
+                yield trace
+        finally:
+            # failed turns are the ones worth looking at
+            self._export(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Open a span nested in the current one, does nothing outside of a trace."""
+        current = _current.get()
+        if current is None:
+            yield None
+            return
+
+        trace, parent = current
+        with self._open_span(trace, parent.span_id, name, attributes) as span:
+            yield span
+
+    @contextmanager
+    def _open_span(self, trace: Trace, parent_id: str | None, name: str, attributes: Dict):
+        span = Span(name, trace.trace_id, parent_id, attributes)
+        trace.spans.append(span)
+        token = _current.set((trace, span))
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.end_time = time.time_ns()
+            _current.reset(token)
+
+    def _export(self, trace: Trace):
+        if not self.exporters:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tracing")
+        for exporter in self.exporters:
+            self._executor.submit(self._safe_export, exporter, trace)
+
+    def flush(self):
+        """Wait for pending exports."""
+        if self._executor:
+            self._executor.submit(lambda: None).result()
+
+    @staticmethod
+    def _safe_export(exporter, trace: Trace):
+        try:
+            exporter.export(trace)
+        except Exception as e:
+            log.warning(f"Could not export trace {trace.trace_id}: {e}")
@@ -3,18 +3,20 @@
 import os
 import traceback
 import inspect
+import tomli
+from functools import lru_cache
 from datetime import timedelta
 from urllib.parse import urlparse
 from typing import Dict, Tuple
 from pydantic import BaseModel, ConfigDict
 
-from langchain.evaluation import StringDistance, load_evaluator, EvaluatorType
+from rapidfuzz.distance import Levenshtein
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
 from langchain_core.utils import get_colored_text
 
 from cat.log import log
-from cat.env import get_env
+from cat.env import get_config
 
 
 def to_camel_case(text: str) -> str:
@@ -85,10 +87,16 @@ def verbal_timedelta(td: timedelta) -> str:
 
 def get_base_url():
     """Allows exposing the base url."""
-    secure = "s" if get_env("CCAT_CORE_USE_SECURE_PROTOCOLS") in ("true", "1") else ""
-    cat_host = get_env("CCAT_CORE_HOST")
-    cat_port = get_env("CCAT_CORE_PORT")
-    return f"http{secure}://{cat_host}:{cat_port}/"
+    config = get_config()
+    secure = "s" if config.core_use_secure_protocols else ""
+    return f"http{secure}://{config.core_host}:{config.core_port}/"
+
+
+@lru_cache(maxsize=1)
+def get_cat_version() -> str:
+    """Cat version from pyproject.toml, read only once."""
+    with open("pyproject.toml", "rb") as f:
+        return tomli.load(f)["project"]["version"]
 
 
 def get_base_path():
@@ -143,15 +151,9 @@ HOW TO FIX: go to your OpenAI accont and add a credit card"""
     return error_description
 
 
-def levenshtein_distance(prediction: str, reference: str) -> int:
-    jaro_evaluator = load_evaluator(
-        EvaluatorType.STRING_DISTANCE, distance=StringDistance.LEVENSHTEIN
-    )
-    result = jaro_evaluator.evaluate_strings(
-        prediction=prediction,
-        reference=reference,
-    )
-    return result["score"]
+def levenshtein_distance(prediction: str, reference: str) -> float:
+    """Normalized Levenshtein distance between two strings (0 is identical, 1 is totally different)."""
+    return Levenshtein.normalized_distance(prediction, reference)
 
 
 def parse_json(json_string: str, pydantic_model: BaseModel = None) -> dict:
@@ -223,6 +225,15 @@ def get_caller_info():
 
 
 def langchain_log_prompt(langchain_prompt, title):
+    if log.structured:
+        if log.sample_prompt():
+            messages = [
+                {"type": type(m).__name__, "content": log.truncate(m.content)}
+                for m in langchain_prompt.messages
+            ]
+            log.event("llm_prompt", title, title=title, messages=messages)
+        return langchain_prompt
+
     print("\n")
     print(get_colored_text(f"==================== {title} ====================", "green"))
     for m in langchain_prompt.messages:
@@ -233,6 +244,12 @@ def langchain_log_prompt(langchain_prompt, title):
 
 
 def langchain_log_output(langchain_output, title):
+    if log.structured:
+        if log.sample_prompt():
+            content = getattr(langchain_output, "content", langchain_output)
+            log.event("llm_output", title, title=title, content=log.truncate(content))
+        return langchain_output
+
     print("\n")
     print(get_colored_text(f"==================== {title} ====================", "blue"))
     if hasattr(langchain_output, 'content'):
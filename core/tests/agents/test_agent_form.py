@@ -1,7 +1,100 @@
 
+import json
 import pytest
+from pydantic import BaseModel
+
+from cat.experimental.form import CatForm, CatFormState, form
+
+
+class PizzaOrder(BaseModel):
+    pizza_type: str
+    phone: str
+
+
+@form
+class PizzaForm(CatForm):
+    description = "Pizza Order"
+    model_class = PizzaOrder
+    start_examples = ["order a pizza"]
+    ask_confirm = True
+
+    def submit(self, form_data):
+        return {"output": f"Form submitted: {form_data}"}
+
+
+def mock_llm(stray, monkeypatch, replies):
+    prompts = []
+
+    def llm(prompt, *args, **kwargs):
+        prompts.append(prompt)
+        return replies.pop(0)
+
+    monkeypatch.setattr(stray, "llm", llm)
+    return prompts
 
 
 @pytest.mark.asyncio
 async def test_execute_form_agent(main_agent, stray):
     assert True  # TODO: this is going to be a mess
+
+
+@pytest.mark.asyncio
+async def test_form_single_call_step(stray, monkeypatch):
+    pizza_form = PizzaForm(stray)
+
+    prompts = mock_llm(stray, monkeypatch, [
+        json.dumps({"exit": False, "confirm": False, "fields": {"pizza_type": "margherita"}}),
+        json.dumps({"exit": False, "confirm": False, "fields": {"phone": "123"}}),
+        json.dumps({"exit": False, "confirm": True, "fields": {}}),
+    ])
+
+    await pizza_form.anext()
+    assert pizza_form._state == CatFormState.INCOMPLETE
+    assert pizza_form._model == {"pizza_type": "margherita"}
+
+    await pizza_form.anext()
+    assert pizza_form._state == CatFormState.WAIT_CONFIRM
+
+    output = await pizza_form.anext()
+    assert pizza_form._state == CatFormState.CLOSED
+    assert "Form submitted" in output["output"]
+
+    # one LLM call per step
+    assert len(prompts) == 3
+
+
+@pytest.mark.asyncio
+async def test_form_single_call_exit(stray, monkeypatch):
+    pizza_form = PizzaForm(stray)
+    mock_llm(stray, monkeypatch, [json.dumps({"exit": True, "confirm": False, "fields": {}})])
+
+    await pizza_form.anext()
+    assert pizza_form._state == CatFormState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_form_multi_call_fallback(stray, monkeypatch):
+    pizza_form = PizzaForm(stray)
+
+    # unparsable step output, then exit check and extraction
+    prompts = mock_llm(stray, monkeypatch, [
+        "meow",
+        "false}",
+        json.dumps({"pizza_type": "margherita"}),
+    ])
+
+    await pizza_form.anext()
+    assert pizza_form._state == CatFormState.INCOMPLETE
+    assert pizza_form._model == {"pizza_type": "margherita"}
+    assert len(prompts) == 3
+
+
+@pytest.mark.asyncio
+async def test_async_form(stray):
+    @form
+    class AsyncForm(PizzaForm):
+        async def next(self):
+            return {"output": "async meow"}
+
+    output = await AsyncForm(stray).anext()
+    assert output["output"] == "async meow"
@@ -1,8 +1,40 @@
 import pytest
 
+from cat.agents.procedures_agent import ProceduresAgent
+from cat.mad_hatter.mad_hatter import MadHatter
+
 
 @pytest.mark.asyncio
 async def test_execute_procedures_agent(main_agent, stray):
     assert True  # TODO: this is going to be a mess
 
 # TODO: test tool prompt
+
+
+def test_prepare_allowed_procedures(stray):
+    agent = ProceduresAgent()
+
+    allowed_procedures = agent.prepare_allowed_procedures(
+        stray, {"get_the_time", "not_a_procedure"}
+    )
+
+    assert list(allowed_procedures.keys()) == ["get_the_time"]
+    assert allowed_procedures["get_the_time"] is MadHatter().procedures_by_name["get_the_time"]
+
+
+def test_prompt_parts_cached_per_allowed_procedures(stray):
+    agent = ProceduresAgent()
+    allowed_procedures = agent.prepare_allowed_procedures(stray, {"get_the_time"})
+
+    prompt_parts = agent.get_prompt_parts(allowed_procedures)
+    assert prompt_parts["tool_names"] == '"get_the_time"'
+    assert prompt_parts["tools"].startswith('- "get_the_time": ')
+    assert "## Here some examples:" in prompt_parts["examples"]
+
+    # same allowed procedures, same prompt parts
+    assert agent.get_prompt_parts(allowed_procedures) is prompt_parts
+    assert agent.get_prompt_parts({}) is not prompt_parts
+
+    # a new plugins registry invalidates the cache
+    MadHatter().sync_hooks_tools_and_forms()
+    assert agent.get_prompt_parts(allowed_procedures) is not prompt_parts
@@ -15,9 +15,11 @@ from fastapi.testclient import TestClient
 from cat.looking_glass.cheshire_cat import CheshireCat
 from cat.looking_glass.stray_cat import StrayCat
 from cat.db.database import Database
+from cat.env import reload_config
 import cat.utils as utils
 from cat.memory.vector_memory import VectorMemory
 from cat.mad_hatter.plugin import Plugin
+from cat.mad_hatter.plugin_index import PluginIndex
 from cat.main import cheshire_cat_api
 from tests.utils import create_mock_plugin_zip
 
@@ -52,6 +54,17 @@ def mock_classes(monkeypatch):
 
     monkeypatch.setattr(Plugin, "_install_requirements", mock_install_requirements)
 
+    def mock_missing_requirements(self, *args, **kwargs):
+        return []
+
+    monkeypatch.setattr(Plugin, "missing_requirements", mock_missing_requirements)
+
+    # Use a different plugin index
+    def mock_get_index_file_name(self, *args, **kwargs):
+        return "tests/mocks/plugin_index-test.json"
+
+    monkeypatch.setattr(PluginIndex, "get_file_name", mock_get_index_file_name)
+
 
 # get rid of tmp files and folders used for testing
 def clean_up_mocks():
@@ -59,6 +72,10 @@ def clean_up_mocks():
     to_be_removed = [
         "cat/metadata-test.json",  # legacy position, now moved into mocks folder
         "tests/mocks/metadata-test.json",
+        "tests/mocks/metadata-test.sqlite",
+        "tests/mocks/metadata-test.sqlite-wal",
+        "tests/mocks/metadata-test.sqlite-shm",
+        "tests/mocks/plugin_index-test.json",
         "tests/mocks/mock_plugin.zip",
         "tests/mocks/mock_plugin/settings.json",
         "tests/mocks/mock_plugin_folder/mock_plugin",
@@ -99,9 +116,11 @@ def secure_client(client):
     # set ENV variables
     os.environ["CCAT_API_KEY"] = "meow_http"
     os.environ["CCAT_API_KEY_WS"] = "meow_ws"
+    reload_config()
     yield client
     del os.environ["CCAT_API_KEY"]
     del os.environ["CCAT_API_KEY_WS"]
+    reload_config()
 
 
 # This fixture is useful to write tests in which
@@ -0,0 +1,177 @@
+import pytest
+from tinydb import TinyDB
+
+from cat.db import crud, models
+from cat.db.database import (
+    SQLiteBackend, TinyDBBackend, migrate_from_tinydb, migrate_users_setting, get_db, get_cache
+)
+
+
+@pytest.fixture(params=["sqlite", "tinydb"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "metadata.sqlite"))
+    return TinyDBBackend(str(tmp_path / "metadata.json"))
+
+
+def test_backend_crud(backend):
+    for i, category in enumerate(["llm_factory", "embedder_factory", "llm_factory"]):
+        backend.insert(
+            models.Setting(name=f"setting_{i}", value={"i": i}, category=category).model_dump()
+        )
+
+    assert [s["name"] for s in backend.all()] == ["setting_0", "setting_1", "setting_2"]
+    assert [s["name"] for s in backend.search("category", "llm_factory")] == ["setting_0", "setting_2"]
+    assert [s["name"] for s in backend.search_name("setting_[12]")] == ["setting_1", "setting_2"]
+
+    setting = backend.search("name", "setting_1")[0]
+    assert setting["value"] == {"i": 1}
+    assert backend.search("setting_id", setting["setting_id"]) == [setting]
+
+    backend.update("name", "setting_1", {"value": ["meow"]})
+    assert backend.search("name", "setting_1")[0]["value"] == ["meow"]
+
+    backend.remove("category", "llm_factory")
+    assert [s["name"] for s in backend.all()] == ["setting_1"]
+
+
+def test_backend_upsert(backend):
+    backend.upsert(models.Setting(name="meow", value={"a": 1}).model_dump())
+    backend.upsert(models.Setting(name="meow", value={"a": 2}, category="cat").model_dump())
+
+    settings = backend.all()
+    assert len(settings) == 1
+    assert settings[0]["value"] == {"a": 2}
+    assert settings[0]["category"] == "cat"
+
+    # names are unique
+    with pytest.raises(ValueError):
+        backend.insert(models.Setting(name="meow", value={}).model_dump())
+    assert len(backend.all()) == 1
+
+    backend.insert(models.Setting(name="purr", value={}).model_dump())
+    with pytest.raises(ValueError):
+        backend.update("name", "purr", {"name": "meow"})
+    backend.update("name", "purr", {"name": "purr", "value": {"b": 1}})
+    assert backend.search("name", "purr")[0]["value"] == {"b": 1}
+
+
+def test_unique_name_index_removes_duplicates(tmp_path):
+    import sqlite3
+
+    # a store created with the plain index on name
+    file_name = str(tmp_path / "metadata.sqlite")
+    backend = SQLiteBackend(file_name)
+    with backend.connection() as conn:
+        conn.execute("DROP INDEX settings_name_unique")
+        conn.execute("CREATE INDEX settings_name ON settings (name)")
+        for i in range(3):
+            backend._insert(conn, [models.Setting(name="meow", value={"i": i}).model_dump()])
+
+    # the last setting of each name is kept
+    backend = SQLiteBackend(file_name)
+    assert [s["value"] for s in backend.all()] == [{"i": 2}]
+    with pytest.raises(sqlite3.IntegrityError):
+        with backend.connection() as conn:
+            backend._insert(conn, [models.Setting(name="meow", value={}).model_dump()])
+
+
+def test_migrate_from_tinydb(tmp_path):
+    tinydb_file = str(tmp_path / "metadata.json")
+    legacy = TinyDB(tinydb_file)
+    legacy.insert(models.Setting(name="users", value={"id": {"username": "admin"}}).model_dump())
+    legacy.insert(models.Setting(name="llm_selected", value={"name": "LLMDefaultConfig"}).model_dump())
+
+    backend = SQLiteBackend(str(tmp_path / "metadata.sqlite"))
+    assert migrate_from_tinydb(tinydb_file, backend) == 2
+    assert backend.search("name", "users")[0]["value"] == {"id": {"username": "admin"}}
+
+    # migration happens only once, even if the store gets emptied
+    backend.remove("name", "users")
+    backend.remove("name", "llm_selected")
+    assert migrate_from_tinydb(tinydb_file, SQLiteBackend(backend.file_name)) == 0
+    assert backend.all() == []
+
+
+def test_crud_on_sqlite(client):
+    setting = crud.upsert_setting_by_name(models.Setting(name="meow", value={"a": 1}))
+    updated = crud.upsert_setting_by_name(models.Setting(name="meow", value={"a": 2}))
+    assert updated["value"] == {"a": 2}
+    assert crud.get_setting_by_name("meow")["setting_id"] == updated["setting_id"]
+    assert crud.get_setting_by_id(setting["setting_id"]) is None
+
+    assert "users" not in [s["name"] for s in crud.get_settings()]
+    assert len(crud.get_users()) == 2
+
+
+def test_settings_cache(client, monkeypatch):
+    backend = get_db()
+    crud.upsert_setting_by_name(models.Setting(name="meow", value={"a": 1}))
+
+    reads = []
+    search = backend.search
+
+    def counting_search(field, value):
+        reads.append((field, value))
+        return search(field, value)
+
+    monkeypatch.setattr(backend, "search", counting_search)
+    get_cache().invalidate()
+
+    crud.get_setting_by_name("meow")["value"]["a"] = 42  # callers get a copy
+    assert crud.get_setting_by_name("meow")["value"] == {"a": 1}
+    assert reads == [("name", "meow")]
+
+    # writes invalidate the cache
+    version = get_cache().version
+    crud.upsert_setting_by_name(models.Setting(name="meow", value={"a": 2}))
+    assert get_cache().version > version
+    assert crud.get_setting_by_name("meow")["value"] == {"a": 2}
+
+
+def test_settings_cache_sees_other_processes(client):
+    crud.upsert_setting_by_name(models.Setting(name="meow", value={"a": 1}))
+    assert crud.get_setting_by_name("meow")["value"] == {"a": 1}
+
+    # another worker writes through its own connection
+    other_worker = SQLiteBackend(get_db().file_name)
+    other_worker.update("name", "meow", {"value": {"a": 2}})
+
+    assert crud.get_setting_by_name("meow")["value"] == {"a": 2}
+
+
+def test_backend_users(backend):
+    alice = {"id": "1", "username": "Alice", "password": "x", "permissions": {}}
+    bob = {"id": "2", "username": "Bob", "password": "y", "permissions": {}}
+    backend.insert_user(alice)
+    backend.insert_user(bob)
+
+    with pytest.raises(ValueError):
+        backend.insert_user({**bob, "id": "3"})
+
+    assert backend.count_users() == 2
+    assert backend.get_user("2") == bob
+    assert backend.get_user_by_username("Alice") == alice
+    assert backend.get_users(skip=1, limit=1) == [bob]
+
+    with pytest.raises(ValueError):
+        backend.update_user({**bob, "username": "Alice"})
+    backend.update_user({**bob, "username": "Robert"})
+    assert backend.get_user_by_username("Bob") is None
+    assert backend.get_user("2")["username"] == "Robert"
+
+    backend.remove_user("1")
+    assert [u["id"] for u in backend.get_users()] == ["2"]
+
+
+def test_migrate_users_setting(backend):
+    users = {
+        "1": {"id": "1", "username": "admin", "password": "x", "permissions": {}},
+        "2": {"id": "2", "username": "user", "password": "y", "permissions": {}},
+    }
+    backend.insert(models.Setting(name="users", value=users).model_dump())
+
+    assert migrate_users_setting(backend) == 2
+    assert backend.search("name", "users") == []
+    assert backend.get_users() == list(users.values())
+    assert migrate_users_setting(backend) == 0
@@ -0,0 +1,137 @@
+import time
+import threading
+
+import httpx
+
+from cat.factory.outbound_gateway import OutboundGateway, TokenBucket
+
+
+def configure_mock_provider(host, handler, **kwargs):
+    return OutboundGateway().configure_provider(
+        host, transport=httpx.MockTransport(handler), **kwargs
+    )
+
+
+def test_retry_on_throttling():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(429)
+        return httpx.Response(200, json={"text": "meow"})
+
+    configure_mock_provider("retry.test", handler, backoff_base=0.001)
+
+    response = OutboundGateway().post("http://retry.test/llm", json_body={"text": "hey"})
+    assert response.status_code == 200
+    assert response.json() == {"text": "meow"}
+    assert len(calls) == 3
+
+
+def test_give_up_after_max_retries():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(429, headers={"Retry-After": "0"})
+
+    configure_mock_provider("throttled.test", handler, max_retries=2)
+
+    response = OutboundGateway().post("http://throttled.test/llm", json_body={})
+    assert response.status_code == 429
+    assert len(calls) == 3
+
+
+def test_coalesce_identical_requests():
+    calls = []
+    release = threading.Event()
+
+    def handler(request):
+        calls.append(request)
+        release.wait(timeout=5)
+        return httpx.Response(200, json={"data": [1]})
+
+    configure_mock_provider("coalesce.test", handler)
+
+    responses = []
+
+    def post():
+        responses.append(OutboundGateway().post("http://coalesce.test/embed", data="same"))
+
+    threads = [threading.Thread(target=post) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(responses) == 5
+    assert all(r.json() == {"data": [1]} for r in responses)
+
+
+def test_concurrency_limit():
+    active = []
+    max_active = []
+    lock = threading.Lock()
+
+    def handler(request):
+        with lock:
+            active.append(1)
+            max_active.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return httpx.Response(200)
+
+    configure_mock_provider("limit.test", handler, max_concurrency=2)
+
+    threads = [
+        threading.Thread(
+            target=OutboundGateway().post, args=("http://limit.test/embed",), kwargs={"data": str(i)}
+        )
+        for i in range(6)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(max_active) == 6
+    assert max(max_active) <= 2
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    # 2 requests in burst, 2 more at 20 requests per second
+    assert time.monotonic() - start >= 0.09
+
+
+def test_replaced_provider_is_closed():
+    release = threading.Event()
+
+    def handler(request):
+        release.wait(timeout=5)
+        return httpx.Response(200)
+
+    idle = configure_mock_provider("replace.test", handler)
+    busy = configure_mock_provider("replace.test", handler)
+    assert idle.client.is_closed
+
+    # a request in flight keeps the client open until it is done
+    thread = threading.Thread(
+        target=OutboundGateway().post, args=("http://replace.test/llm",), kwargs={"data": "hey"}
+    )
+    thread.start()
+    time.sleep(0.1)
+    configure_mock_provider("replace.test", handler)
+    assert not busy.client.is_closed
+
+    release.set()
+    thread.join()
+    assert busy.client.is_closed
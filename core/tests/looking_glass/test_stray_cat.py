@@ -49,6 +49,33 @@ def test_stray_classify(stray):
     assert label is None  # TODO: should be "negative"
 
 
+def test_stray_classify_with_embedder(stray):
+    labels = {
+        "positive": ["I feel nice", "happy today"],
+        "negative": ["I feel bad", "not my best day"],
+    }
+    label = stray.classify("I feel bad today", labels=labels, method="embedder")
+    assert label == "negative"
+
+    # examples are embedded only once
+    calls = []
+    embedder = stray.embedder
+    original_embed_documents = embedder.embed_documents
+
+    def embed_documents(texts):
+        calls.append(texts)
+        return original_embed_documents(texts)
+
+    embedder.embed_documents = embed_documents
+    try:
+        for _ in range(3):
+            assert stray.classify("happy today", labels=labels, method="embedder") == "positive"
+    finally:
+        embedder.embed_documents = original_embed_documents
+    # DumbEmbedder embeds the query with `embed_documents`, examples are not embedded again
+    assert calls == [["happy today"]] * 3
+
+
 def test_recall_to_working_memory(stray):
     # empty working memory / episodic
     assert stray.working_memory.episodic_memories == []
@@ -0,0 +1,122 @@
+import os
+import time
+import threading
+
+import cat.looking_glass.token_counter as token_counter
+from cat.looking_glass.token_counter import TokenCounter, estimate_tokens
+from cat.env import reload_config
+from cat import metrics
+from cat.convo.messages import LLMModelInteraction, EmbedderModelInteraction
+
+
+class FakeEncoding:
+    def encode(self, text, **kwargs):
+        return text.split()
+
+
+def test_encoding_loaded_once(client, monkeypatch):
+    calls = []
+
+    def mock_get_encoding(name):
+        calls.append(name)
+        return FakeEncoding()
+
+    monkeypatch.setattr(token_counter.tiktoken, "get_encoding", mock_get_encoding)
+    token_counter.get_encoding.cache_clear()
+
+    counter = TokenCounter()
+    counter.register_tokenizer("unused", len)  # resets resolved tokenizers
+
+    assert counter.count("meow meow meow") == 3
+    assert counter.count("meow meow") == 2
+    assert calls == ["cl100k_base"]
+
+    token_counter.get_encoding.cache_clear()
+
+
+def test_tokenizer_fallback(client, monkeypatch):
+    def mock_get_encoding(name):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(token_counter.tiktoken, "get_encoding", mock_get_encoding)
+    token_counter.get_encoding.cache_clear()
+
+    counter = TokenCounter()
+    counter.register_tokenizer("unused", len)
+    assert counter.count("meow" * 10) == estimate_tokens("meow" * 10) == 10
+
+    token_counter.get_encoding.cache_clear()
+
+
+def test_custom_tokenizer(client):
+    class FakeLLM:
+        _llm_type = "fake"
+
+    counter = TokenCounter()
+    counter.register_tokenizer("fake", lambda text: 42)
+    assert counter.count("meow", llm=FakeLLM()) == 42
+
+
+def test_count_interaction(client):
+    counter = TokenCounter()
+    counter.register_tokenizer("unused", len)
+
+    llm_interaction = LLMModelInteraction(
+        source="test", prompt="meow", reply="purr", input_tokens=0, output_tokens=0, ended_at=0
+    )
+    counter.count_interaction(llm_interaction, tokenizer=len)
+    assert llm_interaction.input_tokens == 4
+    assert llm_interaction.output_tokens == 4
+
+    embedder_interaction = EmbedderModelInteraction(prompt="meow", reply=[0.1], input_tokens=0)
+    counter.count_interaction(embedder_interaction, tokenizer=len)
+    assert embedder_interaction.input_tokens == 4
+
+
+def test_deferred_token_counting(stray):
+    os.environ["CCAT_TOKEN_COUNTING"] = "deferred"
+    reload_config()
+    try:
+        interaction = LLMModelInteraction(
+            source="test", prompt="meow", reply="purr", input_tokens=0, output_tokens=0, ended_at=0
+        )
+        stray.count_tokens(interaction, tokenizer=len)
+        # not counted until the reply is sent
+        assert interaction.input_tokens == 0
+
+        stray.flush_token_counts()
+        TokenCounter()._executor.submit(lambda: None).result()
+        assert interaction.input_tokens == 4
+        assert interaction.output_tokens == 4
+    finally:
+        del os.environ["CCAT_TOKEN_COUNTING"]
+        reload_config()
+
+
+def test_background_queue_depth(client):
+    counter = TokenCounter()
+    release = threading.Event()
+
+    def blocking_tokenizer(text):
+        release.wait(timeout=5)
+        return len(text)
+
+    def interaction():
+        return LLMModelInteraction(
+            source="test", prompt="meow", reply="purr", input_tokens=0, output_tokens=0, ended_at=0
+        )
+
+    futures = [
+        counter.count_interactions_in_background([(interaction(), blocking_tokenizer)])
+        for _ in range(3)
+    ]
+    assert metrics.QUEUE_DEPTH.get(queue="token_counting") == 3
+
+    release.set()
+    for future in futures:
+        future.result()
+    # done callbacks may run right after the results are set
+    deadline = time.monotonic() + 5
+    while metrics.QUEUE_DEPTH.get(queue="token_counting") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert metrics.QUEUE_DEPTH.get(queue="token_counting") == 0
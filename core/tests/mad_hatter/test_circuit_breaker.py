@@ -0,0 +1,180 @@
+import os
+import time
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cat.env import reload_config
+from cat.mad_hatter.mad_hatter import MadHatter
+from cat.mad_hatter.decorators import CatHook
+from cat.mad_hatter.plugins_registry import PluginsRegistry
+from cat.agents.procedures_agent import ProceduresAgent
+from cat.looking_glass.output_parser import LLMAction
+
+from tests.mocks.mock_tool_execution import slow_thread_tool
+
+
+@pytest.fixture
+def breaker_config():
+    os.environ["CCAT_CIRCUIT_BREAKER_FAILURES"] = "2"
+    os.environ["CCAT_CIRCUIT_BREAKER_COOLDOWN"] = "0.5"
+    reload_config()
+    yield
+    del os.environ["CCAT_CIRCUIT_BREAKER_FAILURES"]
+    del os.environ["CCAT_CIRCUIT_BREAKER_COOLDOWN"]
+    reload_config()
+
+
+def use_hooks(mad_hatter, *hooks):
+    for hook in hooks:
+        hook.plugin_id = "core_plugin"
+    mad_hatter._registry = PluginsRegistry.build(
+        hooks={"before_cat_reads_message": list(hooks)}, tools=[], forms=[], options={}
+    )
+
+
+def test_failing_hook_is_bypassed(client, breaker_config):
+    calls = []
+
+    def failing_hook(message, cat):
+        calls.append(message)
+        raise Exception("meow")
+
+    mad_hatter = MadHatter()
+    use_hooks(mad_hatter, CatHook("before_cat_reads_message", failing_hook, 1))
+
+    for _ in range(3):
+        assert mad_hatter.execute_hook("before_cat_reads_message", "hi", cat=None) == "hi"
+    # after two failures in a row the hook is bypassed
+    assert len(calls) == 2
+
+    breaker = mad_hatter.circuit_breakers.get("hook", "core_plugin", "before_cat_reads_message")
+    assert breaker.state == "open"
+    assert breaker.failures == 2
+    assert breaker.last_error == "Exception: meow"
+
+    # once the cooldown is over the hook is tried again
+    time.sleep(0.6)
+    assert breaker.state == "half_open"
+    mad_hatter.execute_hook("before_cat_reads_message", "hi", cat=None)
+    assert len(calls) == 3
+    assert breaker.state == "open"
+
+
+def test_hook_timeout(client, breaker_config):
+    def slow_hook(message, cat):
+        time.sleep(1)
+        return "too late"
+
+    mad_hatter = MadHatter()
+    use_hooks(mad_hatter, CatHook("before_cat_reads_message", slow_hook, 1, timeout=0.1))
+
+    start = time.perf_counter()
+    assert mad_hatter.execute_hook("before_cat_reads_message", "hi", cat=None) == "hi"
+    assert time.perf_counter() - start < 0.5
+
+    breaker = mad_hatter.circuit_breakers.get("hook", "core_plugin", "before_cat_reads_message")
+    assert breaker.timeouts == 1
+    assert breaker.state == "closed"
+
+
+def test_hook_success_closes_breaker(client, breaker_config):
+    results = [Exception("meow"), "ok", Exception("meow"), "ok"]
+
+    def flaky_hook(message, cat):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    mad_hatter = MadHatter()
+    use_hooks(mad_hatter, CatHook("before_cat_reads_message", flaky_hook, 1))
+
+    for _ in range(4):
+        mad_hatter.execute_hook("before_cat_reads_message", "hi", cat=None)
+
+    # failures were never consecutive
+    breaker = mad_hatter.circuit_breakers.get("hook", "core_plugin", "before_cat_reads_message")
+    assert breaker.failures == 2
+    assert breaker.state == "closed"
+
+
+def test_circuit_breakers_in_plugin_details(client, breaker_config):
+    def failing_hook(message, cat):
+        raise Exception("meow")
+
+    mad_hatter = MadHatter()
+    use_hooks(mad_hatter, CatHook("before_cat_reads_message", failing_hook, 1))
+    for _ in range(2):
+        mad_hatter.execute_hook("before_cat_reads_message", "hi", cat=None)
+
+    response = client.get("/plugins/core_plugin")
+    breakers = response.json()["data"]["circuit_breakers"]
+    assert len(breakers) == 1
+    assert breakers[0]["kind"] == "hook"
+    assert breakers[0]["name"] == "before_cat_reads_message"
+    assert breakers[0]["state"] == "open"
+    assert breakers[0]["open_for"] > 0
+
+
+def test_tool_timeout_counted(client, stray, breaker_config):
+    agent = ProceduresAgent()
+    slow_thread_tool.plugin_id = "core_plugin"
+    llm_action = LLMAction(action="slow_thread_tool", action_input="meow")
+
+    stray.loop.run_until_complete(
+        agent.execute_subagents(stray, llm_action, {"slow_thread_tool": slow_thread_tool})
+    )
+
+    breaker = MadHatter().circuit_breakers.get("tool", "core_plugin", "slow_thread_tool")
+    assert breaker.failures == 1
+    assert breaker.timeouts == 1
+
+
+def test_abandoned_hooks_are_bounded(client, breaker_config):
+    calls = []
+    release = threading.Event()
+
+    def stuck_hook(message, cat):
+        calls.append(message)
+        release.wait(timeout=10)
+
+    mad_hatter = MadHatter()
+    use_hooks(mad_hatter, CatHook("before_cat_reads_message", stuck_hook, 1, timeout=0.05))
+    # keep the breaker closed, to see the bound on abandoned hooks
+    os.environ["CCAT_CIRCUIT_BREAKER_FAILURES"] = "100"
+    reload_config()
+
+    for _ in range(4):
+        assert mad_hatter.execute_hook("before_cat_reads_message", "hi", cat=None) == "hi"
+
+    # only two calls were left running, the others were not even started
+    assert len(calls) == mad_hatter.max_abandoned_hooks
+    assert mad_hatter._abandoned_hooks == {"core_plugin": 2}
+
+    release.set()
+    mad_hatter._hooks_executor.shutdown(wait=True)
+    assert mad_hatter._abandoned_hooks == {}
+
+
+def test_queued_hook_cancelled_on_timeout(client, breaker_config):
+    calls = []
+
+    def hook_function(message, cat):
+        calls.append(message)
+
+    mad_hatter = MadHatter()
+    use_hooks(mad_hatter, CatHook("before_cat_reads_message", hook_function, 1, timeout=0.05))
+
+    # no free worker: the hook stays queued and times out
+    mad_hatter._hooks_executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    mad_hatter._hooks_executor.submit(release.wait, 10)
+
+    mad_hatter.execute_hook("before_cat_reads_message", "hi", cat=None)
+    release.set()
+    mad_hatter._hooks_executor.shutdown(wait=True)
+
+    # cancelled, it never ran once a worker was free
+    assert calls == []
+    assert mad_hatter._abandoned_hooks == {}
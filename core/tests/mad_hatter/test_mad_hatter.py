@@ -1,11 +1,13 @@
 import os
 import pytest
+import threading
 from inspect import isfunction
 
 import cat.utils as utils
 
 from cat.mad_hatter.mad_hatter import MadHatter, Plugin
 from cat.mad_hatter.decorators import CatHook, CatTool
+from cat.agents.procedures_agent import ProceduresAgent
 
 from tests.utils import create_mock_plugin_zip
 
@@ -113,6 +115,115 @@ def test_plugin_install(mad_hatter: MadHatter, plugin_is_flat):
     assert "mock_plugin" in active_plugins
 
 
+def test_toggle_plugin_matches_full_sync(mad_hatter: MadHatter):
+    new_plugin_zip_path = create_mock_plugin_zip(flat=True)
+    mad_hatter.install_plugin(new_plugin_zip_path)
+
+    def registry():
+        return (
+            {name: [id(h) for h in chain] for name, chain in mad_hatter.hooks.items()},
+            [id(t) for t in mad_hatter.tools],
+            [id(f) for f in mad_hatter.forms],
+            {name: [id(o) for o in chain] for name, chain in mad_hatter.options.items()},
+        )
+
+    # deactivate and reactivate: only mock_plugin hooks, tools and forms are touched
+    for _ in range(2):
+        mad_hatter.toggle_plugin("mock_plugin")
+        toggled = registry()
+        mad_hatter.sync_hooks_tools_and_forms()
+        assert toggled == registry()
+
+    assert "mock_plugin" in mad_hatter.active_plugins
+    assert [t.plugin_id for t in mad_hatter.tools] == ["core_plugin", "mock_plugin"]
+
+
+
+def test_registry_snapshot_is_pinned(mad_hatter: MadHatter):
+    new_plugin_zip_path = create_mock_plugin_zip(flat=True)
+    mad_hatter.install_plugin(new_plugin_zip_path)
+    hook_name = "before_cat_sends_message"
+
+    with mad_hatter.pinned_registry():
+        pinned = mad_hatter.registry
+        mad_hatter.toggle_plugin("mock_plugin")
+        # plugin changes are not seen until the block ends
+        assert mad_hatter.registry is pinned
+        assert len(mad_hatter.hooks[hook_name]) == 3
+
+    assert mad_hatter.registry is not pinned
+    assert len(mad_hatter.hooks[hook_name]) == 1
+
+    # snapshots cannot be modified
+    with pytest.raises(TypeError):
+        mad_hatter.hooks[hook_name] = []
+
+
+def test_option_instance_per_registry(mad_hatter: MadHatter):
+    procedures_agent = mad_hatter.get_option_instance("procedures_agent")
+    assert isinstance(procedures_agent, ProceduresAgent)
+
+    # built once for the registry
+    assert mad_hatter.get_option_instance("procedures_agent") is procedures_agent
+    assert mad_hatter.registry.instances["procedures_agent"] is procedures_agent
+
+    # a new registry resolves the option again
+    mad_hatter.sync_hooks_tools_and_forms()
+    assert "procedures_agent" not in mad_hatter.registry.instances
+    assert isinstance(mad_hatter.get_option_instance("procedures_agent"), ProceduresAgent)
+
+    with pytest.raises(Exception):
+        mad_hatter.get_option_instance("no_option")
+
+
+def test_execute_hook_during_toggles(mad_hatter: MadHatter, stray):
+    new_plugin_zip_path = create_mock_plugin_zip(flat=True)
+    mad_hatter.install_plugin(new_plugin_zip_path)
+
+    errors = []
+    done = threading.Event()
+
+    def toggle():
+        try:
+            for _ in range(20):
+                mad_hatter.toggle_plugin("mock_plugin")
+                mad_hatter.sync_hooks_tools_and_forms()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=toggle)
+    thread.start()
+    while not done.is_set():
+        # must always find the hook, at least from core_plugin
+        mad_hatter.execute_hook("agent_prompt_prefix", "prefix", cat=stray)
+    thread.join()
+
+    assert errors == []
+
+
+def test_find_plugins_keeps_plugins_visible(mad_hatter: MadHatter, monkeypatch):
+    new_plugin_zip_path = create_mock_plugin_zip(flat=True)
+    mad_hatter.install_plugin(new_plugin_zip_path)
+    # inactive plugins are created again by the discovery
+    mad_hatter.toggle_plugin("mock_plugin")
+
+    seen = []
+    create_plugin = mad_hatter.create_plugin
+
+    def checking_create_plugin(plugin_path):
+        # lookups during the rebuild still find the previous plugins
+        seen.append(sorted(mad_hatter.plugins))
+        return create_plugin(plugin_path)
+
+    monkeypatch.setattr(mad_hatter, "create_plugin", checking_create_plugin)
+    mad_hatter.find_plugins()
+
+    assert seen == [["core_plugin", "mock_plugin"]]
+    assert sorted(mad_hatter.plugins) == ["core_plugin", "mock_plugin"]
+
+
 def test_plugin_uninstall_non_existent(mad_hatter: MadHatter):
     # should not throw error
     assert len(mad_hatter.plugins) == 1  # core_plugin
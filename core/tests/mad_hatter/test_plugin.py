@@ -1,9 +1,11 @@
 import os
 import pytest
+import json
 import fnmatch
 import subprocess
 
 from inspect import isfunction
+from unittest.mock import patch
 
 from tests.conftest import clean_up_mocks
 
@@ -128,6 +130,33 @@ def test_save_settings(plugin):
     assert settings["a"] == fake_settings["a"]
 
 
+def test_load_settings_is_cached(plugin):
+    plugin.save_settings({"a": 42})
+    settings_file_path = os.path.join(plugin.path, "settings.json")
+
+    # no temporary file is left behind by the atomic write
+    assert not os.path.exists(f"{settings_file_path}.tmp")
+
+    # callers cannot modify the cached settings
+    settings = plugin.load_settings()
+    settings["a"] = 0
+    assert plugin.load_settings()["a"] == 42
+
+    # cached settings are used as long as the file does not change
+    with patch("builtins.open", side_effect=AssertionError("settings read again")):
+        assert plugin.load_settings()["a"] == 42
+
+
+def test_load_settings_changed_on_disk(plugin):
+    plugin.save_settings({"a": 42})
+    settings_file_path = os.path.join(plugin.path, "settings.json")
+
+    with open(settings_file_path, "w") as f:
+        json.dump({"a": 4242}, f)
+
+    assert plugin.load_settings()["a"] == 4242
+
+
 # Check if plugin requirements have been installed
 # ATTENTION: not using `plugin` fixture here, we instantiate and cleanup manually
 #           to use the unmocked Plugin class
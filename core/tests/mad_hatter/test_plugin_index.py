@@ -0,0 +1,85 @@
+import os
+import shutil
+
+import cat.mad_hatter.plugin as plugin_module
+from cat.mad_hatter.plugin import Plugin
+from cat.mad_hatter.plugin_index import PluginIndex
+
+mock_plugin_path = "tests/mocks/mock_plugin/"
+
+
+def test_fingerprint(client):
+    fingerprint = PluginIndex.fingerprint(mock_plugin_path)
+
+    assert "mock_tool.py" in fingerprint
+    assert "settings.json" not in fingerprint
+    assert all(not f.startswith("__pycache__") for f in fingerprint)
+
+
+def test_plugin_index_entry(client):
+    index = PluginIndex()
+    plugin = Plugin(mock_plugin_path, index=index)
+    plugin.activate()
+
+    entry = index.get("mock_plugin", plugin.fingerprint)
+    assert entry["manifest"] == plugin.manifest
+    assert entry["fingerprint"] == plugin.fingerprint
+
+    # saved on disk and read back at the next startup
+    index.save()
+    assert PluginIndex().get("mock_plugin", plugin.fingerprint) == entry
+
+    plugin.deactivate()
+
+
+def test_plugin_index_skips_unchanged_plugins(client, tmp_path, monkeypatch):
+    plugin_path = str(tmp_path / "mock_plugin") + "/"
+    shutil.copytree(mock_plugin_path, plugin_path)
+
+    index = PluginIndex()
+    Plugin(plugin_path, index=index)
+
+    # unchanged plugin, manifest comes from the index
+    def fail(self):
+        raise AssertionError("manifest parsed again")
+
+    monkeypatch.setattr(Plugin, "_load_manifest", fail)
+    plugin = Plugin(plugin_path, index=index)
+    assert plugin.manifest["name"] == "MockPlugin"
+
+    # a changed file invalidates the entry
+    with open(os.path.join(plugin_path, "plugin.json"), "w") as f:
+        f.write('{"name": "Changed"}')
+    monkeypatch.undo()
+    plugin = Plugin(plugin_path, index=index)
+    assert plugin.manifest["name"] == "Changed"
+    assert index.get("mock_plugin", plugin.fingerprint)["manifest"]["name"] == "Changed"
+
+
+def test_find_plugins_keeps_unchanged_active_plugins(client):
+    mad_hatter = client.app.state.ccat.mad_hatter
+    core_plugin = mad_hatter.plugins["core_plugin"]
+
+    mad_hatter.find_plugins()
+
+    assert mad_hatter.plugins["core_plugin"] is core_plugin
+    assert "core_plugin" in mad_hatter.active_plugins
+    assert len(mad_hatter.hooks) > 0
+
+
+# conftest mocks the requirements check, this is the real one
+real_missing_requirements = Plugin.missing_requirements
+
+
+def test_requirements_checked_against_environment(client, monkeypatch):
+    index = PluginIndex()
+    plugin = Plugin(mock_plugin_path, index=index)
+    plugin.activate()
+    assert index.get("mock_plugin", plugin.fingerprint) is not None
+
+    # same plugin files, packages gone (e.g. a recreated container)
+    monkeypatch.setattr(plugin_module, "get_installed_packages", lambda: set())
+    missing = real_missing_requirements(Plugin(mock_plugin_path, index=index))
+    assert [r.strip() for r in missing] == ["pip-install-test"]
+
+    plugin.deactivate()
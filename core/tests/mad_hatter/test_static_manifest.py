@@ -0,0 +1,151 @@
+import os
+import sys
+import shutil
+
+import pytest
+
+from cat.mad_hatter.plugin import Plugin
+from cat.mad_hatter.plugin_index import PluginIndex
+from cat.mad_hatter.decorators import LazyCatHook
+from cat.mad_hatter.static_manifest import scan_module
+from cat.env import reload_config
+
+lazy_plugin_path = "tests/mocks/lazy_plugin/"
+
+HOOKS_MODULE = '''
+from cat.mad_hatter.decorators import hook
+
+
+@hook
+def before_cat_sends_message(message, cat):
+    message.text += " (lazy)"
+    return message
+
+
+@hook("agent_prompt_prefix", priority=3)
+def prefix(prefix, cat):
+    return prefix
+'''
+
+TOOLS_MODULE = '''
+from cat.mad_hatter.decorators import tool
+
+
+@tool
+def lazy_tool(tool_input, cat):
+    """Tool of the lazy plugin."""
+    return tool_input
+'''
+
+ALIASED_MODULE = '''
+from cat.mad_hatter.decorators import tool as t, hook as h
+
+
+@h
+def before_cat_reads_message(message, cat):
+    return message
+
+
+@t
+def aliased_tool(tool_input, cat):
+    """Tool declared with an aliased decorator."""
+    return tool_input
+'''
+
+
+def test_scan_module():
+    assert scan_module(HOOKS_MODULE) == {
+        "hooks": [
+            {"name": "before_cat_sends_message", "priority": 1, "symbol": "before_cat_sends_message"},
+            {"name": "agent_prompt_prefix", "priority": 3, "symbol": "prefix"},
+        ]
+    }
+
+    # modules that must be imported
+    assert scan_module("import os\n") is None
+    assert scan_module(TOOLS_MODULE) is None
+    assert scan_module("@hook(priority=PRIORITY)\ndef f(cat): pass\n") is None
+    assert scan_module("my_hook = hook(f)\n") is None
+    assert scan_module("if True:\n    @hook\n    def f(cat): pass\n") is None
+    assert scan_module("@form\nclass PizzaForm(CatForm): pass\n") is None
+    assert scan_module("def broken(:\n") is None
+
+
+def test_scan_module_aliased_decorators():
+    # aliased decorators are not recognised by name, the module is imported
+    assert scan_module(
+        "from cat.mad_hatter.decorators import tool as t\n\n"
+        "@t\ndef my_tool(tool_input, cat):\n    \"\"\"Tool.\"\"\"\n"
+    ) is None
+    assert scan_module(
+        "from cat.mad_hatter.decorators import hook as h\n\n"
+        "@h\ndef before_cat_sends_message(message, cat):\n    return message\n"
+    ) is None
+    # something else imported as `hook`
+    assert scan_module(
+        "from my_helpers import make_tool as hook\n\n"
+        "@hook\ndef before_cat_sends_message(message, cat):\n    return message\n"
+    ) is None
+    # `hook` not imported from the Cat decorators, or not imported at all
+    assert scan_module(HOOKS_MODULE.replace("cat.mad_hatter.decorators", "my_helpers")) is None
+    assert scan_module("@hook\ndef before_cat_sends_message(message, cat): pass\n") is None
+    assert scan_module(
+        "from cat.mad_hatter.decorators import *\n\n"
+        "@hook\ndef before_cat_sends_message(message, cat): pass\n"
+    ) is None
+    # decorators other than @hook
+    assert scan_module(
+        "import cat.mad_hatter.decorators as d\n\n"
+        "@d.tool\ndef my_tool(tool_input, cat):\n    \"\"\"Tool.\"\"\"\n"
+    ) is None
+
+
+@pytest.fixture
+def lazy_plugin(client):
+    os.makedirs(lazy_plugin_path)
+    with open(os.path.join(lazy_plugin_path, "lazy_hooks.py"), "w") as f:
+        f.write(HOOKS_MODULE)
+    with open(os.path.join(lazy_plugin_path, "lazy_tools.py"), "w") as f:
+        f.write(TOOLS_MODULE)
+    with open(os.path.join(lazy_plugin_path, "lazy_aliased.py"), "w") as f:
+        f.write(ALIASED_MODULE)
+    os.environ["CCAT_PLUGINS_LAZY_IMPORT"] = "true"
+    reload_config()
+
+    plugin = Plugin(lazy_plugin_path, index=PluginIndex())
+    yield plugin
+
+    plugin.deactivate()
+    del os.environ["CCAT_PLUGINS_LAZY_IMPORT"]
+    reload_config()
+    shutil.rmtree(lazy_plugin_path)
+
+
+def test_lazy_import(lazy_plugin):
+    hooks_module = "tests.mocks.lazy_plugin.lazy_hooks"
+    tools_module = "tests.mocks.lazy_plugin.lazy_tools"
+
+    lazy_plugin.activate()
+
+    # the module with tools is imported, the one with only hooks is not
+    assert tools_module in sys.modules
+    assert hooks_module not in sys.modules
+    assert sorted(t.name for t in lazy_plugin.tools) == ["aliased_tool", "lazy_tool"]
+
+    hooks = {h.name: h for h in lazy_plugin.hooks}
+    assert set(hooks) == {"before_cat_sends_message", "agent_prompt_prefix", "before_cat_reads_message"}
+    # hooks of modules with aliased decorators are imported right away
+    assert not isinstance(hooks["before_cat_reads_message"], LazyCatHook)
+    assert isinstance(hooks["before_cat_sends_message"], LazyCatHook)
+    assert hooks["agent_prompt_prefix"].priority == 3
+    assert hooks["agent_prompt_prefix"].plugin_id == "lazy_plugin"
+
+    # first run imports the module
+    assert hooks["agent_prompt_prefix"].function("prefix", cat=None) == "prefix"
+    assert hooks_module in sys.modules
+
+    # the static manifest is kept in the plugin index
+    entry = lazy_plugin._index.get("lazy_plugin", lazy_plugin.fingerprint)
+    assert entry["static_manifest"]["lazy_tools.py"] is None
+    assert entry["static_manifest"]["lazy_aliased.py"] is None
+    assert len(entry["static_manifest"]["lazy_hooks.py"]["hooks"]) == 2
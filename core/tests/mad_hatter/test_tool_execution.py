@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+
+from cat.mad_hatter.decorators import tool
+from cat.mad_hatter.tool_executor import ToolProcessPool
+
+from tests.mocks.mock_tool_execution import (
+    process_tool,
+    slow_process_tool,
+    greedy_process_tool,
+    slow_thread_tool,
+    inline_tool,
+)
+
+
+@pytest.fixture
+def process_pool():
+    yield ToolProcessPool()
+    ToolProcessPool().shutdown()
+
+
+def test_tool_execution_validation():
+    def sync_tool(tool_input, cat):
+        """Sync tool."""
+
+    async def async_tool(tool_input, cat):
+        """Async tool."""
+
+    with pytest.raises(ValueError):
+        tool(execution="elsewhere")(sync_tool)
+    with pytest.raises(ValueError):
+        tool(execution="process")(async_tool)
+    with pytest.raises(ValueError):
+        tool(execution="inline", timeout=1)(sync_tool)
+    with pytest.raises(ValueError):
+        tool(memory_limit_mb=100)(sync_tool)
+
+    assert tool(sync_tool).execution == "thread"
+    assert tool(timeout=1)(async_tool).timeout == 1
+
+
+def test_inline_tool(stray):
+    output = stray.loop.run_until_complete(inline_tool._arun("meow", stray=stray))
+    assert output == "meow inline"
+
+
+def test_thread_tool_timeout(stray):
+    with pytest.raises(asyncio.TimeoutError):
+        stray.loop.run_until_complete(slow_thread_tool._arun("meow", stray=stray))
+
+
+def test_process_tool(stray, process_pool):
+    output = stray.loop.run_until_complete(process_tool._arun("meow", stray=stray))
+    assert output == "meow in a process, cat is None"
+
+
+def test_process_tool_timeout(stray, process_pool):
+    with pytest.raises(asyncio.TimeoutError):
+        stray.loop.run_until_complete(slow_process_tool._arun("meow", stray=stray))
+
+    # the stuck worker is gone and next calls get a new pool
+    assert process_pool._pending == {}
+    output = stray.loop.run_until_complete(process_tool._arun("meow", stray=stray))
+    assert output == "meow in a process, cat is None"
+
+
+def test_process_tool_memory_limit(stray, process_pool):
+    with pytest.raises(MemoryError):
+        stray.loop.run_until_complete(greedy_process_tool._arun("meow", stray=stray))
+
+    # the limit is for that call only
+    output = stray.loop.run_until_complete(process_tool._arun("meow", stray=stray))
+    assert output == "meow in a process, cat is None"
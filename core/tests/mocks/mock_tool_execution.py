@@ -0,0 +1,33 @@
+import time
+
+from cat.mad_hatter.decorators import tool
+
+
+@tool(execution="process")
+def process_tool(tool_input, cat):
+    """Tool running in a worker process."""
+    return f"{tool_input} in a process, cat is {cat}"
+
+
+@tool(execution="process", timeout=1)
+def slow_process_tool(tool_input, cat):
+    """Tool running in a worker process and never finishing in time."""
+    time.sleep(60)
+
+
+@tool(execution="process", memory_limit_mb=512)
+def greedy_process_tool(tool_input, cat):
+    """Tool running in a worker process and allocating too much memory."""
+    return len(bytearray(1024 * 1024 * 1024))
+
+
+@tool(timeout=0.1)
+def slow_thread_tool(tool_input, cat):
+    """Tool running in a thread and not finishing in time."""
+    time.sleep(1)
+
+
+@tool(execution="inline")
+def inline_tool(tool_input, cat):
+    """Tool running in the event loop."""
+    return f"{tool_input} inline"
@@ -3,7 +3,7 @@ import pytest
 import time
 import jwt
 
-from cat.env import get_env
+from cat.env import get_env, reload_config
 from cat.auth.permissions import AuthPermission, AuthResource
 from cat.auth.auth_utils import is_jwt
 
@@ -103,6 +103,7 @@ def test_jwt_expiration(secure_client):
 
     # set ultrashort JWT expiration time
     os.environ["CCAT_JWT_EXPIRE_MINUTES"] = "0.05"  # 3 seconds
+    reload_config()
 
     # not allowed
     response = secure_client.get("/")
@@ -134,6 +135,7 @@ def test_jwt_expiration(secure_client):
 
     # restore default env
     del os.environ["CCAT_JWT_EXPIRE_MINUTES"]
+    reload_config()
 
 
 # test ws and http endpoints can get user_id from JWT
@@ -181,3 +183,73 @@ def test_jwt_imposes_user_id(secure_client):
         assert em["metadata"]["source"] == "admin"
         assert em["page_content"] == "hey"
     
+
+
+@pytest.mark.asyncio
+async def test_verified_jwt_is_cached(client, monkeypatch):
+    res = client.post("/auth/token", json={"username": "admin", "password": "admin"})
+    token = res.json()["access_token"]
+
+    decoded = []
+    jwt_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decoded.append(args[0])
+        return jwt_decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+
+    auth_handler = client.app.state.ccat.core_auth_handler
+    for _ in range(3):
+        user_info = await auth_handler.authorize_user_from_jwt(
+            token, AuthResource.LLM, AuthPermission.WRITE
+        )
+        assert user_info.name == "admin"
+    assert decoded == [token]
+
+    # tokens are not trusted after a secret change
+    os.environ["CCAT_JWT_SECRET"] = "another_secret"
+    reload_config()
+    try:
+        user_info = await auth_handler.authorize_user_from_jwt(
+            token, AuthResource.LLM, AuthPermission.WRITE
+        )
+        assert user_info is None
+    finally:
+        del os.environ["CCAT_JWT_SECRET"]
+        reload_config()
+
+
+def test_jwt_cache_concurrent_decode(client, monkeypatch):
+    import threading
+    import cat.factory.custom_auth_handler as custom_auth_handler
+
+    monkeypatch.setattr(custom_auth_handler, "JWT_CACHE_SIZE", 4)
+    tokens = [
+        jwt.encode(
+            {"username": f"user_{i}", "exp": time.time() + 60},
+            get_env("CCAT_JWT_SECRET"),
+            algorithm=get_env("CCAT_JWT_ALGORITHM"),
+        )
+        for i in range(8)
+    ]
+
+    auth_handler = client.app.state.ccat.core_auth_handler
+    errors = []
+
+    def decode():
+        try:
+            for _ in range(200):
+                for i, token in enumerate(tokens):
+                    assert auth_handler.decode_jwt(token)["username"] == f"user_{i}"
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=decode) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(auth_handler._verified_tokens) <= 4
@@ -71,3 +71,65 @@ def test_upsert_llm_settings_success(client):
     assert json["name"] == new_llm
     assert json["value"]["url"] == invented_url
     assert json["schema"]["languageModelName"] == new_llm
+
+
+def test_upsert_llm_settings_by_role(client):
+    # utility role has no dedicated model at startup
+    response = client.get("/llm/settings")
+    assert response.json()["roles"] == {"chat": None, "router": None, "utility": None}
+
+    new_llm = "LLMCustomConfig"
+    payload = {"url": "https://example.com/utility", "options": {}}
+    response = client.put(f"/llm/settings/{new_llm}?role=utility", json=payload)
+    json = response.json()
+    assert response.status_code == 200
+    assert json["role"] == "utility"
+    assert json["value"]["url"] == "https://example.com/utility"
+
+    # role is saved, main LLM is untouched
+    response = client.get("/llm/settings")
+    json = response.json()
+    assert json["roles"] == {"chat": None, "router": None, "utility": new_llm}
+    assert json["selected_configuration"] is None
+
+    # router falls back to utility, chat is still the default LLM
+    ccat = client.app.state.ccat
+    assert ccat.llm_registry.get("utility").url == "https://example.com/utility"
+    assert ccat.llm_registry.get("router") is ccat.llm_registry.get("utility")
+    assert ccat.llm_registry.get("chat") is ccat._llm
+
+
+def test_upsert_llm_settings_wrong_role(client):
+    response = client.put("/llm/settings/LLMDefaultConfig?role=meow", json={})
+    assert response.status_code == 400
+    assert "Role meow not supported" in response.json()["detail"]["error"]
+
+
+def test_upsert_llm_settings_by_role_invalid_config(client):
+    # the model cannot be built from this configuration
+    response = client.put("/llm/settings/LLMCustomConfig?role=utility", json={})
+    assert response.status_code == 400
+
+    # nothing saved
+    response = client.get("/llm/settings")
+    assert response.json()["roles"]["utility"] is None
+
+
+def test_delete_llm_role(client):
+    payload = {"url": "https://example.com/utility", "options": {}}
+    client.put("/llm/settings/LLMCustomConfig?role=utility", json=payload)
+
+    response = client.delete("/llm/roles/utility")
+    assert response.status_code == 200
+    assert response.json() == {"deleted": "utility"}
+
+    # utility falls back to the chat model
+    response = client.get("/llm/settings")
+    assert response.json()["roles"]["utility"] is None
+    ccat = client.app.state.ccat
+    assert ccat.llm_registry.get("utility") is ccat._llm
+
+    # nothing left to delete
+    assert client.delete("/llm/roles/utility").status_code == 404
+    # the chat model is removed by selecting another one
+    assert client.delete("/llm/roles/chat").status_code == 400
@@ -0,0 +1,145 @@
+import os
+import threading
+
+import cat.mad_hatter.plugin_dependencies as plugin_dependencies
+from cat.mad_hatter.plugin import Plugin
+from cat.env import reload_config
+
+from tests.utils import create_mock_plugin_zip
+
+
+def test_pip_install_command():
+    command = plugin_dependencies.pip_install_command("requirements.txt")
+    assert "--no-cache-dir" in command
+    assert "--no-index" not in command
+
+    pip_env = {
+        "CCAT_PIP_CACHE_DIR": "/tmp/pip-cache",
+        "CCAT_PIP_FIND_LINKS": "/wheels",
+        "CCAT_PIP_OFFLINE": "true",
+    }
+    os.environ.update(pip_env)
+    reload_config()
+    try:
+        command = plugin_dependencies.pip_install_command("requirements.txt")
+    finally:
+        for name in pip_env:
+            del os.environ[name]
+        reload_config()
+    assert command[-2:] == ["-r", "requirements.txt"]
+    assert command[command.index("--cache-dir") + 1] == "/tmp/pip-cache"
+    assert command[command.index("--find-links") + 1] == "/wheels"
+    assert "--no-index" in command
+
+
+def test_toggle_installs_dependencies_in_background(client, just_installed_plugin, monkeypatch):
+    installed = []
+    release = threading.Event()
+
+    def mock_missing_requirements(self):
+        return [] if installed else ["pip-install-test\n"]
+
+    def mock_install_requirements(plugin_id, requirements):
+        release.wait(timeout=10)
+        installed.extend(requirements)
+
+    monkeypatch.setattr(Plugin, "missing_requirements", mock_missing_requirements)
+    monkeypatch.setattr(plugin_dependencies, "install_requirements", mock_install_requirements)
+
+    # deactivate, then activate again: dependencies are missing
+    client.put("/plugins/toggle/mock_plugin")
+    response = client.put("/plugins/toggle/mock_plugin")
+    assert response.status_code == 200
+    assert response.json()["dependencies"]["status"] in ["pending", "running"]
+
+    # plugin is not active until the installation is done
+    response = client.get("/plugins/mock_plugin")
+    assert not response.json()["data"]["active"]
+
+    release.set()
+    mad_hatter = client.app.state.ccat.mad_hatter
+    mad_hatter.dependency_jobs["mock_plugin"].future.result(timeout=10)
+
+    response = client.get("/plugins/mock_plugin/dependencies")
+    job = response.json()["data"]
+    assert job["status"] == "done"
+    assert job["requirements"] == ["pip-install-test"]
+    assert installed == ["pip-install-test"]
+
+    response = client.get("/plugins/mock_plugin")
+    assert response.json()["data"]["active"]
+    assert "mock_tool" in [t.name for t in mad_hatter.tools]
+
+
+def test_failed_dependencies_do_not_activate(client, just_installed_plugin, monkeypatch):
+    def mock_install_requirements(plugin_id, requirements):
+        raise Exception("no such package")
+
+    monkeypatch.setattr(Plugin, "missing_requirements", lambda self: ["not-a-package\n"])
+    monkeypatch.setattr(plugin_dependencies, "install_requirements", mock_install_requirements)
+
+    client.put("/plugins/toggle/mock_plugin")
+    client.put("/plugins/toggle/mock_plugin")
+    client.app.state.ccat.mad_hatter.dependency_jobs["mock_plugin"].future.result(timeout=10)
+
+    job = client.get("/plugins/mock_plugin/dependencies").json()["data"]
+    assert job["status"] == "failed"
+    assert "no such package" in job["error"]
+    assert not client.get("/plugins/mock_plugin").json()["data"]["active"]
+
+
+def test_upload_returns_dependencies_job(client, monkeypatch):
+    release = threading.Event()
+
+    monkeypatch.setattr(Plugin, "missing_requirements", lambda self: ["pip-install-test\n"])
+    monkeypatch.setattr(
+        plugin_dependencies, "install_requirements", lambda plugin_id, requirements: release.wait(timeout=10)
+    )
+
+    zip_path = create_mock_plugin_zip(flat=True)
+    with open(zip_path, "rb") as f:
+        response = client.post(
+            "/plugins/upload/", files={"file": ("mock_plugin.zip", f, "application/zip")}
+        )
+
+    assert response.status_code == 200
+    job = response.json()["dependencies"]
+    assert job["plugin_id"] == "mock_plugin"
+    assert job["status"] in ["pending", "running"]
+
+    release.set()
+    client.app.state.ccat.mad_hatter.dependency_jobs["mock_plugin"].future.result(timeout=10)
+
+
+def test_failed_activation_is_reported(client, just_installed_plugin, monkeypatch):
+    activating = threading.Event()
+    release = threading.Event()
+    installed = []
+
+    def mock_install_requirements(plugin_id, requirements):
+        installed.extend(requirements)
+
+    def mock_activate(self):
+        activating.set()
+        release.wait(timeout=10)
+        raise Exception("broken plugin")
+
+    monkeypatch.setattr(Plugin, "missing_requirements", lambda self: [] if installed else ["pip-install-test\n"])
+    monkeypatch.setattr(plugin_dependencies, "install_requirements", mock_install_requirements)
+    monkeypatch.setattr(Plugin, "activate", mock_activate)
+
+    client.put("/plugins/toggle/mock_plugin")
+    client.put("/plugins/toggle/mock_plugin")
+
+    # requirements are installed, but the plugin is not active yet
+    assert activating.wait(timeout=10)
+    job = client.get("/plugins/mock_plugin/dependencies").json()["data"]
+    assert job["status"] == "activating"
+
+    release.set()
+    client.app.state.ccat.mad_hatter.dependency_jobs["mock_plugin"].future.result(timeout=10)
+
+    job = client.get("/plugins/mock_plugin/dependencies").json()["data"]
+    assert job["status"] == "failed"
+    assert "Activation failed: broken plugin" in job["error"]
+    assert not client.get("/plugins/mock_plugin").json()["data"]["active"]
@@ -3,3 +3,21 @@
 
 def test_get_setting():
     pass
+
+
+def test_setting_names_are_unique(client):
+    setting = {"name": "meow", "value": {"a": 1}}
+    response = client.post("/settings/", json=setting)
+    assert response.status_code == 200
+    setting_id = response.json()["setting"]["setting_id"]
+
+    response = client.post("/settings/", json=setting)
+    assert response.status_code == 400
+    assert "already exists" in response.json()["detail"]["error"]
+
+    response = client.post("/settings/", json={"name": "purr", "value": {}})
+    response = client.put(f"/settings/{response.json()['setting']['setting_id']}", json=setting)
+    assert response.status_code == 400
+
+    response = client.get("/settings/", params={"search": "meow"})
+    assert [s["setting_id"] for s in response.json()["settings"]] == [setting_id]
@@ -1,4 +1,69 @@
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from cat.main import cheshire_cat_api
+from cat.utils import get_cat_version
+
+
 def test_ping_success(client):
     response = client.get("/")
     assert response.status_code == 200
     assert response.json()["status"] == "We're all mad here, dear!"
+
+
+def test_health(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert response.json()["version"] == client.get("/").json()["version"]
+
+
+def test_version_read_at_startup(client):
+    get_cat_version.cache_clear()
+    with TestClient(cheshire_cat_api) as restarted_client:
+        with patch("builtins.open", side_effect=AssertionError("pyproject.toml read")):
+            response = restarted_client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["version"] == get_cat_version()
+
+
+def test_ready(client):
+    # an LLM is configured
+    payload = {"url": "https://example.com", "options": {}}
+    client.put("/llm/settings/LLMCustomConfig", json=payload)
+
+    probe = client.app.state.readiness
+    probe.run_checks()
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    json = response.json()
+    assert json["ready"]
+    assert set(json["checks"].keys()) == {"vector_db", "llm", "plugins"}
+
+
+def test_not_ready(client, monkeypatch):
+    probe = client.app.state.readiness
+
+    def unreachable():
+        raise ConnectionError("vector db unreachable")
+
+    monkeypatch.setattr(probe, "check_vector_db", unreachable)
+    probe.run_checks()
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    json = response.json()
+    assert not json["ready"]
+    assert json["checks"]["vector_db"] == {"ok": False, "error": "vector db unreachable"}
+
+
+def test_not_ready_without_llm(client):
+    # no LLM configured, the default one is loaded
+    probe = client.app.state.readiness
+    probe.run_checks()
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    json = response.json()
+    assert json["checks"]["llm"] == {"ok": False, "llm": "LLMDefault"}
@@ -2,16 +2,20 @@ import os
 import pytest
 
 from cat import utils
+from cat.env import reload_config
 
 
 def test_get_base_url():
     assert utils.get_base_url() == "http://localhost:1865/"
      # test when CCAT_CORE_USE_SECURE_PROTOCOLS is set
     os.environ["CCAT_CORE_USE_SECURE_PROTOCOLS"] = "1"
+    reload_config()
     assert utils.get_base_url() == "https://localhost:1865/"
     os.environ["CCAT_CORE_USE_SECURE_PROTOCOLS"] = "0"
+    reload_config()
     assert utils.get_base_url() == "http://localhost:1865/"
     os.environ["CCAT_CORE_USE_SECURE_PROTOCOLS"] = ""
+    reload_config()
     assert utils.get_base_url() == "http://localhost:1865/"
 
 
@@ -1,5 +1,5 @@
 import os
-from cat.env import get_supported_env_variables, get_env
+from cat.env import get_supported_env_variables, get_env, get_config, reload_config
 
 
 def test_get_env(client):
@@ -23,3 +23,24 @@ def test_get_env(client):
         # TODO: take away in v2
         # missing prefix (legacy)
         assert get_env(k.replace("CCAT_", "")) == v
+
+
+def test_config(client):
+    config = get_config()
+    assert get_config() is config  # read only once
+    assert config.core_port == "1865"
+    assert config.jwt_expire_minutes == 60 * 24
+    assert config.core_use_secure_protocols is False
+
+    os.environ["CCAT_JWT_EXPIRE_MINUTES"] = "1"
+    os.environ["CCAT_CORE_USE_SECURE_PROTOCOLS"] = "true"
+    try:
+        # environment changes are seen only after reload
+        assert get_config().jwt_expire_minutes == 60 * 24
+        config = reload_config()
+        assert config.jwt_expire_minutes == 1.0
+        assert config.core_use_secure_protocols is True
+    finally:
+        del os.environ["CCAT_JWT_EXPIRE_MINUTES"]
+        del os.environ["CCAT_CORE_USE_SECURE_PROTOCOLS"]
+        reload_config()
@@ -0,0 +1,73 @@
+import json
+
+from loguru import logger
+
+from cat.log import log
+
+
+class Unprintable:
+    def __repr__(self):
+        raise AssertionError("message should not be formatted")
+
+
+def test_disabled_level_does_no_work(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("caller lookup should be skipped")
+
+    monkeypatch.setattr(log, "_min_level_no", log.get_level_no("WARNING"))
+    monkeypatch.setattr(log, "get_caller_info", fail)
+
+    assert not log.is_enabled("DEBUG")
+    log.debug("{}", Unprintable())
+    log.info(Unprintable())
+
+
+def test_lazy_formatting(monkeypatch):
+    logged = []
+    monkeypatch.setattr(log, "_min_level_no", log.get_level_no("DEBUG"))
+    monkeypatch.setattr(
+        "cat.log.logger.bind",
+        lambda **kwargs: type("L", (), {"log": lambda self, *a: logged.append((kwargs, a))})(),
+    )
+
+    log.debug("Executing {}::{}", "core_plugin", "agent_prompt_prefix")
+
+    extra, (level, msg) = logged[0]
+    assert level == "DEBUG"
+    assert msg == '"Executing core_plugin::agent_prompt_prefix"'
+    assert extra["original_caller"] == "test_lazy_formatting"
+    assert extra["original_name"].endswith("tests.test_log")
+
+
+def test_json_log_format(monkeypatch, capsys):
+    from langchain_core.prompts import ChatPromptTemplate
+    from cat import utils
+
+    monkeypatch.setattr(log, "LOG_FORMAT", "json")
+    monkeypatch.setattr(log, "prompt_max_chars", 10)
+    monkeypatch.setattr(log, "prompt_sample_rate", 1.0)
+    log.default_log()
+    try:
+        log.warning("meow")
+        prompt = ChatPromptTemplate.from_messages([("system", "a" * 30)]).invoke({})
+        utils.langchain_log_prompt(prompt, "MAIN PROMPT")
+
+        monkeypatch.setattr(log, "prompt_sample_rate", 0.0)
+        utils.langchain_log_output("not logged", "MAIN PROMPT OUTPUT")
+        logger.complete()
+    finally:
+        monkeypatch.setattr(log, "LOG_FORMAT", "pretty")
+        log.default_log()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(lines) == 2
+
+    assert lines[0]["level"] == "WARNING"
+    assert lines[0]["message"] == "meow"
+    assert lines[0]["function"] == "test_json_log_format"
+
+    assert lines[1]["event"] == "llm_prompt"
+    assert lines[1]["function"] == "langchain_log_prompt"
+    assert lines[1]["messages"] == [
+        {"type": "SystemMessage", "content": "aaaaaaaaaa... [20 chars truncated]"}
+    ]
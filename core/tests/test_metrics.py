@@ -0,0 +1,48 @@
+from cat.metrics import Counter, Histogram, Gauge, MetricsRegistry, TURNS, HOOK_DURATION
+
+
+def test_metrics_render():
+    counter = Counter("test_counter_total", "A counter", ["kind"])
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    assert counter.get(kind="a") == 3
+
+    gauge = Gauge("test_gauge", "A gauge")
+    gauge.set_function(lambda: 7)
+
+    histogram = Histogram("test_histogram_seconds", "A histogram", buckets=[0.1, 1])
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    text = MetricsRegistry().render()
+    assert "# TYPE test_counter_total counter" in text
+    assert 'test_counter_total{kind="a"} 3' in text
+    assert "test_gauge 7" in text
+    assert 'test_histogram_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_histogram_seconds_bucket{le="1"} 2' in text
+    assert 'test_histogram_seconds_bucket{le="+Inf"} 3' in text
+    assert "test_histogram_seconds_count 3" in text
+
+
+def test_metrics_endpoint(client):
+    turns = TURNS.get(status="ok")
+    hooks = HOOK_DURATION.get_count(hook="before_cat_reads_message")
+
+    response = client.post("/message", json={"text": "meow"})
+    assert response.status_code == 200
+
+    assert TURNS.get(status="ok") == turns + 1
+    assert HOOK_DURATION.get_count(hook="before_cat_reads_message") == hooks + 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    for name in [
+        "cat_turn_duration_seconds_count",
+        'cat_stage_duration_seconds_count{stage="memory_agent"}',
+        'cat_recall_duration_seconds_count{collection="episodic"}',
+        'cat_cache_requests_total{cache="settings",result="hit"}',
+        "cat_active_strays 1",
+    ]:
+        assert name in response.text
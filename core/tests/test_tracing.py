@@ -0,0 +1,114 @@
+import json
+
+import httpx
+import pytest
+
+from cat.tracing import Tracer, Trace, FileSpanExporter, OTLPSpanExporter
+
+
+@pytest.fixture
+def tracer():
+    tracer = Tracer()
+    yield tracer
+    # back to the configuration from the environment (tracing disabled)
+    tracer.configure()
+
+
+def test_span_outside_trace_is_noop(tracer):
+    tracer.configure(exporters=[], attach_to_why=False)
+    with tracer.start_trace("turn") as trace:
+        assert trace is None
+    with tracer.span("hook") as span:
+        assert span is None
+
+
+def test_nested_spans(tracer):
+    exported = []
+
+    class ListExporter:
+        def export(self, trace):
+            exported.append(trace)
+
+    tracer.configure(exporters=[ListExporter()], attach_to_why=False)
+    with tracer.start_trace("turn", user_id="Alice") as trace:
+        with tracer.span("agent", agent="main"):
+            with tracer.span("tool", tool="get_the_time"):
+                pass
+        with pytest.raises(ValueError):
+            with tracer.span("hook"):
+                raise ValueError("meow")
+    tracer.flush()
+
+    assert exported == [trace]
+    root, agent, tool, hook = trace.spans
+    assert root.parent_id is None
+    assert root.attributes == {"user_id": "Alice"}
+    assert agent.parent_id == root.span_id
+    assert tool.parent_id == agent.span_id
+    assert hook.parent_id == root.span_id
+    assert "meow" in hook.error
+    assert all(s.trace_id == trace.trace_id for s in trace.spans)
+    assert all(s.end_time >= s.start_time for s in trace.spans)
+
+
+def test_failed_trace_is_exported(tracer):
+    exported = []
+
+    class ListExporter:
+        def export(self, trace):
+            exported.append(trace)
+
+    tracer.configure(exporters=[ListExporter()], attach_to_why=False)
+    with pytest.raises(ValueError):
+        with tracer.start_trace("turn") as trace:
+            with tracer.span("agent"):
+                raise ValueError("meow")
+    tracer.flush()
+
+    assert exported == [trace]
+    root, agent = trace.spans
+    assert "meow" in root.error
+    assert "meow" in agent.error
+    assert root.end_time >= root.start_time
+
+
+def test_otlp_exporter():
+    requests = []
+
+    def collector(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200)
+
+    trace = Trace()
+    tracer = Tracer()
+    with tracer._open_span(trace, None, "turn", {"user_id": "Alice"}) as root:
+        with tracer._open_span(trace, root.span_id, "recall", {"collection": "episodic"}):
+            pass
+
+    exporter = OTLPSpanExporter("http://collector/v1/traces", transport=httpx.MockTransport(collector))
+    exporter.export(trace)
+
+    spans = requests[0]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert [s["name"] for s in spans] == ["turn", "recall"]
+    assert spans[0]["traceId"] == trace.trace_id
+    assert "parentSpanId" not in spans[0]
+    assert spans[1]["parentSpanId"] == spans[0]["spanId"]
+    assert spans[1]["attributes"] == [{"key": "collection", "value": {"stringValue": "episodic"}}]
+
+
+def test_turn_trace(client, tracer, tmp_path):
+    file_name = str(tmp_path / "traces.jsonl")
+    tracer.configure(exporters=[FileSpanExporter(file_name)], attach_to_why=True)
+
+    response = client.post("/message", json={"text": "meow"})
+    assert response.status_code == 200
+    tracer.flush()
+
+    why_trace = response.json()["why"]["trace"]
+    names = {s["name"] for s in why_trace}
+    assert {"turn", "embed", "recall", "agent", "hook", "vector_upsert"} <= names
+
+    with open(file_name) as f:
+        spans = [json.loads(line) for line in f]
+    assert [s["span_id"] for s in spans] == [s["span_id"] for s in why_trace]
+    assert len({s["trace_id"] for s in spans}) == 1